@@ -0,0 +1,180 @@
+"""whisper.cpp 대역(stand-in) 엔진
+
+실제 whisper-server / whisper-cli 바이너리와 모델 없이도 상주 ASR 워커와
+파이프라인을 리눅스에서 돌려볼 수 있도록 같은 인터페이스를 흉내 냅니다.
+
+    # whisper-server 흉내 (HTTP, /health, /inference)
+    python fake_whisper.py --host 127.0.0.1 --port 8178 -m any.bin
+
+    # whisper-cli 흉내 (--file - 로 표준 입력의 WAV를 읽고 텍스트 출력)
+    python fake_whisper.py -m any.bin --file -
+
+--file/-f가 있고 --port가 없으면 실제 바이너리처럼 whisper-cli로 동작합니다 (--cli로 강제 가능).
+
+환경 변수
+    FAKE_WHISPER_TEXT        인식 결과로 돌려줄 문장 (기본: "fake transcript")
+    FAKE_WHISPER_LANGUAGE    보고할 언어 코드 (기본: en)
+    FAKE_WHISPER_LOAD_DELAY  모델 로드에 걸리는 시간(초)
+    FAKE_WHISPER_DELAY       요청 1건당 추론 시간(초), 오디오 길이에 비례하게 하려면 RTF 사용
+    FAKE_WHISPER_RTF         오디오 1초당 추론 시간(초)
+    FAKE_WHISPER_CRASH_AFTER 이 횟수만큼 요청을 처리한 뒤 프로세스를 강제 종료
+"""
+import argparse
+import array
+import io
+import json
+import math
+import os
+import sys
+import time
+import wave
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+SILENCE_RMS = 0.01
+
+FAKE_TEXT = os.environ.get("FAKE_WHISPER_TEXT", "fake transcript")
+FAKE_LANGUAGE = os.environ.get("FAKE_WHISPER_LANGUAGE", "en")
+LOAD_DELAY = float(os.environ.get("FAKE_WHISPER_LOAD_DELAY", "0"))
+REQUEST_DELAY = float(os.environ.get("FAKE_WHISPER_DELAY", "0"))
+REQUEST_RTF = float(os.environ.get("FAKE_WHISPER_RTF", "0"))
+CRASH_AFTER = int(os.environ.get("FAKE_WHISPER_CRASH_AFTER", "0"))
+
+
+def read_wav(data):
+    """16비트 PCM WAV 바이트를 (-1~1 샘플 배열, 샘플레이트) 로 읽습니다"""
+    wf = wave.open(io.BytesIO(data), "rb")
+    rate = wf.getframerate()
+    channels = wf.getnchannels()
+    frames = wf.readframes(wf.getnframes())
+    wf.close()
+    pcm = array.array("h")
+    pcm.frombytes(frames[:len(frames) - len(frames) % 2])
+    if sys.byteorder == "big":
+        pcm.byteswap()
+    samples = [v / 32768.0 for v in pcm[::channels]]
+    return samples, rate
+
+
+def transcribe(wav_bytes, translate=False):
+    """오디오 에너지만 보고 가짜 인식 결과를 만듭니다 - 무음이면 빈 문자열"""
+    samples, rate = read_wav(wav_bytes)
+    duration = len(samples) / float(rate or 1)
+    delay = REQUEST_DELAY + REQUEST_RTF * duration
+    if delay > 0:
+        time.sleep(delay)
+    rms = math.sqrt(sum(v * v for v in samples) / len(samples)) if samples else 0.0
+    text = FAKE_TEXT if rms >= SILENCE_RMS else ""
+    language = FAKE_LANGUAGE
+    if translate and text:
+        text = f"{text} (en)"
+    segments = []
+    if text:
+        segments.append({"id": 0, "start": 0.0, "end": round(duration, 3), "text": text})
+    return {
+        "task": "translate" if translate else "transcribe",
+        "language": language,
+        "duration": round(duration, 3),
+        "text": text,
+        "segments": segments,
+    }
+
+
+class FakeWhisperHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_served = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path in ("/", "/health"):
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/inference":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", "0"))
+        body = self.rfile.read(length)
+        header = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode("latin-1")
+        message = BytesParser(policy=HTTP).parsebytes(header + body)
+        fields = {}
+        audio = None
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            payload = part.get_payload(decode=True) or b""
+            if name == "file":
+                audio = payload
+            elif name:
+                fields[name] = payload.decode("utf-8", "replace")
+        if audio is None:
+            self._send_json(400, {"error": "no file"})
+            return
+
+        translate = fields.get("translate", "false").lower() in ("1", "true")
+        result = transcribe(audio, translate=translate)
+        if fields.get("response_format", "json") == "verbose_json":
+            self._send_json(200, result)
+        else:
+            self._send_json(200, {"text": result["text"]})
+
+        FakeWhisperHandler.requests_served += 1
+        if CRASH_AFTER and FakeWhisperHandler.requests_served >= CRASH_AFTER:
+            self.wfile.flush()
+            os._exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="whisper.cpp stand-in engine")
+    parser.add_argument("--cli", action="store_true", help="whisper-cli처럼 한 번 인식하고 종료")
+    parser.add_argument("-m", "--model", default="")
+    parser.add_argument("-f", "--file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("-l", "--language", default="en")
+    parser.add_argument("-tr", "--translate", action="store_true")
+    args, _unknown = parser.parse_known_args()
+
+    if LOAD_DELAY > 0:
+        time.sleep(LOAD_DELAY)
+
+    # 실제 whisper-cli는 --file로, whisper-server는 --port로 구분되므로 같은 기준으로 모드를 고름
+    if args.cli or (args.file is not None and args.port is None):
+        if args.file in (None, "-"):
+            data = sys.stdin.buffer.read()
+        else:
+            with open(args.file, "rb") as f:
+                data = f.read()
+        result = transcribe(data, translate=args.translate)
+        if args.language == "auto":
+            print(f"whisper_full_with_state: auto-detected language: {result['language']} (p = 0.99)",
+                  file=sys.stderr)
+        if result["text"]:
+            print(f" {result['text']}")
+        return 0
+
+    server = HTTPServer((args.host, args.port or 8080), FakeWhisperHandler)
+    print(f"fake whisper server listening on {args.host}:{args.port}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,111 +1,1369 @@
+import time
+PROCESS_START = time.perf_counter()  # 콜드 스타트 측정 기준점
+
 import tkinter as tk
 from tkinter import ttk, messagebox
-from threading import Thread
-import pyaudio
-import soundfile as sf
+from threading import Thread, Condition, Lock, Event
 import subprocess
 import os
-import time
-import win32gui, win32con
+import importlib.util
 import signal
+import argparse
 import sys
 import numpy as np
 import wave
+import io
+import tempfile
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import bisect
+import math
+import itertools
+import re
+import socket
+import uuid
+import queue
+import multiprocessing
+from multiprocessing import shared_memory
+import asyncio
+import base64
+import hashlib
+import ipaddress
+import urllib.parse
+import http.client
+import unicodedata
+from concurrent.futures import Future
+from collections import deque, OrderedDict, namedtuple
 import tkinter.colorchooser as colorchooser
 import tkinter.font as tkfont
 
-# sounddevice를 선택적 import
-try:
-    import sounddevice as sd
-    SOUNDDEVICE_AVAILABLE = True
-    print("✅ sounddevice 라이브러리 사용 가능")
-except ImportError:
-    SOUNDDEVICE_AVAILABLE = False
-    print("⚠️ sounddevice 라이브러리가 없습니다. 출력 장치 캡처 기능이 제한됩니다.")
-    print("💡 pip install sounddevice로 설치하면 출력 장치 캡처가 가능합니다.")
-
-from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
+# 무거운 라이브러리(torch/transformers, sounddevice, pyaudio, pywin32)는 실제로 필요할 때
+# 함수 안에서 import 합니다. 여기서는 설치 여부만 확인해서 장치 선택 창이 바로 뜨게 합니다.
+SOUNDDEVICE_AVAILABLE = importlib.util.find_spec("sounddevice") is not None
+if not SOUNDDEVICE_AVAILABLE:
+    logging.getLogger("offlinesubtitle").info(
+        "⚠️ sounddevice 라이브러리가 없습니다. 출력 장치 캡처 기능이 제한됩니다. (pip install sounddevice)")
 
 # ========== 설정 ==========
 WHISPER_CPP_DIR = os.path.join(os.getcwd(), "whisper.cpp")
 WHISPER_MODEL = os.path.join(WHISPER_CPP_DIR, "models", "ggml-base.bin")
-WHISPER_EXE = os.path.join(WHISPER_CPP_DIR, "whisper-cli.exe")
-RECORD_SECONDS = 1  # 1초마다 녹음
-LOOP_DELAY = 1
+WHISPER_EXE = os.environ.get("WHISPER_EXE", os.path.join(WHISPER_CPP_DIR, "whisper-cli.exe"))
+# 상주 엔진 - 대역 엔진으로 바꾸려면 WHISPER_SERVER_EXE=fake_whisper.py
+WHISPER_SERVER_EXE = os.environ.get("WHISPER_SERVER_EXE", os.path.join(WHISPER_CPP_DIR, "whisper-server.exe"))
+WHISPER_ENGINE = os.environ.get("WHISPER_ENGINE", "server")  # "server": 상주 엔진, "cli": 청크마다 whisper-cli 실행
+WHISPER_SERVER_HOST = "127.0.0.1"
+WHISPER_SERVER_PORT = 0  # 0이면 빈 포트를 자동으로 고릅니다
+WHISPER_THREADS = max(1, (os.cpu_count() or 4) // 2)
+WHISPER_SERVER_START_TIMEOUT = 60  # 모델 로드 대기 시간(초)
+WHISPER_SERVER_HEALTH_INTERVAL = 5  # 상태 확인 주기(초)
+WHISPER_SERVER_MAX_RESTARTS = 5
+WHISPER_SERVER_HEALTH_FAILURES = 2      # /health가 연달아 이만큼 실패하면 멈춘 것으로 보고 재시작
+WHISPER_SERVER_STABLE_SECONDS = 300     # 재시작 후 이만큼 건강하게 돌면 재시작 횟수를 초기화
+RECORD_SECONDS = 1  # VAD를 끈 고정 창 모드의 첫 창 길이 (이후 LatencyScheduler가 조절)
 CHUNK = 1024
-FORMAT = pyaudio.paInt16
+FORMAT = 8  # pyaudio.paInt16 (pyaudio를 미리 import하지 않기 위해 값으로 고정)
 CHANNELS = 1
 RATE = 16000
+WHISPER_LANGUAGE = "auto"  # 원문 언어 - "auto"면 whisper가 감지해서 보고
+# 대상이 영어면 whisper의 translate 작업으로 바로 영어 자막을 얻고 M2M100을 건너뜀
+WHISPER_TRANSLATE_ROUTING = True
+TARGET_LANGUAGE = None  # None: 원문이 영어면 한국어, 아니면 영어
+# 여러 자막 트랙을 동시에 만들 때의 대상 언어들 (예: "ko,en,ja") - 인코더는 구간마다 한 번만 돌림
+TARGET_LANGUAGES = tuple(filter(None, os.environ.get("TARGET_LANGUAGES", "").split(","))) or None
+# whisper가 verbose_json에 보고하는 언어 이름(whisper.cpp g_lang 전체) -> 언어 코드
+WHISPER_LANGUAGE_CODES = {
+    "english": "en", "chinese": "zh", "german": "de", "spanish": "es", "russian": "ru",
+    "korean": "ko", "french": "fr", "japanese": "ja", "portuguese": "pt", "turkish": "tr",
+    "polish": "pl", "catalan": "ca", "dutch": "nl", "arabic": "ar", "swedish": "sv",
+    "italian": "it", "indonesian": "id", "hindi": "hi", "finnish": "fi", "vietnamese": "vi",
+    "hebrew": "he", "ukrainian": "uk", "greek": "el", "malay": "ms", "czech": "cs",
+    "romanian": "ro", "danish": "da", "hungarian": "hu", "tamil": "ta", "norwegian": "no",
+    "thai": "th", "urdu": "ur", "croatian": "hr", "bulgarian": "bg", "lithuanian": "lt",
+    "latin": "la", "maori": "mi", "malayalam": "ml", "welsh": "cy", "slovak": "sk",
+    "telugu": "te", "persian": "fa", "latvian": "lv", "bengali": "bn", "serbian": "sr",
+    "azerbaijani": "az", "slovenian": "sl", "kannada": "kn", "estonian": "et", "macedonian": "mk",
+    "breton": "br", "basque": "eu", "icelandic": "is", "armenian": "hy", "nepali": "ne",
+    "mongolian": "mn", "bosnian": "bs", "kazakh": "kk", "albanian": "sq", "swahili": "sw",
+    "galician": "gl", "marathi": "mr", "punjabi": "pa", "sinhala": "si", "khmer": "km",
+    "shona": "sn", "yoruba": "yo", "somali": "so", "afrikaans": "af", "occitan": "oc",
+    "georgian": "ka", "belarusian": "be", "tajik": "tg", "sindhi": "sd", "gujarati": "gu",
+    "amharic": "am", "yiddish": "yi", "lao": "lo", "uzbek": "uz", "faroese": "fo",
+    "haitian creole": "ht", "pashto": "ps", "turkmen": "tk", "nynorsk": "nn", "maltese": "mt",
+    "sanskrit": "sa", "luxembourgish": "lb", "myanmar": "my", "tibetan": "bo", "tagalog": "tl",
+    "malagasy": "mg", "assamese": "as", "tatar": "tt", "hawaiian": "haw", "lingala": "ln",
+    "hausa": "ha", "bashkir": "ba", "javanese": "jv", "sundanese": "su", "cantonese": "yue",
+    # openai-whisper의 별칭
+    "burmese": "my", "valencian": "ca", "flemish": "nl", "haitian": "ht", "letzeburgesch": "lb",
+    "pushto": "ps", "panjabi": "pa", "moldavian": "ro", "moldovan": "ro", "sinhalese": "si",
+    "castilian": "es", "mandarin": "zh",
+}
+ASR_INPUT_MODE = "stdin"  # "stdin": WAV를 파이프로 전달, "scratch": 호출마다 고유한 tmpfs 임시 파일
+# 음성 구간 검출 - "energy": 에너지/ZCR 기반, "webrtc": webrtcvad 모델, "off": 고정 RECORD_SECONDS 창
+VAD_MODE = "energy"
+VAD_FRAME_MS = 30
+VAD_BLOCK_SECONDS = 0.1         # 링 버퍼에서 이만큼 쌓일 때마다 VAD를 돌림
+VAD_ENERGY_THRESHOLD_DB = -50   # 이보다 조용하면 항상 무음
+VAD_NOISE_MARGIN_DB = 10        # 잡음 바닥보다 이만큼 커야 음성
+VAD_ZCR_MAX = 0.35
+VAD_WEBRTC_AGGRESSIVENESS = 2
+VAD_MIN_SPEECH_SECONDS = 0.3
+VAD_MAX_SEGMENT_SECONDS = 8
+VAD_HANGOVER_SECONDS = 0.4
+VAD_PRE_ROLL_SECONDS = 0.2
+# 인식 방식 - "segment": VAD 구간을 한 번씩 인식, "streaming": 커지는 창을 반복 디코딩 (LocalAgreement)
+ASR_MODE = "segment"
+STREAMING_STEP_SECONDS = 1.0        # 새 오디오가 이만큼 쌓일 때마다 창을 다시 디코딩
+STREAMING_MAX_WINDOW_SECONDS = 15   # 창이 이보다 커지면 전부 확정하고 잘라냄
+STREAMING_PROMPT_WORDS = 40         # 잘라낸 확정 텍스트 중 prompt로 넘길 단어 수
+STREAMING_STABLE_CHARS = 200        # 화면에 유지할 안정 자막 길이
+# 파이프라인 단계별 큐 깊이 (가득 차면 가장 오래된 구간을 버림)와 워커 수
+PIPELINE_QUEUE_DEPTHS = {"asr": 4, "translate": 4, "ui": 8}
+ASR_WORKERS = 1          # 워커마다 상주 Whisper 엔진을 하나씩 띄웁니다
+# True면 ASR 워커를 별도 프로세스로 띄우고 오디오는 공유 메모리 링 버퍼의 (위치, 길이, 순번) 서술자로만 넘김
+ASR_PROCESS_WORKERS = False
+ASR_PROCESS_TIMEOUT = 60.0  # 워커 프로세스 응답을 기다리는 최대 시간(초)
+# 지연 예산 스케줄러 - ASR/번역 실시간 배율을 재서 창 길이를 조절하고 밀린 구간을 합치거나 버림 (0 = 끔)
+LATENCY_BUDGET_SECONDS = float(os.environ.get("LATENCY_BUDGET_SECONDS", "3.0"))  # 말이 시작된 뒤 자막까지 목표 지연 (창 길이 포함)
+SCHEDULER_MIN_WINDOW_SECONDS = 1.0   # 창/발화 최대 길이의 하한
+SCHEDULER_MAX_WINDOW_SECONDS = 5.0   # 고정 창 모드의 창 길이 상한 (VAD 모드는 VAD_MAX_SEGMENT_SECONDS)
+SCHEDULER_EWMA_ALPHA = 0.2           # 측정값 지수 이동 평균 가중치
+SCHEDULER_MERGE_MAX_SECONDS = 15.0   # 밀린 구간을 합칠 때 한 번에 인식할 최대 길이
+SCHEDULER_SKIP_FACTOR = 2.0          # 대기만으로 예산의 이 배를 넘긴 구간은 더 새 구간이 있으면 버림
+TRANSLATION_WORKERS = 4  # 배칭을 켜면 워커들의 요청이 한 generate 호출로 묶임
+RING_BUFFER_SECONDS = 30  # 연속 캡처 링 버퍼 길이 (처리가 밀려도 이만큼은 보존)
+# 장치는 네이티브 샘플레이트/채널로 열고 RATE Hz 모노로 직접 리샘플링 (False면 RATE/CHANNELS로 강제)
+CAPTURE_NATIVE_FORMAT = True
+RESAMPLER_ZERO_CROSSINGS = 16   # 필터 한쪽 영교차 수 - 클수록 가파르지만 느림
+RESAMPLER_ROLLOFF = 0.92        # 차단 주파수 (출력 나이퀴스트 대비)
+RESAMPLER_KAISER_BETA = 8.6     # 저지대역 약 -80dB
+# 장치 레지스트리 - 장치 선택 중 핫플러그 확인 주기, 캡처 중 장치 분리 감지/대체
+DEVICE_POLL_SECONDS = 3.0
+DEVICE_WATCHDOG_SECONDS = 1.0
+DEVICE_STALL_SECONDS = 2.0  # 입력 스트림이 이만큼 조용하면(콜백 없음) 장치가 사라진 것으로 봄
+
+TRANSLATION_MODEL_NAME = "facebook/m2m100_418M"
+# 번역 엔진 - "torch": transformers/PyTorch, "ctranslate2": 변환된 CTranslate2 모델
+TRANSLATION_BACKEND = os.environ.get("TRANSLATION_BACKEND", "torch")
+# torch 백엔드 가중치 - "fp32", "bf16", "int8"(동적 양자화). bf16/int8은 변환 결과를 캐시해서 mmap
+# (int8 Linear 가중치는 로드 때 다시 패킹되므로 인스턴스 간에 공유되지 않음)
+TRANSLATION_WEIGHTS = os.environ.get("TRANSLATION_WEIGHTS", "fp32")
+TRANSLATION_WEIGHTS_CACHE_DIR = os.path.join(os.getcwd(), "models", "cache")
+CT2_MODEL_DIR = os.environ.get("CT2_MODEL_DIR", os.path.join(os.getcwd(), "models", "m2m100_418m_ct2"))
+CT2_COMPUTE_TYPE = "int8"  # "int8", "int8_float32", "float32" 등
+CT2_BEAM_SIZE = 5          # transformers 기본 generation_config(num_beams=5)와 맞춤
+COLD_START_TARGET_SECONDS = 1.5  # 프로세스 시작부터 장치 선택 창 표시까지 목표 시간
+# 워밍업 - 장치를 고르는 동안 번역 모델과 Whisper 엔진을 한 번씩 돌려 첫 구간도 평소 속도로 처리
+WARMUP_ENABLED = True
+WARMUP_SOURCE_LANGUAGES = ("en", "ko")  # WHISPER_LANGUAGE가 "auto"일 때 미리 돌려 둘 원문 언어
+WARMUP_SENTENCES = {
+    "en": "Hello everyone, thank you for joining us today.",
+    "ko": "안녕하세요, 오늘 함께해 주셔서 감사합니다.",
+    "ja": "皆さん、本日はご参加いただきありがとうございます。",
+}
+WARMUP_AUDIO_SECONDS = 1.0  # Whisper 워밍업에 쓰는 무음 길이
+# 번역 배칭 - 요청을 잠깐 모아 언어 쌍별로 한 번에 generate
+TRANSLATION_BATCHING = True
+TRANSLATION_BATCH_MAX_ITEMS = 8
+TRANSLATION_BATCH_MAX_WAIT_MS = 30
+# 번역 캐시 - 같은 문장은 모델을 다시 돌리지 않음
+TRANSLATION_CACHE_SIZE = 2048
+TRANSLATION_CACHE_TTL = 6 * 60 * 60  # 초, 0이면 만료 없음
+TRANSLATION_CACHE_FILE = os.environ.get("TRANSLATION_CACHE_FILE")  # 지정하면 재시작 후에도 유지
+
+# 로깅/메트릭 - 기본은 조용히(WARNING), METRICS_PORT를 주면 localhost에 /metrics 제공
+LOG_LEVEL = os.environ.get("SUBTITLE_LOG_LEVEL", "WARNING")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 파일 일괄 자막 - 무음 기준으로 나눈 구간을 상주 Whisper 엔진 여러 개가 나눠서 인식
+BATCH_JOBS = max(1, (os.cpu_count() or 2) // 2)  # 동시에 띄울 엔진 수 (엔진당 스레드는 코어 수 / BATCH_JOBS)
+BATCH_TRANSLATION_CHUNK = 16  # generate 한 번에 넣을 문장 수
+BATCH_READ_SECONDS = 10       # 파일을 이만큼씩 읽어 디코딩 (긴 파일도 메모리가 일정)
+# 자막 기록 - 세션마다 확정 자막을 파일로 남김 (빈 문자열이면 기록하지 않음)
+SUBTITLE_LOG_DIR = os.environ.get("SUBTITLE_LOG_DIR", os.path.join(os.getcwd(), "subtitles"))
+SUBTITLE_LOG_FORMATS = ("srt", "jsonl")  # "srt", "vtt", "jsonl" 중 선택
+SUBTITLE_LOG_FLUSH_SECONDS = 1.0  # 쌓인 항목을 파일에 쓰는 주기
+SUBTITLE_LOG_FSYNC_SECONDS = 5.0  # 디스크까지 내려보내는(fsync) 주기
+SUBTITLE_HISTORY_SIZE = 200       # 오버레이 기록 창에 보관할 최근 자막 수
+# 오버레이 - 워커가 넣은 업데이트를 Tk 스레드가 최대 OVERLAY_MAX_FPS로 모아서 그림
+OVERLAY_MAX_FPS = 15
+OVERLAY_CAPTION_LINES = 3             # 화면에 남겨 둘 자막 줄 수 (이전 줄은 흐리게)
+OVERLAY_HISTORY_COLOR = "#9e9e9e"
+OVERLAY_PROVISIONAL_COLOR = "#bdbdbd"
+# 헤드리스 자막 서버 - 파이프라인 하나의 결과를 localhost의 SSE/WebSocket 구독자 여럿에게 내보냄
+SERVE_HOST = "127.0.0.1"             # 루프백 주소만 허용 - 자막은 회의 내용이므로 외부에 열지 않음
+# 브라우저 구독자는 Origin이 localhost이거나 여기 있는 것만 받음 (예: "https://obs.example" - 쉼표로 구분)
+SERVE_ORIGINS = tuple(filter(None, os.environ.get("SUBTITLE_SERVER_ORIGINS", "").split(",")))
+SERVE_PORT = int(os.environ.get("SUBTITLE_SERVER_PORT", "8765"))
+SERVE_CLIENT_QUEUE = 64           # 구독자마다 쌓아 둘 최대 이벤트 수 - 넘치면 가장 오래된 것부터 버림
+SERVE_HEARTBEAT_SECONDS = 15.0    # 이벤트가 없을 때 연결 유지용 핑 주기
 
 # 전역 변수로 선택된 장치 저장
 selected_device_index = None
 selected_device_info = None
+selected_device_id = None  # 레지스트리의 안정적인 장치 ID
+selected_devices = []  # 함께 캡처할 장치 목록 (첫 번째가 selected_device_info)
+capture_engine = None  # 첫 번째 소스의 엔진
+capture_sources = []   # 실행 중인 CaptureSource 목록
+whisper_workers = {}  # slot -> WhisperServerWorker
+whisper_worker_lock = Lock()
+whisper_slot_locks = {}  # slot -> 시작 중 잠금 (모델 로드를 slot끼리 병렬로)
+
+# ========== 로깅 / 메트릭 ==========
+log = logging.getLogger("offlinesubtitle")
+
+
+def setup_logging(level=LOG_LEVEL):
+    """레벨별 로깅 설정 - 기본은 WARNING이라 정상 동작 중에는 콘솔에 아무것도 찍지 않습니다"""
+    logging.basicConfig(level=getattr(logging, str(level).upper(), logging.WARNING),
+                        format="%(asctime)s %(levelname)s [%(threadName)s] %(message)s")
+
+
+class Counter:
+    """단조 증가 카운터"""
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self._lock = Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def get(self):
+        return self.value
+
+
+class Gauge:
+    """현재 값 게이지 - fn을 주면 읽을 때마다 fn()을 호출합니다 (큐 깊이 등)"""
+    kind = "gauge"
+
+    def __init__(self, fn=None):
+        self.value = 0
+        self.fn = fn
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        if self.fn is not None:
+            try:
+                return self.fn()
+            except Exception:
+                return float("nan")
+        return self.value
+
+
+class Histogram:
+    """누적 버킷 히스토그램 + 최근 관측값으로 구하는 분위수(p50/p95/p99)"""
+    kind = "histogram"
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=1024)
+        self._lock = Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            self.recent.append(value)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def quantile(self, q):
+        with self._lock:
+            values = list(self.recent)
+        return float(np.percentile(values, q * 100)) if values else None
+
+    def get(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """이름 + 라벨로 메트릭을 등록/조회하고 Prometheus 텍스트나 JSON으로 내보냅니다"""
+    def __init__(self):
+        self._metrics = OrderedDict()  # (이름, 라벨) -> 메트릭
+        self._help = {}
+        self._lock = Lock()
+
+    def _get(self, factory, name, help, labels, replace=False):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None or replace:
+                metric = factory()
+                self._metrics[key] = metric
+                self._help.setdefault(name, help)
+            return metric
+
+    def counter(self, name, help="", **labels):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help="", fn=None, **labels):
+        return self._get(lambda: Gauge(fn), name, help, labels, replace=fn is not None)
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS, **labels):
+        return self._get(lambda: Histogram(buckets), name, help, labels)
+
+    def _snapshot(self):
+        """내보내기용 (키, 메트릭) 사본 - 다른 스레드가 메트릭을 등록하는 중에도 안전하게 순회
+        (게이지 fn은 락 밖에서 부르므로 fn 안에서 메트릭을 등록해도 막히지 않음)"""
+        with self._lock:
+            return list(self._metrics.items()), dict(self._help)
+
+    def to_dict(self):
+        result = {}
+        items, _ = self._snapshot()
+        for (name, labels), metric in items:
+            key = name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+            result[key] = metric.get()
+        return result
+
+    def to_prometheus(self):
+        lines = []
+        described = set()
+        items, helps = self._snapshot()
+        for (name, labels), metric in items:
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {helps.get(name, '')}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, count in zip(metric.buckets, metric.counts):
+                    cumulative += count
+                    sep = "," if label_text else ""
+                    lines.append(f'{name}_bucket{{{label_text}{sep}le="{bound}"}} {cumulative}')
+                sep = "," if label_text else ""
+                lines.append(f'{name}_bucket{{{label_text}{sep}le="+Inf"}} {metric.count}')
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}_sum{suffix} {metric.sum}")
+                lines.append(f"{name}_count{suffix} {metric.count}")
+            else:
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}{suffix} {metric.get()}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsServer:
+    """localhost에서 /metrics (Prometheus 텍스트)와 /metrics.json을 제공하는 작은 HTTP 서버"""
+    def __init__(self, port=METRICS_PORT, host="127.0.0.1", registry=metrics):
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = registry_ref.to_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(registry_ref.to_dict(), default=str).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread = Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+        log.info(f"📊 메트릭 엔드포인트: http://127.0.0.1:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
 
 # ========== 번역 모델 초기화 ==========
-tokenizer = M2M100Tokenizer.from_pretrained("facebook/m2m100_418M")
-model = M2M100ForConditionalGeneration.from_pretrained("facebook/m2m100_418M")
+class TranslationBackend:
+    """번역 엔진 공통 인터페이스 - load()로 준비하고 translate_batch()로 번역합니다"""
+    name = "base"
+
+    def load(self, report):
+        """report(progress, status)로 진행 상황을 알리며 모델을 로드합니다"""
+        raise NotImplementedError
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        """같은 언어 쌍의 문장 목록을 번역해 같은 순서의 리스트로 반환합니다"""
+        raise NotImplementedError
+
+    def translate_multi(self, texts, source_lang, target_langs):
+        """같은 원문을 여러 대상 언어로 번역해 {대상 언어: 번역 리스트}를 반환합니다
+
+        기본 구현은 대상마다 translate_batch를 부릅니다. 인코더 출력을 재사용할 수 있는
+        백엔드는 이 메서드를 오버라이드합니다.
+        """
+        return {tgt: self.translate_batch(texts, source_lang, tgt) for tgt in target_langs}
+
+    def warmup(self, pairs, sentences=WARMUP_SENTENCES):
+        """(원문 언어, 대상 언어 목록)마다 더미 번역을 한 번 돌립니다 - 결과는 버리고 캐시에도 넣지 않음
+
+        첫 generate에서 일어나는 지연 할당, 커널 선택, 가중치 페이지 로드를 실제 자막 전에 끝냅니다.
+        """
+        for source_lang, target_langs in pairs:
+            text = sentences.get(source_lang, sentences["en"])
+            if len(target_langs) > 1:
+                self.translate_multi([text], source_lang, target_langs)
+            else:
+                self.translate_batch([text], source_lang, target_langs[0])
+
+
+class TorchM2M100Backend(TranslationBackend):
+    """transformers + PyTorch 경로
+
+    weights가 "fp32"이면 기존처럼 from_pretrained로 로드합니다.
+    "bf16"/"int8"이면 처음 한 번 변환한 가중치를 safetensors 파일로 캐시해 두고,
+    다음 실행부터는 그 파일을 메모리 매핑해서 빈 모델 골격에 그대로 꽂아 넣습니다.
+    bf16은 모든 텐서가 매핑된 페이지를 그대로 쓰므로 로드가 거의 즉시 끝나고
+    여러 인스턴스가 OS 페이지 캐시의 같은 물리 메모리를 공유합니다.
+    int8은 Linear 가중치를 set_weight_bias가 fbgemm/qnnpack 형식으로 다시 패킹하면서
+    인스턴스마다 별도 메모리에 복사하므로, 공유되는 것은 임베딩·LayerNorm 같은
+    Linear가 아닌 텐서뿐이고 패킹 시간만큼 로드도 느립니다 (변환을 건너뛰는 이득만 있음).
+    """
+    name = "torch"
+
+    def __init__(self, model_name=TRANSLATION_MODEL_NAME, weights=TRANSLATION_WEIGHTS,
+                 cache_dir=TRANSLATION_WEIGHTS_CACHE_DIR):
+        if weights not in ("fp32", "bf16", "int8"):
+            raise ValueError(f"지원하지 않는 가중치 형식: {weights}")
+        self.model_name = model_name
+        self.weights = weights
+        self.cache_dir = cache_dir
+        self.tokenizer = None
+        self.model = None
+        self._tokenizer_lock = Lock()  # src_lang은 tokenizer 전역 상태라 번역 워커끼리 겹치면 안 됨
+
+    @property
+    def cache_path(self):
+        safe_name = self.model_name.replace("/", "--")
+        return os.path.join(self.cache_dir, f"{safe_name}-{self.weights}.safetensors")
+
+    def load(self, report):
+        report(5, "torch/transformers 불러오는 중...")
+        from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
+        report(40, "토크나이저 로드 중...")
+        self.tokenizer = M2M100Tokenizer.from_pretrained(self.model_name)
+        if self.weights != "fp32" and os.path.exists(self.cache_path):
+            report(60, f"캐시된 {self.weights} 가중치 매핑 중...")
+            self.model = self._load_cached()
+        else:
+            report(60, "번역 모델 로드 중...")
+            self.model = M2M100ForConditionalGeneration.from_pretrained(self.model_name)
+            if self.weights != "fp32":
+                report(80, f"{self.weights} 가중치로 변환 후 캐시 저장 중...")
+                self.model = self._convert_and_cache(self.model)
+        self.model.eval()
+
+    def _convert_and_cache(self, model):
+        """fp32 모델을 bf16/int8로 바꾸고 결과 가중치를 safetensors로 저장합니다"""
+        import torch
+        from safetensors.torch import save_file
+        if self.weights == "bf16":
+            model = model.to(torch.bfloat16)
+        else:
+            from torch.ao.quantization import per_channel_dynamic_qconfig, quantize_dynamic
+            model = quantize_dynamic(model, {torch.nn.Linear: per_channel_dynamic_qconfig}, dtype=torch.qint8)
+
+        tensors = {}
+        aliases = {}  # 묶인(tied) 임베딩처럼 같은 메모리를 쓰는 이름 -> 저장된 이름
+        seen = {}
+        for name, module in model.named_modules():
+            if isinstance(module, torch.ao.nn.quantized.dynamic.Linear):
+                qweight = module.weight()
+                tensors[f"{name}.weight_int8"] = qweight.int_repr().contiguous()
+                tensors[f"{name}.weight_scale"] = qweight.q_per_channel_scales().float().contiguous()
+                bias = module.bias()
+                if bias is not None:
+                    tensors[f"{name}.bias"] = bias.detach().contiguous()
+        for name, tensor in list(model.named_parameters(remove_duplicate=False)) + list(model.named_buffers(remove_duplicate=False)):
+            key = (tensor.data_ptr(), tensor.dtype, tuple(tensor.shape))
+            if key in seen:
+                aliases[name] = seen[key]
+                continue
+            seen[key] = name
+            tensors[name] = tensor.detach().contiguous()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        save_file(tensors, tmp_path, metadata={"weights": self.weights, "aliases": json.dumps(aliases)})
+        os.replace(tmp_path, self.cache_path)
+        log.info(f"💾 {self.weights} 번역 가중치 캐시 저장: {self.cache_path}")
+        return model
+
+    def _load_cached(self):
+        """빈(meta) 모델 골격을 만들고 메모리 매핑된 텐서를 연결합니다
+
+        Linear가 아닌 텐서는 복사 없이 매핑된 그대로 쓰고, int8 Linear는 다시 패킹되어 복사됩니다.
+        """
+        import torch
+        from safetensors import safe_open
+        from safetensors.torch import load_file
+        from transformers import GenerationConfig, M2M100Config, M2M100ForConditionalGeneration
+
+        config = M2M100Config.from_pretrained(self.model_name)
+        with torch.device("meta"):
+            model = M2M100ForConditionalGeneration(config)
+        with safe_open(self.cache_path, framework="pt") as f:
+            aliases = json.loads((f.metadata() or {}).get("aliases", "{}"))
+        tensors = load_file(self.cache_path)  # CPU에서는 mmap 기반
+
+        # int8 Linear는 미리 양자화된 값으로 동적 양자화 모듈을 바로 만듦 - set_weight_bias가
+        # 가중치를 자체 형식으로 패킹해 사본을 만들므로 이 텐서들은 매핑을 공유하지 않음
+        for name in [k[:-len(".weight_int8")] for k in tensors if k.endswith(".weight_int8")]:
+            int8 = tensors.pop(f"{name}.weight_int8")
+            scale = tensors.pop(f"{name}.weight_scale")
+            bias = tensors.pop(f"{name}.bias", None)
+            qweight = torch._make_per_channel_quantized_tensor(
+                int8, scale.double(), torch.zeros(int8.shape[0], dtype=torch.long), 0)
+            qlinear = torch.ao.nn.quantized.dynamic.Linear(int8.shape[1], int8.shape[0],
+                                                           bias_=bias is not None, dtype=torch.qint8)
+            qlinear.set_weight_bias(qweight, bias)
+            parent_name, _, child = name.rpartition(".")
+            setattr(model.get_submodule(parent_name) if parent_name else model, child, qlinear)
+
+        for name, tensor in tensors.items():
+            self._assign(model, name, tensor)
+        for name, target in aliases.items():
+            self._assign(model, name, tensors[target])
+
+        missing = [n for n, t in list(model.named_parameters()) + list(model.named_buffers()) if t.is_meta]
+        if missing:
+            raise RuntimeError(f"캐시된 가중치에 없는 텐서: {missing[:5]} - 캐시 파일을 지우고 다시 변환하세요")
+        try:
+            model.generation_config = GenerationConfig.from_pretrained(self.model_name)
+        except OSError:
+            pass
+        return model
+
+    @staticmethod
+    def _assign(model, name, tensor):
+        import torch
+        module_name, _, attr = name.rpartition(".")
+        module = model.get_submodule(module_name) if module_name else model
+        if attr in module._parameters:
+            module._parameters[attr] = torch.nn.Parameter(tensor, requires_grad=False)
+        elif attr in module._buffers:
+            module._buffers[attr] = tensor
+        else:
+            setattr(module, attr, tensor)
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        with self._tokenizer_lock:
+            self.tokenizer.src_lang = source_lang
+            encoded = self.tokenizer(texts, return_tensors="pt", padding=True)
+        generated_tokens = self.model.generate(**encoded, forced_bos_token_id=self.tokenizer.get_lang_id(target_lang))
+        return self.tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)
+
+    def translate_multi(self, texts, source_lang, target_langs):
+        """인코더는 한 번만 돌리고, 그 출력을 대상 언어 수만큼 복제해 한 번의 generate로 디코딩합니다
+
+        행 t*B+b는 문장 b의 대상 t 번역이며 decoder_input_ids를 [</s>, 대상 언어 토큰]으로 시작해
+        forced_bos_token_id와 같은 효과를 냅니다.
+        """
+        import torch
+        from transformers.modeling_outputs import BaseModelOutput
+        target_langs = list(target_langs)
+        if len(target_langs) == 1:
+            return {target_langs[0]: self.translate_batch(texts, source_lang, target_langs[0])}
+        with self._tokenizer_lock:
+            self.tokenizer.src_lang = source_lang
+            encoded = self.tokenizer(texts, return_tensors="pt", padding=True)
+        count = len(target_langs)
+        with torch.inference_mode():
+            hidden = self.model.get_encoder()(**encoded).last_hidden_state
+            start = self.model.config.decoder_start_token_id
+            lang_ids = torch.tensor([self.tokenizer.get_lang_id(tgt) for tgt in target_langs])
+            decoder_input_ids = torch.stack((torch.full((count,), start), lang_ids), dim=1)
+            generated_tokens = self.model.generate(
+                encoder_outputs=BaseModelOutput(last_hidden_state=hidden.repeat(count, 1, 1)),
+                attention_mask=encoded["attention_mask"].repeat(count, 1),
+                decoder_input_ids=decoder_input_ids.repeat_interleave(len(texts), dim=0),
+            )
+        decoded = self.tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)
+        return {tgt: decoded[i * len(texts):(i + 1) * len(texts)] for i, tgt in enumerate(target_langs)}
+
+
+class CTranslate2M2M100Backend(TranslationBackend):
+    """CTranslate2로 변환한 M2M100 - CPU에서 PyTorch eager보다 훨씬 빠른 경로
+
+    변환: ct2-transformers-converter --model facebook/m2m100_418M --output_dir <CT2_MODEL_DIR>
+    (pip install ctranslate2)
+    """
+    name = "ctranslate2"
+
+    def __init__(self, model_dir=CT2_MODEL_DIR, model_name=TRANSLATION_MODEL_NAME,
+                 compute_type=CT2_COMPUTE_TYPE, beam_size=CT2_BEAM_SIZE, weights=None):
+        self.model_dir = model_dir
+        self.model_name = model_name
+        self.compute_type = weights or compute_type  # "ctranslate2:int8"처럼 지정하면 compute_type으로 사용
+        self.beam_size = beam_size
+        self.tokenizer = None
+        self.translator = None
+        self._tokenizer_lock = Lock()
+
+    def load(self, report):
+        report(5, "ctranslate2 불러오는 중...")
+        import ctranslate2
+        from transformers import M2M100Tokenizer
+        if not os.path.isdir(self.model_dir):
+            raise FileNotFoundError(f"CTranslate2 모델 폴더가 없습니다: {self.model_dir}")
+        report(30, "토크나이저 로드 중...")
+        self.tokenizer = M2M100Tokenizer.from_pretrained(self.model_name)
+        report(50, f"CTranslate2 번역 모델 로드 중 ({self.compute_type})...")
+        self.translator = ctranslate2.Translator(self.model_dir, device="cpu", compute_type=self.compute_type,
+                                                 intra_threads=max(1, os.cpu_count() or 1))
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        with self._tokenizer_lock:
+            self.tokenizer.src_lang = source_lang
+            sources = [self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(text)) for text in texts]
+        target_prefix = [[self.tokenizer.get_lang_token(target_lang)]] * len(texts)
+        results = self.translator.translate_batch(sources, target_prefix=target_prefix, beam_size=self.beam_size)
+        outputs = []
+        for result in results:
+            tokens = result.hypotheses[0][1:]  # 맨 앞의 대상 언어 토큰 제외
+            outputs.append(self.tokenizer.decode(self.tokenizer.convert_tokens_to_ids(tokens), skip_special_tokens=True))
+        return outputs
+
+    def translate_multi(self, texts, source_lang, target_langs):
+        """CTranslate2는 인코더 출력을 넘길 수 없으므로 (원문 × 대상) 행을 한 번의 배치 호출로 번역합니다"""
+        target_langs = list(target_langs)
+        with self._tokenizer_lock:
+            self.tokenizer.src_lang = source_lang
+            sources = [self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(text)) for text in texts]
+        target_prefix = [[self.tokenizer.get_lang_token(tgt)] for tgt in target_langs for _ in texts]
+        results = self.translator.translate_batch(sources * len(target_langs), target_prefix=target_prefix,
+                                                  beam_size=self.beam_size)
+        outputs = [self.tokenizer.decode(self.tokenizer.convert_tokens_to_ids(result.hypotheses[0][1:]),
+                                         skip_special_tokens=True) for result in results]
+        return {tgt: outputs[i * len(texts):(i + 1) * len(texts)] for i, tgt in enumerate(target_langs)}
+
+
+class IdentityBackend(TranslationBackend):
+    """모델 없이 원문에 대상 언어 표시만 붙이는 대역 - CI 벤치마크용"""
+    name = "identity"
+
+    def __init__(self, weights=None):
+        pass
+
+    def load(self, report):
+        report(50, "번역 대역(identity) 준비 중...")
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        return [f"[{target_lang}] {text}" for text in texts]
+
+
+TRANSLATION_BACKENDS = {
+    TorchM2M100Backend.name: TorchM2M100Backend,
+    CTranslate2M2M100Backend.name: CTranslate2M2M100Backend,
+    IdentityBackend.name: IdentityBackend,
+}
+
+
+def create_translation_backend(name=None):
+    """백엔드 이름으로 인스턴스를 만듭니다 - "torch:int8"처럼 가중치 형식을 붙일 수 있습니다"""
+    name = name or TRANSLATION_BACKEND
+    name, _, weights = name.partition(":")
+    if name not in TRANSLATION_BACKENDS:
+        raise ValueError(f"알 수 없는 번역 백엔드: {name} (사용 가능: {', '.join(TRANSLATION_BACKENDS)})")
+    if weights:
+        return TRANSLATION_BACKENDS[name](weights=weights)
+    return TRANSLATION_BACKENDS[name]()
+
+
+class TranslationModelLoader:
+    """설정된 번역 백엔드를 백그라운드 스레드에서 로드합니다
+
+    사용자가 장치를 고르는 동안 무거운 import와 모델 로드를 진행하고,
+    progress/status로 진행 상황을 알려줍니다. get()은 로드가 끝날 때까지 기다립니다.
+    """
+    def __init__(self, backend_name=None):
+        self.backend_name = backend_name
+        self.backend = None
+        self.progress = 0
+        self.status = "번역 모델 대기 중"
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.warmup_error = None
+        self._ready = Event()
+        self._thread = None
+        self._lock = Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._load, name="model-loader", daemon=True)
+                self._thread.start()
+        return self
+
+    def _set(self, progress, status):
+        self.progress = progress
+        self.status = status
+        log.info(f"📦 [{progress:3d}%] {status}")
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            backend = create_translation_backend(self.backend_name)
+            backend.load(self._set)
+            self.load_seconds = time.perf_counter() - started
+            if WARMUP_ENABLED:
+                self._warmup(backend)
+            self.backend = backend
+            if self.warmup_error is not None:
+                self._set(100, f"번역 모델 로드 완료, 워밍업 실패 - 첫 자막이 느릴 수 있습니다 ({backend.name})")
+            else:
+                self._set(100, f"번역 모델 준비 완료 - {backend.name} ({time.perf_counter() - started:.1f}초)")
+        except Exception as e:
+            self.error = e
+            self.status = f"번역 모델 로드 실패: {e}"
+            log.error(f"❌ {self.status}")
+        finally:
+            self._ready.set()
+
+    def _warmup(self, backend):
+        """실패해도 로드는 성공으로 두고 warmup_error에 남깁니다 - 첫 자막이 느려질 뿐"""
+        pairs = warmup_language_pairs()
+        names = ", ".join(f"{src}→{'/'.join(tgts)}" for src, tgts in pairs)
+        self._set(90, f"번역 모델 워밍업 중 ({names})...")
+        started = time.perf_counter()
+        try:
+            backend.warmup(pairs)
+        except Exception as e:
+            self.warmup_error = e
+            log.warning(f"⚠️ 번역 모델 워밍업 실패: {e}")
+            return
+        self.warmup_seconds = time.perf_counter() - started
+        metrics.gauge("warmup_seconds", "워밍업에 걸린 시간", stage="translation").set(self.warmup_seconds)
+
+    @property
+    def ready(self):
+        return self._ready.is_set() and self.error is None
+
+    def get(self, timeout=None):
+        """로드된 TranslationBackend를 반환합니다 - 아직 로드 중이면 기다립니다"""
+        self.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("번역 모델 로드가 끝나지 않았습니다")
+        if self.error is not None:
+            raise RuntimeError(self.status)
+        return self.backend
+
+
+translation_model = TranslationModelLoader()
+translation_batcher = None
+translation_batcher_lock = Lock()
+subtitle_log = None  # 실행 중인 세션의 SubtitleLog
 
 def signal_handler(signum, frame):
     """시그널 핸들러 - 프로그램 종료 시 호출"""
-    print("\n🛑 프로그램 종료 신호를 받았습니다...")
+    log.info("🛑 프로그램 종료 신호를 받았습니다...")
     sys.exit(0)
 
 # 시그널 핸들러 등록
 signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
+def whisper_language_code(language):
+    """whisper가 보고한 언어("korean" 또는 "ko")를 언어 코드로 바꿉니다 - 모르는 언어면 None"""
+    if not language:
+        return None
+    language = language.strip().lower()
+    if language in WHISPER_LANGUAGE_CODES:
+        return WHISPER_LANGUAGE_CODES[language]
+    if language == "jw":
+        return "jv"  # whisper는 자바어를 jw로 씀
+    return language if language in WHISPER_LANGUAGE_CODES.values() else None
+
+def fixed_source_language():
+    """WHISPER_LANGUAGE로 원문 언어를 고정했으면 그 언어 코드, "auto"면 None"""
+    return whisper_language_code(WHISPER_LANGUAGE) if WHISPER_LANGUAGE != "auto" else None
+
+def target_language_for(src_lang):
+    """원문 언어에 대한 자막 언어 - TARGET_LANGUAGE가 없으면 영어, 원문이 영어면 한국어"""
+    if TARGET_LANGUAGE:
+        return TARGET_LANGUAGE
+    return "en" if src_lang != "en" else "ko"
+
+def target_languages_for(src_lang):
+    """원문 언어에 대한 자막 트랙 목록 - 첫 번째가 오버레이/단일 기록에 쓰는 주 트랙"""
+    if TARGET_LANGUAGES:
+        return list(TARGET_LANGUAGES)
+    return [target_language_for(src_lang)]
+
+def warmup_language_pairs():
+    """워밍업할 (원문 언어, M2M100 대상 언어 목록) - 실제 라우팅과 같은 대상을 고릅니다
+
+    WHISPER_LANGUAGE를 고정했으면 그 언어만, "auto"면 WARMUP_SOURCE_LANGUAGES를 원문으로 봅니다.
+    """
+    code = fixed_source_language()
+    pairs = []
+    for src in [code] if code else WARMUP_SOURCE_LANGUAGES:
+        targets = [tgt for tgt in target_languages_for(src) if tgt != src]
+        if targets:
+            pairs.append((src, targets))
+    return pairs
+
+def whisper_should_translate():
+    """디코딩 전에 whisper의 translate 작업(→영어)을 쓸지 결정합니다
+
+    대상이 영어(또는 자동: 원문이 영어가 아니면 영어)일 때만 켭니다.
+    원문 언어를 함께 받아야 하므로 언어를 보고하는 상주 엔진에서만 사용합니다.
+    여러 트랙을 만들 때는 나머지 트랙에 원문이 필요하므로 끕니다.
+    """
+    if not WHISPER_TRANSLATE_ROUTING or WHISPER_ENGINE != "server":
+        return False
+    if TARGET_LANGUAGES and len(TARGET_LANGUAGES) > 1:
+        return False
+    return (TARGET_LANGUAGES[0] if TARGET_LANGUAGES else TARGET_LANGUAGE) in (None, "en")
+
+def route_transcription(segment, result, translated):
+    """whisper 결과로 원문/대상 언어를 정하고 M2M100이 더 필요한지 반환합니다
+
+    translated=True로 디코딩했고 원문이 영어가 아니면 whisper 출력이 이미 영어 자막이므로
+    M2M100을 건너뜁니다. 원문과 대상 언어가 같아도 건너뜁니다.
+    whisper가 표에 없는 언어를 보고하면 원문 언어를 모르는 것으로 보고(영어로 가정하지 않음)
+    잘못된 언어로 번역하는 대신 인식 결과를 그대로 씁니다. 언어를 보고하지 않으면
+    (언어를 고정한 whisper-cli) 설정한 WHISPER_LANGUAGE를, 그것도 "auto"면 문자 기반 추정을 씁니다.
+    """
+    reported = result.get("language")
+    if reported:
+        segment.src_lang = whisper_language_code(reported)
+    else:
+        segment.src_lang = fixed_source_language() or detect_language(segment.text)
+    segment.targets = target_languages_for(segment.src_lang)
+    segment.tgt_lang = segment.targets[0]
+    if translated and segment.src_lang != "en" and segment.targets == ["en"]:
+        segment.set_translation("en", segment.text)
+        segment.route = "whisper"
+        return False
+    if segment.src_lang is None:
+        log.warning(f"⚠️ whisper가 알 수 없는 언어를 보고했습니다 ({reported}) - 번역하지 않고 그대로 표시합니다")
+        for tgt in segment.targets:
+            segment.set_translation(tgt, segment.text)
+        segment.route = "untranslated"
+        return False
+    # 원문 언어와 같은 트랙은 그대로 통과시키고 나머지만 M2M100으로 보냄
+    for tgt in segment.targets:
+        if tgt == segment.src_lang:
+            segment.set_translation(tgt, segment.text)
+    if len(segment.translations) == len(segment.targets):
+        segment.route = "passthrough"
+        return False
+    segment.route = "m2m100"
+    return True
+
 def detect_language(text):
     if any("\uac00" <= c <= "\ud7a3" for c in text): return "ko"
     elif any("a" <= c.lower() <= "z" for c in text): return "en"
     elif any("\u3040" <= c <= "\u309f" for c in text): return "ja"
     else: return "en"
 
+def normalize_text(text):
+    """캐시 키용 정규화 - 유니코드 NFKC와 공백 정리"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class TranslationCache:
+    """(정규화된 문장, 원문 언어, 대상 언어)를 키로 하는 TTL 있는 LRU 번역 캐시
+
+    방송 콘텐츠는 인사말·징글·whisper의 무음 환각 문장이 반복되므로
+    같은 문장은 모델을 다시 돌리지 않고 바로 돌려줍니다.
+    path를 주면 JSON 파일로 저장했다가 다음 실행 때 다시 읽습니다.
+    """
+    def __init__(self, maxsize=TRANSLATION_CACHE_SIZE, ttl=TRANSLATION_CACHE_TTL, path=TRANSLATION_CACHE_FILE):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # key -> (번역, 저장 시각)
+        self._lock = Lock()
+        self._dirty = False
+        self._hit_counter = metrics.counter("translation_cache_hits_total", "번역 캐시 적중 수")
+        self._miss_counter = metrics.counter("translation_cache_misses_total", "번역 캐시 실패 수")
+        metrics.gauge("translation_cache_hit_ratio", "번역 캐시 적중률", fn=lambda: self.stats()["hit_rate"])
+        metrics.gauge("translation_cache_entries", "번역 캐시 항목 수", fn=lambda: len(self._items))
+        if path:
+            self.load()
+
+    def get(self, text, source_lang, target_lang):
+        key = (normalize_text(text), source_lang, target_lang)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and (not self.ttl or time.time() - item[1] < self.ttl):
+                self._items.move_to_end(key)
+                self.hits += 1
+                self._hit_counter.inc()
+                return item[0]
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            self._miss_counter.inc()
+            return None
+
+    def put(self, text, source_lang, target_lang, translated):
+        key = (normalize_text(text), source_lang, target_lang)
+        with self._lock:
+            self._items[key] = (translated, time.time())
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+            self._dirty = True
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def load(self):
+        """디스크에 저장된 캐시를 읽습니다 (만료된 항목은 버림)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"⚠️ 번역 캐시를 읽지 못했습니다: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for text, src, tgt, translated, stamp in entries[-self.maxsize:]:
+                if not self.ttl or now - stamp < self.ttl:
+                    self._items[(text, src, tgt)] = (translated, stamp)
+        log.info(f"📦 번역 캐시 {len(self._items)}개 항목 로드")
+
+    def save(self):
+        """변경된 캐시를 임시 파일에 쓴 뒤 교체합니다"""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            entries = [[k[0], k[1], k[2], v[0], v[1]] for k, v in self._items.items()]
+            self._dirty = False
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning(f"⚠️ 번역 캐시를 저장하지 못했습니다: {e}")
+
+
+translation_cache = TranslationCache()
+
 def translate_text(text, source_lang, target_lang):
     if not text: return ""
-    tokenizer.src_lang = source_lang
-    encoded = tokenizer(text, return_tensors="pt")
-    generated_tokens = model.generate(**encoded, forced_bos_token_id=tokenizer.get_lang_id(target_lang))
-    return tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)[0]
+    cached = translation_cache.get(text, source_lang, target_lang)
+    if cached is not None:
+        return cached
+    return translate_and_cache(text, source_lang, target_lang)
+
+def translate_and_cache(text, source_lang, target_lang):
+    """캐시를 다시 보지 않고 (배칭을 켰으면 배처로) 번역해 캐시에 넣습니다 - 이미 캐시 미스를 센 호출자용"""
+    if TRANSLATION_BATCHING:
+        translated = get_translation_batcher().translate(text, source_lang, target_lang)
+    else:
+        translated = translate_text_uncached(text, source_lang, target_lang)
+    translation_cache.put(text, source_lang, target_lang, translated)
+    return translated
+
+def translate_text_multi(text, source_lang, target_langs):
+    """한 문장을 여러 대상 언어로 번역해 {대상 언어: 번역}을 반환합니다
+
+    캐시는 대상 언어마다 따로 보고, 캐시에 없는 대상들만 모아 인코더를 한 번 돌리는
+    translate_multi로 보냅니다.
+    """
+    if not text:
+        return {tgt: "" for tgt in target_langs}
+    results = {}
+    missing = []
+    for tgt in target_langs:
+        cached = translation_cache.get(text, source_lang, tgt)
+        if cached is None:
+            missing.append(tgt)
+        else:
+            results[tgt] = cached
+    if len(missing) == 1:
+        results[missing[0]] = translate_and_cache(text, source_lang, missing[0])
+    elif missing:
+        if TRANSLATION_BATCHING:
+            translated = get_translation_batcher().translate(text, source_lang, tuple(missing))
+        else:
+            translated = {tgt: outputs[0] for tgt, outputs in translate_batch_multi([text], source_lang, missing).items()}
+        for tgt in missing:
+            translation_cache.put(text, source_lang, tgt, translated[tgt])
+            results[tgt] = translated[tgt]
+    return {tgt: results[tgt] for tgt in target_langs}
+
+def translate_text_uncached(text, source_lang, target_lang):
+    if not text: return ""
+    return translate_batch([text], source_lang, target_lang)[0]
+
+def translate_batch(texts, source_lang, target_lang):
+    """같은 언어 쌍의 문장들을 설정된 백엔드로 한 번에 번역합니다"""
+    return translation_model.get().translate_batch(texts, source_lang, target_lang)
+
+def translate_batch_multi(texts, source_lang, target_langs):
+    """같은 원문 문장들을 여러 대상 언어로 한 번에 번역해 {대상 언어: 번역 리스트}를 반환합니다"""
+    return translation_model.get().translate_multi(texts, source_lang, target_langs)
+
+
+PARITY_SENTENCES = [
+    ("ko", "en", "안녕하세요, 오늘 방송에 오신 것을 환영합니다."),
+    ("ko", "en", "잠시 후 다음 순서가 이어지겠습니다."),
+    ("ko", "en", "이 제품은 다음 달부터 전국 매장에서 판매됩니다."),
+    ("en", "ko", "Thank you all for joining us today."),
+    ("en", "ko", "The meeting will resume after a short break."),
+    ("en", "ko", "Please make sure your microphone is muted."),
+    ("ja", "en", "本日はご来場いただきありがとうございます。"),
+    ("ja", "en", "次の発表者をご紹介します。"),
+]
+
+
+def compare_translation_backends(names=("torch", "ctranslate2"), sentences=PARITY_SENTENCES, repeats=3):
+    """같은 문장으로 백엔드들의 번역 일치도와 처리량을 비교해 결과 딕셔너리를 반환합니다
+
+    첫 번째 백엔드를 기준으로 완전 일치 비율과 문자 단위 유사도(difflib)를 구하고,
+    각 백엔드의 문장/초 처리량을 repeats번 반복 측정합니다.
+    """
+    import difflib
+    outputs = {}
+    report = {"sentences": len(sentences), "backends": {}}
+    for name in names:
+        backend = create_translation_backend(name)
+        started = time.perf_counter()
+        backend.load(lambda progress, status: None)
+        load_seconds = time.perf_counter() - started
+        backend.translate_batch([sentences[0][2]], sentences[0][0], sentences[0][1])  # 첫 호출 지연 제외
+        started = time.perf_counter()
+        for _ in range(repeats):
+            results = [backend.translate_batch([text], src, tgt)[0] for src, tgt, text in sentences]
+        elapsed = time.perf_counter() - started
+        outputs[name] = results
+        report["backends"][name] = {
+            "load_seconds": round(load_seconds, 3),
+            "sentences_per_second": round(len(sentences) * repeats / elapsed, 3),
+            "outputs": results,
+        }
+    reference = outputs[names[0]]
+    for name in names[1:]:
+        candidate = outputs[name]
+        exact = sum(a.strip() == b.strip() for a, b in zip(reference, candidate))
+        similarity = sum(difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(reference, candidate))
+        report["backends"][name]["parity"] = {
+            "reference": names[0],
+            "exact_match": round(exact / len(reference), 3),
+            "char_similarity": round(similarity / len(reference), 3),
+        }
+    return report
+
+
+class BatchingTranslator:
+    """번역 요청을 최대 max_wait_ms 또는 max_items개까지 모아서 한꺼번에 번역합니다
+
+    모은 요청은 (원문 언어, 대상 언어)별로 묶어 묶음마다 generate를 한 번만 호출하고,
+    결과는 각 요청의 Future로 돌려줍니다. 같은 묶음 안의 중복 문장은 한 번만 번역합니다.
+    대상 언어가 튜플이면 translate_multi로 번역하고 {대상 언어: 번역}을 돌려줍니다.
+    """
+    def __init__(self, max_items=TRANSLATION_BATCH_MAX_ITEMS, max_wait_ms=TRANSLATION_BATCH_MAX_WAIT_MS):
+        self.max_items = max_items
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.items = 0
+        self._pending = deque()
+        self._cond = Condition()
+        self._running = True
+        self._thread = Thread(target=self._loop, name="translate-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text, source_lang, target_lang):
+        future = Future()
+        with self._cond:
+            if not self._running:
+                future.set_exception(RuntimeError("번역 배처가 종료되었습니다"))
+                return future
+            self._pending.append((text, source_lang, target_lang, future))
+            self._cond.notify()
+        return future
+
+    def translate(self, text, source_lang, target_lang, timeout=60):
+        return self.submit(text, source_lang, target_lang).result(timeout)
+
+    def _collect(self):
+        """첫 요청이 들어온 시점부터 배치 창이 닫힐 때까지 요청을 모읍니다"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or not self._running)
+            if not self._pending:
+                return []
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_items and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = []
+            while self._pending and len(batch) < self.max_items:
+                batch.append(self._pending.popleft())
+            return batch
+
+    def _loop(self):
+        while self._running or self._pending:
+            batch = self._collect()
+            if not batch:
+                continue
+            groups = {}
+            for text, src, tgt, future in batch:
+                groups.setdefault((src, tgt), []).append((text, future))
+            for (src, tgt), requests in groups.items():
+                texts = list(dict.fromkeys(text for text, _ in requests))
+                try:
+                    if isinstance(tgt, tuple):
+                        outputs = translate_batch_multi(texts, src, tgt)
+                        results = {text: {lang: outputs[lang][i] for lang in tgt} for i, text in enumerate(texts)}
+                    else:
+                        results = dict(zip(texts, translate_batch(texts, src, tgt)))
+                except Exception as e:
+                    for _, future in requests:
+                        future.set_exception(e)
+                    continue
+                self.batches += 1
+                self.items += len(requests)
+                metrics.histogram("translation_batch_size", "generate 한 번에 묶인 요청 수",
+                                  buckets=(1, 2, 4, 8, 16, 32)).observe(len(requests))
+                for text, future in requests:
+                    future.set_result(results[text])
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+
+
+def get_translation_batcher():
+    global translation_batcher
+    with translation_batcher_lock:
+        if translation_batcher is None:
+            translation_batcher = BatchingTranslator()
+        return translation_batcher
+
+# ========== 오디오 장치 레지스트리 ==========
+# 입력 채널이 없어도 목록에 보여줄 장치 (루프백/캡처 가능성이 있는 출력 장치)
+DEVICE_NAME_KEYWORDS = re.compile(r"stereo mix|what u hear|loopback|headphones|speakers|capture|webcam|"
+                                  r"camera|video|hdmi|displayport|usb", re.IGNORECASE)
+VIDEO_CAPTURE_KEYWORDS = re.compile(r"capture|webcam|camera|video|hdmi|displayport", re.IGNORECASE)
+STEREO_MIX_KEYWORDS = re.compile(r"stereo mix|what u hear|loopback", re.IGNORECASE)
+
+# Pa_Initialize/Pa_Terminate는 스레드 안전하지 않으므로 장치 폴링, 새로고침 버튼, 캡처 재연결이
+# 동시에 PyAudio를 만들거나 정리하지 않도록 모든 생성/정리를 이 락으로 직렬화합니다
+portaudio_lock = Lock()
+
+
+def open_portaudio():
+    """portaudio_lock 아래에서 PyAudio 인스턴스를 만듭니다"""
+    import pyaudio
+    with portaudio_lock:
+        return pyaudio.PyAudio()
+
+
+def close_portaudio(pa):
+    """portaudio_lock 아래에서 PyAudio 인스턴스를 정리합니다"""
+    with portaudio_lock:
+        pa.terminate()
+
+
+class DeviceRegistry:
+    """PortAudio 장치를 한 번 열거해 안정적인 ID로 캐시합니다
+
+    PortAudio 인덱스는 장치를 꽂거나 뺄 때마다 바뀌므로 "호스트 API:이름:입력/출력 채널"
+    (같은 이름이 여럿이면 순번을 덧붙임)을 ID로 씁니다. refresh()는 목록을 다시 읽어
+    인덱스만 갱신하고, 장치 정보는 새로 나타난 장치에만 만듭니다.
+
+    PortAudio는 초기화된 동안 장치 목록을 갱신하지 않으므로 캡처 스트림이 열려 있을 때의
+    refresh는 바뀐 장치를 보지 못할 수 있습니다. 캡처 중 장치 분리는 AudioCaptureEngine의
+    감시 스레드가 스트림을 닫은 뒤 refresh해서 처리합니다.
+
+    refresh는 매번 PortAudio를 초기화하며 모든 호스트 API를 훑으므로(Windows에서 수백 ms)
+    Tk 스레드에서 부르지 않습니다 - 첫 열거도 폴링 스레드가 하고 창은 version이 바뀌면 다시 그립니다.
+    """
+    def __init__(self):
+        self.version = 0  # 목록이 바뀔 때마다 증가
+        self._devices = OrderedDict()  # id -> 장치 정보
+        self._lock = Lock()
+        self._refresh_lock = Lock()  # 폴링/새로고침/재연결이 동시에 열거하지 않도록
+        self._poll_thread = None
+        self._polling = Event()
+
+    def refresh(self):
+        """장치 목록을 다시 읽고 (추가된 ID, 제거된 ID)를 반환합니다"""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self):
+        p = open_portaudio()
+        try:
+            default_input = self._default_input_index(p)
+            found = OrderedDict()
+            seen = {}
+            log.debug("=== 전체 오디오 장치 목록 ===")
+            for i in range(p.get_device_count()):
+                info = p.get_device_info_by_index(i)
+                name = info['name']
+                log.debug(f"장치 {i}: {name} (입력: {info['maxInputChannels']}, 출력: {info['maxOutputChannels']})")
+                if info['maxInputChannels'] <= 0 and not DEVICE_NAME_KEYWORDS.search(name):
+                    continue
+                host_api = p.get_host_api_info_by_index(info['hostApi'])['name']
+                key = f"{host_api}:{name}:{info['maxInputChannels']}/{info['maxOutputChannels']}"
+                seen[key] = seen.get(key, 0) + 1
+                device_id = key if seen[key] == 1 else f"{key}#{seen[key]}"
+                cached = self._devices.get(device_id)
+                device = dict(cached) if cached is not None else self._describe(i, info, host_api, device_id)
+                device['index'] = i
+                device['is_default'] = i == default_input
+                found[device_id] = device
+        finally:
+            close_portaudio(p)
+
+        with self._lock:
+            added = [device_id for device_id in found if device_id not in self._devices]
+            removed = [device_id for device_id in self._devices if device_id not in found]
+            moved = any(self._devices[d]['index'] != found[d]['index'] for d in found if d in self._devices)
+            self._devices = found
+            if added or removed or moved or self.version == 0:
+                self.version += 1
+        for device_id in added:
+            log.debug(f"🔌 장치 추가: {device_id}")
+        for device_id in removed:
+            log.info(f"🔌 장치 제거: {device_id}")
+        return added, removed
+
+    @staticmethod
+    def _default_input_index(p):
+        try:
+            return p.get_default_input_device_info()['index']
+        except (IOError, OSError):
+            return None
+
+    @staticmethod
+    def _describe(index, info, host_api, device_id):
+        """새 장치의 정보 - 캡처 형식은 스트림을 열 때 기본 샘플레이트부터 시도하므로 따로 조사하지 않음"""
+        name = info['name']
+        inputs = info['maxInputChannels']
+        outputs = info['maxOutputChannels']
+        return {
+            'id': device_id,
+            'index': index,
+            'name': name,
+            'host_api': host_api,
+            'input_channels': inputs,
+            'output_channels': outputs,
+            'sample_rate': int(info['defaultSampleRate']),
+            'is_input': inputs > 0,
+            'is_output': outputs > 0,
+            'is_stereo_mix': bool(STEREO_MIX_KEYWORDS.search(name)),
+            'is_video_capture': bool(VIDEO_CAPTURE_KEYWORDS.search(name)),
+            'loopback': outputs > 0 and inputs == 0 and SOUNDDEVICE_AVAILABLE and "wasapi" in host_api.lower(),
+        }
+
+    def devices(self):
+        """캐시된 장치 목록 - 아직 열거하지 않았으면 한 번 열거합니다"""
+        if self.version == 0:
+            self.refresh()
+        with self._lock:
+            return [dict(device) for device in self._devices.values()]
+
+    def get(self, device_id):
+        with self._lock:
+            device = self._devices.get(device_id)
+            return dict(device) if device is not None else None
+
+    def fallback(self, lost, exclude=()):
+        """사라진 장치 대신 쓸 장치 - 같은 이름 > 같은 종류 > 기본 입력 > 아무 입력 순
+
+        exclude의 장치(다른 소스가 이미 캡처 중인 장치)는 고르지 않습니다.
+        """
+        def rank(device):
+            return (
+                device['name'] == lost.get('name'),
+                device['is_stereo_mix'] == lost.get('is_stereo_mix') and device['loopback'] == lost.get('loopback'),
+                device['is_default'],
+                device['is_input'],
+            )
+        with self._lock:
+            candidates = [d for d in self._devices.values()
+                          if (d['is_input'] or d['loopback']) and d['id'] not in exclude]
+            if not candidates:
+                return None
+            return dict(max(candidates, key=rank))
+
+    def start_polling(self, interval=DEVICE_POLL_SECONDS):
+        """interval마다 백그라운드에서 refresh해 핫플러그를 감지합니다"""
+        if self._poll_thread is not None and self._poll_thread.is_alive():
+            return
+        self._polling.set()
+        self._poll_thread = Thread(target=self._poll_loop, args=(interval,), name="device-poll", daemon=True)
+        self._poll_thread.start()
+
+    def _poll_loop(self, interval):
+        delay = 0 if self.version == 0 else interval  # 아직 열거 전이면 바로 한 번 읽음
+        while self._polling.is_set():
+            time.sleep(delay)
+            delay = interval
+            if not self._polling.is_set():
+                break
+            try:
+                self.refresh()
+            except Exception as e:
+                log.warning(f"⚠️ 장치 목록 갱신 실패: {e}")
+
+    def stop_polling(self):
+        self._polling.clear()
+
+
+device_registry = DeviceRegistry()
+
 
 def get_audio_devices():
-    """사용 가능한 오디오 장치 목록을 가져옵니다"""
-    p = pyaudio.PyAudio()
-    devices = []
-    
-    print("=== 전체 오디오 장치 목록 ===")
-    for i in range(p.get_device_count()):
-        device_info = p.get_device_info_by_index(i)
-        print(f"장치 {i}: {device_info['name']} (입력: {device_info['maxInputChannels']}, 출력: {device_info['maxOutputChannels']})")
-        
-        # 입력 장치 또는 특별한 장치들 포함
-        if (device_info['maxInputChannels'] > 0 or 
-            'stereo mix' in device_info['name'].lower() or
-            'what u hear' in device_info['name'].lower() or
-            'loopback' in device_info['name'].lower() or
-            'headphones' in device_info['name'].lower() or
-            'speakers' in device_info['name'].lower() or
-            'capture' in device_info['name'].lower() or
-            'webcam' in device_info['name'].lower() or
-            'camera' in device_info['name'].lower() or
-            'video' in device_info['name'].lower() or
-            'hdmi' in device_info['name'].lower() or
-            'displayport' in device_info['name'].lower() or
-            'usb' in device_info['name'].lower()):
-            
-            devices.append({
-                'index': i,
-                'name': device_info['name'],
-                'input_channels': device_info['maxInputChannels'],
-                'output_channels': device_info['maxOutputChannels'],
-                'sample_rate': int(device_info['defaultSampleRate']),
-                'is_input': device_info['maxInputChannels'] > 0,
-                'is_output': device_info['maxOutputChannels'] > 0,
-                'is_video_capture': any(keyword in device_info['name'].lower() 
-                                      for keyword in ['capture', 'webcam', 'camera', 'video', 'hdmi', 'displayport'])
-            })
-    
-    p.terminate()
-    return devices
+    """사용 가능한 오디오 장치 목록을 가져옵니다 (레지스트리 캐시)"""
+    return device_registry.devices()
 
 class DeviceSelector:
     def __init__(self):
@@ -121,8 +1379,33 @@ class DeviceSelector:
         y = (self.root.winfo_screenheight() // 2) - (400 // 2)
         self.root.geometry(f"600x400+{x}+{y}")
         
+        self._device_version = device_registry.version
+        self._refresh_result = None  # 새로고침 버튼의 백그라운드 refresh 결과 (None이면 진행 중/없음)
+        self._refreshing = False
         self.setup_ui()
+        self.root.after(0, self.report_startup_time)
+        self.root.after(200, self.poll_model_status)
+        # 첫 열거는 폴링 스레드에서 - 창은 poll_devices가 목록을 채움
+        device_registry.start_polling()
+        self.root.after(100, self.poll_devices)
         
+    def report_startup_time(self):
+        """장치 선택 창이 뜬 시점까지의 콜드 스타트 시간을 기록합니다"""
+        elapsed = time.perf_counter() - PROCESS_START
+        if elapsed > COLD_START_TARGET_SECONDS:
+            log.warning(f"⚠️ 시작 시간 {elapsed:.2f}초 - 목표 {COLD_START_TARGET_SECONDS:.1f}초 초과")
+        else:
+            log.info(f"⏱️ 시작 시간 {elapsed:.2f}초 (목표 {COLD_START_TARGET_SECONDS:.1f}초)")
+
+    def poll_model_status(self):
+        """백그라운드 번역 모델 로드/워밍업 진행 상황을 표시합니다"""
+        if not self.root.winfo_exists():
+            return
+        ready, status = warmup_status()
+        self.model_status_label.config(text=status)
+        if not ready and translation_model.error is None:
+            self.root.after(200, self.poll_model_status)
+
     def setup_ui(self):
         # 제목
         title_label = tk.Label(self.root, text="🎵 오디오 캡처 장치 선택", 
@@ -133,7 +1416,8 @@ class DeviceSelector:
         desc_text = "시스템 오디오를 캡처할 장치를 선택하세요.\n" + \
                    "• 🎵 스테레오 믹스: 데스크탑 오디오 캡처 (권장)\n" + \
                    "• 🎤 마이크로폰: 음성 녹음\n" + \
-                   "• 📹 비디오 캡처: 웹캠, 캡처카드 등"
+                   "• 📹 비디오 캡처: 웹캠, 캡처카드 등\n" + \
+                   "• Ctrl/Shift+클릭으로 여러 장치를 함께 선택 (예: 마이크 + 시스템 오디오)"
         
         if SOUNDDEVICE_AVAILABLE:
             desc_text += "\n• 🔊 출력 장치: WASAPI Loopback으로 직접 캡처"
@@ -144,24 +1428,31 @@ class DeviceSelector:
                              font=("Arial", 10), justify="left")
         desc_label.pack(pady=10)
         
+        # 번역 모델 로드 상태
+        self.model_status_label = tk.Label(self.root, text=translation_model.status,
+                                           font=("Arial", 9), fg="#666")
+        self.model_status_label.pack()
+        
         # 장치 목록 프레임
         list_frame = tk.Frame(self.root)
         list_frame.pack(fill="both", expand=True, padx=20, pady=10)
         
         # 트리뷰 생성
-        columns = ("장치명", "입력", "출력", "샘플레이트")
-        self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=10)
+        columns = ("장치명", "API", "입력", "출력", "샘플레이트")
+        self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=10, selectmode="extended")
         
         # 컬럼 설정
         self.tree.heading("장치명", text="장치명")
+        self.tree.heading("API", text="API")
         self.tree.heading("입력", text="입력")
         self.tree.heading("출력", text="출력")
         self.tree.heading("샘플레이트", text="샘플레이트")
         
         self.tree.column("장치명", width=250)
-        self.tree.column("입력", width=80)
-        self.tree.column("출력", width=80)
-        self.tree.column("샘플레이트", width=100)
+        self.tree.column("API", width=90)
+        self.tree.column("입력", width=60)
+        self.tree.column("출력", width=60)
+        self.tree.column("샘플레이트", width=90)
         
         # 스크롤바
         scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
@@ -199,18 +1490,21 @@ class DeviceSelector:
         self.tree.bind("<Double-1>", lambda e: self.select_device())
         
     def load_devices(self):
-        """오디오 장치 목록을 로드합니다"""
+        """레지스트리에 캐시된 장치 목록을 표시합니다 (항목 iid = 장치 ID)"""
+        previous = self.tree.selection()
         # 기존 항목 삭제
         for item in self.tree.get_children():
             self.tree.delete(item)
         
+        if device_registry.version == 0:
+            # 폴링 스레드가 아직 첫 열거 중 - Tk 스레드에서 기다리지 않음
+            self.tree.insert("", "end", values=("🔍 오디오 장치 검색 중...", "", "", "", ""))
+            return
         devices = get_audio_devices()
         
         for device in devices:
             # 장치 타입에 따른 아이콘과 태그 설정
-            if ('stereo mix' in device['name'].lower() or 
-                'what u hear' in device['name'].lower() or
-                'loopback' in device['name'].lower()):
+            if device['is_stereo_mix']:
                 icon = "🎵"
                 tags = ('stereo_mix',)
                 name_display = f"{icon} {device['name']} (권장)"
@@ -231,13 +1525,18 @@ class DeviceSelector:
                 tags = ('input',)
                 name_display = f"{icon} {device['name']} (입력)"
             
-            self.tree.insert("", "end", values=(
+            self.tree.insert("", "end", iid=device['id'], values=(
                 name_display,
+                device['host_api'],
                 device['input_channels'],
                 device['output_channels'],
                 device['sample_rate']
             ), tags=tags)
         
+        # 새로고침 전에 고른 장치가 아직 있으면 그대로 유지
+        if previous and self.tree.exists(previous[0]):
+            self.tree.selection_set(previous[0])
+            return
         # 스테레오 믹스 장치가 있으면 첫 번째로 선택
         for item in self.tree.get_children():
             if 'stereo_mix' in self.tree.item(item, "tags"):
@@ -248,70 +1547,109 @@ class DeviceSelector:
             if self.tree.get_children():
                 self.tree.selection_set(self.tree.get_children()[0])
     
+    def poll_devices(self):
+        """백그라운드 폴링으로 장치 목록이 바뀌었으면 다시 그립니다 (핫플러그)"""
+        if not self.root.winfo_exists():
+            return
+        if device_registry.version != self._device_version:
+            self._device_version = device_registry.version
+            self.load_devices()
+        result, self._refresh_result = self._refresh_result, None
+        if result is not None:
+            self._refreshing = False
+            if isinstance(result, Exception):
+                messagebox.showerror("새로고침", f"오디오 장치 목록을 읽을 수 없습니다: {result}")
+            else:
+                messagebox.showinfo("새로고침", "오디오 장치 목록을 새로고침했습니다.")
+        self.root.after(100 if self._refreshing or device_registry.version == 0 else 500, self.poll_devices)
+    
     def refresh_devices(self):
-        """장치 목록을 새로고침합니다"""
-        self.load_devices()
-        messagebox.showinfo("새로고침", "오디오 장치 목록을 새로고침했습니다.")
+        """장치 목록을 백그라운드에서 새로고침합니다 - 결과는 poll_devices가 표시"""
+        if self._refreshing:
+            return
+        self._refreshing = True
+        Thread(target=self._refresh_in_background, name="device-refresh", daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            device_registry.refresh()
+            self._refresh_result = True
+        except Exception as e:
+            self._refresh_result = e
     
     def select_device(self):
         """선택된 장치를 확인합니다"""
+        if device_registry.version == 0:
+            messagebox.showinfo("알림", "오디오 장치를 검색하는 중입니다. 잠시 후 다시 선택해주세요.")
+            return
         selection = self.tree.selection()
         if not selection:
             messagebox.showwarning("경고", "장치를 선택해주세요.")
             return
         
-        item = selection[0]
-        device_name = self.tree.item(item, "values")[0]
+        devices = [device_registry.get(item) for item in selection]
+        if any(device is None for device in devices):
+            messagebox.showwarning("경고", "선택한 장치가 분리되었습니다. 다른 장치를 선택해주세요.")
+            self.load_devices()
+            return
         
-        # 장치 인덱스 찾기
-        devices = get_audio_devices()
-        for device in devices:
-            if device['name'] in device_name:
-                self.selected_device = device
-                break
+        if len(devices) > 1:
+            # 여러 장치 (예: 마이크 + 시스템 루프백) - 모델은 한 번만 로드하고 함께 씀
+            names = "\n".join(f"• {device['name']}" for device in devices)
+            if messagebox.askyesno("확인", f"다음 장치를 함께 캡처합니다:\n{names}\n\n"
+                                         f"자막 앞에 장치 이름이 표시됩니다. 계속하시겠습니까?"):
+                self.confirm_devices(devices)
+            return
         
-        if self.selected_device:
-            # 장치 타입에 따른 메시지
-            device_type = ""
-            if self.selected_device['output_channels'] > 0 and self.selected_device['input_channels'] == 0:
-                if SOUNDDEVICE_AVAILABLE:
-                    device_type = "출력 장치 (WASAPI Loopback 사용)"
-                else:
-                    device_type = "출력 장치 (sounddevice 설치 필요)"
-            elif self.selected_device['input_channels'] > 0 and self.selected_device['output_channels'] == 0:
-                if self.selected_device['is_video_capture']:
-                    device_type = "비디오 캡처 장치"
-                else:
-                    device_type = "입력 장치"
-            elif self.selected_device['input_channels'] > 0 and self.selected_device['output_channels'] > 0:
-                if self.selected_device['is_video_capture']:
-                    device_type = "비디오 캡처 장치 (입출력)"
-                else:
-                    device_type = "입출력 장치"
+        self.selected_device = devices[0]
+        
+        # 장치 타입에 따른 메시지
+        device_type = ""
+        if self.selected_device['output_channels'] > 0 and self.selected_device['input_channels'] == 0:
+            if SOUNDDEVICE_AVAILABLE:
+                device_type = "출력 장치 (WASAPI Loopback 사용)"
             else:
-                device_type = "알 수 없는 장치"
-            
-            # 출력 장치이고 sounddevice가 없는 경우 경고
-            warning_msg = ""
-            if (self.selected_device['output_channels'] > 0 and 
-                self.selected_device['input_channels'] == 0 and 
-                not SOUNDDEVICE_AVAILABLE):
-                warning_msg = "\n\n⚠️ 출력 장치 캡처를 위해서는 sounddevice 설치가 필요합니다.\npip install sounddevice"
-            
-            result = messagebox.askyesno("확인", 
-                f"선택된 장치: {self.selected_device['name']}\n"
-                f"장치 타입: {device_type}\n"
-                f"입력 채널: {self.selected_device['input_channels']}\n"
-                f"출력 채널: {self.selected_device['output_channels']}\n\n"
-                f"이 장치로 오디오를 캡처하시겠습니까?{warning_msg}")
-            
-            if result:
-                global selected_device_index, selected_device_info
-                selected_device_index = self.selected_device['index']
-                selected_device_info = self.selected_device
-                self.root.destroy()
+                device_type = "출력 장치 (sounddevice 설치 필요)"
+        elif self.selected_device['input_channels'] > 0 and self.selected_device['output_channels'] == 0:
+            if self.selected_device['is_video_capture']:
+                device_type = "비디오 캡처 장치"
+            else:
+                device_type = "입력 장치"
+        elif self.selected_device['input_channels'] > 0 and self.selected_device['output_channels'] > 0:
+            if self.selected_device['is_video_capture']:
+                device_type = "비디오 캡처 장치 (입출력)"
+            else:
+                device_type = "입출력 장치"
         else:
-            messagebox.showerror("오류", "장치 정보를 가져올 수 없습니다.")
+            device_type = "알 수 없는 장치"
+        
+        # 출력 장치이고 sounddevice가 없는 경우 경고
+        warning_msg = ""
+        if (self.selected_device['output_channels'] > 0 and 
+            self.selected_device['input_channels'] == 0 and 
+            not SOUNDDEVICE_AVAILABLE):
+            warning_msg = "\n\n⚠️ 출력 장치 캡처를 위해서는 sounddevice 설치가 필요합니다.\npip install sounddevice"
+        
+        result = messagebox.askyesno("확인", 
+            f"선택된 장치: {self.selected_device['name']}\n"
+            f"호스트 API: {self.selected_device['host_api']}\n"
+            f"장치 타입: {device_type}\n"
+            f"입력 채널: {self.selected_device['input_channels']}\n"
+            f"출력 채널: {self.selected_device['output_channels']}\n\n"
+            f"이 장치로 오디오를 캡처하시겠습니까?{warning_msg}")
+        
+        if result:
+            self.confirm_devices([self.selected_device])
+    
+    def confirm_devices(self, devices):
+        """선택을 확정하고 창을 닫습니다 - 첫 번째 장치가 기본 장치"""
+        global selected_device_index, selected_device_info, selected_device_id, selected_devices
+        self.selected_device = devices[0]
+        selected_devices = list(devices)
+        selected_device_index = self.selected_device['index']
+        selected_device_info = self.selected_device
+        selected_device_id = self.selected_device['id']
+        self.root.destroy()
     
     def cancel(self):
         """취소하고 프로그램을 종료합니다"""
@@ -320,257 +1658,3151 @@ class DeviceSelector:
     
     def run(self):
         """장치 선택 창을 실행합니다"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            device_registry.stop_polling()
         return self.selected_device
 
-def capture_audio_with_selected_device(filename="system_audio.wav", duration=RECORD_SECONDS):
-    """선택된 장치로 오디오를 캡처합니다"""
-    global selected_device_index, selected_device_info
-    
-    if selected_device_index is None:
-        print("❌ 오디오 장치가 선택되지 않았습니다.")
-        return None
-    
-    print(f"🎵 선택된 장치로 오디오 캡처 중... (장치 인덱스: {selected_device_index})")
-    print(f"📁 저장할 파일: {filename}")
-    print(f"⏱️ 녹음 시간: {duration}초")
-    
-    # 장치 정보 확인
-    if selected_device_info:
-        print(f"장치 정보: {selected_device_info['name']}")
-        print(f"입력 채널: {selected_device_info['input_channels']}, 출력 채널: {selected_device_info['output_channels']}")
-        
-        # 출력 장치인 경우 WASAPI Loopback 사용
-        if selected_device_info['output_channels'] > 0 and selected_device_info['input_channels'] == 0:
-            print("🔄 출력 장치 감지 - WASAPI Loopback 사용")
-            result = capture_output_device_audio(filename, duration)
-        else:
-            print("🔄 입력 장치 감지 - 일반 캡처 사용")
-            result = capture_input_device_audio(filename, duration)
-    else:
-        print("🔄 장치 정보 없음 - 일반 캡처 사용")
-        result = capture_input_device_audio(filename, duration)
-    
-    # 파일 생성 확인
-    if result and os.path.exists(filename):
-        file_size = os.path.getsize(filename)
-        print(f"✅ 오디오 파일 생성 완료: {filename} ({file_size} bytes)")
-        return filename
-    else:
-        print(f"❌ 오디오 파일 생성 실패: {filename}")
-        if os.path.exists(filename):
-            print(f"⚠️ 파일은 존재하지만 크기가 0일 수 있습니다: {os.path.getsize(filename)} bytes")
-        return None
+# ========== 연속 캡처 엔진 ==========
+class AudioRingBuffer:
+    """세션 전체에서 재사용하는 미리 할당된 float32 모노 링 버퍼
 
-def capture_output_device_audio(filename="system_audio.wav", duration=RECORD_SECONDS):
-    """출력 장치에서 WASAPI Loopback으로 오디오를 캡처합니다"""
-    global selected_device_index
-    
-    if not SOUNDDEVICE_AVAILABLE:
-        print("❌ sounddevice 라이브러리가 없어서 출력 장치 캡처를 할 수 없습니다.")
-        print("💡 pip install sounddevice로 설치해주세요.")
-        return None
-    
-    print("🔊 WASAPI Loopback으로 출력 장치 캡처 중...")
-    print(f"📁 저장할 파일: {filename}")
-    print(f"⏱️ 녹음 시간: {duration}초")
-    
-    try:
-        print("🔧 sounddevice 스트림 생성 중...")
-        # sounddevice를 사용하여 출력 장치에서 오디오 캡처
-        # WASAPI Loopback 모드로 출력 장치의 오디오를 캡처
-        audio_data = sd.rec(
-            int(duration * RATE),
-            samplerate=RATE,
-            channels=CHANNELS,
-            dtype='float32',
-            device=selected_device_index,  # 선택된 출력 장치
-            latency='low'
-        )
-        
-        print("🎙️ 오디오 데이터 수집 중...")
-        # 녹음 완료까지 대기
-        sd.wait()
-        
-        print(f"📦 수집된 오디오 데이터 크기: {audio_data.shape}")
-        
-        if audio_data.size == 0:
-            print("❌ 수집된 오디오 데이터가 없습니다.")
-            return None
-        
-        print("💾 WAV 파일로 저장 중...")
-        # 오디오 데이터를 WAV 파일로 저장
-        sf.write(filename, audio_data, RATE)
-        
-        print("✅ 출력 장치 오디오 캡처 완료")
-        return filename
-        
-    except Exception as e:
-        print(f"❌ 출력 장치 오디오 캡처 실패: {e}")
-        import traceback
-        traceback.print_exc()
-        print("🔄 일반 입력 장치로 대체 시도...")
-        return capture_input_device_audio(filename, duration)
-
-def capture_input_device_audio(filename="system_audio.wav", duration=RECORD_SECONDS):
-    """일반 입력 장치로 오디오를 캡처합니다"""
-    global selected_device_index
-    
-    print("🎤 일반 입력 장치로 오디오 캡처 중...")
+    위치(position)는 지금까지 기록된 전체 샘플 수 기준의 절대값이므로
+    하위 단계는 (시작 위치, 길이)만으로 원하는 구간을 읽을 수 있습니다.
+    """
+    def __init__(self, capacity, dtype=np.float32):
+        self.capacity = int(capacity)
+        self.buffer = np.empty(self.capacity, dtype=dtype)
+        self.buffer.fill(0)  # 페이지를 지금 확보해 캡처 콜백에서 첫 쓰기 때 페이지 폴트가 나지 않게 함
+        self.write_pos = 0  # 지금까지 기록된 전체 샘플 수 (단조 증가)
+        self.overruns = 0   # 읽기 전에 덮어써져 버려진 구간 수
+        self._cond = Condition()
+
+    def write(self, samples):
+        """캡처 콜백에서 호출 - 새 샘플을 버퍼 끝에 기록합니다"""
+        n = len(samples)
+        if n == 0:
+            return
+        skipped = 0
+        if n > self.capacity:
+            skipped = n - self.capacity
+            samples = samples[skipped:]
+            n = self.capacity
+        start = (self.write_pos + skipped) % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        if first < n:
+            self.buffer[:n - first] = samples[first:]
+        with self._cond:
+            self.write_pos += skipped + n
+            self._cond.notify_all()
+
+    def _overrun(self):
+        self.overruns += 1
+        metrics.counter("capture_ring_overruns_total", "읽기 전에 덮어써져 버려진 링 버퍼 구간 수").inc()
+
+    def oldest_pos(self):
+        """아직 덮어써지지 않은 가장 오래된 위치"""
+        return max(0, self.write_pos - self.capacity)
+
+    def wait_for(self, position, timeout=None):
+        """write_pos가 position 이상이 될 때까지 기다립니다"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.write_pos >= position, timeout)
+
+    def close(self):
+        pass
+
+    def read(self, start, length):
+        """[start, start+length) 구간을 복사해서 (실제 시작 위치, 샘플) 로 반환합니다
+
+        이미 덮어써진 앞부분은 잘라내고, 아직 기록되지 않은 뒷부분은 제외합니다.
+        """
+        end = min(start + length, self.write_pos)
+        oldest = self.oldest_pos()
+        if start < oldest:
+            self._overrun()
+            start = oldest
+        if end <= start:
+            return start, np.zeros(0, dtype=self.buffer.dtype)
+        i = start % self.capacity
+        n = end - start
+        first = min(n, self.capacity - i)
+        out = np.empty(n, dtype=self.buffer.dtype)
+        out[:first] = self.buffer[i:i + first]
+        if first < n:
+            out[first:] = self.buffer[:n - first]
+        # 복사하는 동안 writer가 앞부분을 덮어썼다면 그 부분은 버립니다
+        oldest = self.oldest_pos()
+        if start < oldest:
+            self._overrun()
+            out = out[oldest - start:]
+            start = oldest
+        return start, out
+
+
+# 공유 메모리 링 버퍼의 한 구간 - 워커 프로세스에는 오디오 대신 이것만 보냄 (ring: 공유 메모리 이름)
+AudioDescriptor = namedtuple("AudioDescriptor", "ring offset length seq")
+
+
+class SharedAudioRingBuffer(AudioRingBuffer):
+    """multiprocessing.shared_memory 위에 올린 AudioRingBuffer - 다른 프로세스는 이름으로 붙어 복사 없이 읽습니다
+
+    앞쪽 헤더에 [write_pos, reserve_pos, capacity]를 둡니다. 캡처 쪽은 쓰기 전에 reserve_pos를
+    먼저 올리고 다 쓴 뒤 write_pos를 올리므로, 읽는 쪽은 다 쓴 뒤 reserve_pos - capacity보다
+    앞선 구간이 덮어써졌는지 확인할 수 있습니다.
+    """
+    HEADER_BYTES = 64
+
+    def __init__(self, capacity, dtype=np.float32):
+        self.capacity = int(capacity)
+        self.shm = shared_memory.SharedMemory(create=True,
+                                              size=self.HEADER_BYTES + self.capacity * np.dtype(dtype).itemsize)
+        self.name = self.shm.name
+        self._header = np.ndarray((3,), dtype=np.int64, buffer=self.shm.buf)
+        self._header[:] = (0, 0, self.capacity)
+        self.buffer = np.ndarray((self.capacity,), dtype=dtype, buffer=self.shm.buf, offset=self.HEADER_BYTES)
+        self.buffer.fill(0)
+        self.overruns = 0
+        self._cond = Condition()
+
+    @property
+    def write_pos(self):
+        return int(self._header[0])
+
+    @write_pos.setter
+    def write_pos(self, value):
+        self._header[0] = value
+
+    def write(self, samples):
+        self._header[1] = self.write_pos + len(samples)  # 이 위치 - capacity 앞까지는 곧 덮어써짐
+        super().write(samples)
+
+    def oldest_pos(self):
+        return max(0, int(self._header[1]) - self.capacity)
+
+    def describe(self, start, length, seq):
+        return AudioDescriptor(self.name, start, length, seq)
+
+    def close(self):
+        """공유 메모리를 해제합니다 - 이미 붙어 있는 프로세스의 매핑은 그쪽에서 닫을 때까지 유지됨"""
+        if self.buffer is None:
+            return
+        self.buffer = self._header = None
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except (BufferError, FileNotFoundError):
+            pass
+
+
+class SharedRingReader:
+    """다른 프로세스의 SharedAudioRingBuffer에 이름으로 붙어 서술자 구간을 복사 없이 읽습니다"""
+    def __init__(self, name):
+        self.shm = shared_memory.SharedMemory(name=name)
+        self._header = np.ndarray((3,), dtype=np.int64, buffer=self.shm.buf)
+        self.capacity = int(self._header[2])
+        self.buffer = np.ndarray((self.capacity,), dtype=np.float32, buffer=self.shm.buf,
+                                 offset=SharedAudioRingBuffer.HEADER_BYTES)
+        self.dropped = 0
+
+    def valid(self, descriptor):
+        """구간이 다 기록됐고 아직 덮어써지지 않았는지 - 뷰를 다 쓴 뒤에 한 번 더 확인해야 안전"""
+        return (descriptor.offset >= int(self._header[1]) - self.capacity
+                and descriptor.offset + descriptor.length <= int(self._header[0]))
+
+    def views(self, descriptor):
+        """구간을 가리키는 복사 없는 뷰 - 링 끝을 넘어가면 두 조각"""
+        i = descriptor.offset % self.capacity
+        first = min(descriptor.length, self.capacity - i)
+        parts = [self.buffer[i:i + first]]
+        if first < descriptor.length:
+            parts.append(self.buffer[:descriptor.length - first])
+        return parts
+
+    def read(self, descriptor):
+        """구간 오디오 - 이어져 있으면 뷰 그대로, 링 끝을 넘어가면 두 조각을 이은 사본, 덮어써졌으면 None"""
+        if not self.valid(descriptor):
+            self.dropped += 1
+            return None
+        parts = self.views(descriptor)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def close(self):
+        self.buffer = self._header = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+
+
+def create_ring_buffer(capacity):
+    """ASR 워커 프로세스를 쓰면 공유 메모리 링 버퍼, 아니면 일반 링 버퍼"""
+    return SharedAudioRingBuffer(capacity) if ASR_PROCESS_WORKERS else AudioRingBuffer(capacity)
+
+
+def design_resampler_filter(up, down, zero_crossings=RESAMPLER_ZERO_CROSSINGS, rolloff=RESAMPLER_ROLLOFF,
+                            beta=RESAMPLER_KAISER_BETA):
+    """up/down 다상(polyphase) 리샘플러용 카이저 창 sinc 저역 통과 필터를 (up, 탭 수) 뱅크로 만듭니다
+
+    행 p는 위상 p의 계수를 시간 역순으로 담고 있어 입력 창과 바로 내적할 수 있습니다.
+    """
+    factor = max(up, down)
+    length = 2 * zero_crossings * factor + 1
+    center = (length - 1) / 2
+    n = np.arange(length)
+    h = np.sinc(rolloff * (n - center) / factor) * np.kaiser(length, beta)
+    h *= up / h.sum()  # 업샘플링으로 줄어든 이득 보정 (DC 이득 1)
+    taps = -(-length // up)
+    h = np.concatenate((h, np.zeros(taps * up - length)))
+    return np.ascontiguousarray(h.reshape(taps, up).T[:, ::-1], dtype=np.float32)
+
+
+class StreamingResampler:
+    """장치 네이티브 포맷 블록을 RATE Hz 모노 float32로 바꾸는 스트리밍 다상 리샘플러
+
+    채널은 평균으로 다운믹스하고, 블록 사이에 필터 길이만큼의 입력 이력을 넘겨
+    블록 경계에서 딸깍 소리가 나지 않게 합니다. 출력 샘플마다 필요한 입력 창을
+    sliding_window_view로 모아 한 번의 einsum으로 계산하므로 콜백 스레드에서 돌릴 수 있습니다.
+    """
+    def __init__(self, src_rate, dst_rate=RATE, channels=1):
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        self.channels = channels
+        g = math.gcd(self.src_rate, self.dst_rate)
+        self.up = self.dst_rate // g
+        self.down = self.src_rate // g
+        self.passthrough = self.up == self.down
+        if not self.passthrough:
+            self.bank = design_resampler_filter(self.up, self.down)
+            self.taps = self.bank.shape[1]
+            self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._in_count = 0   # 지금까지 받은 입력 샘플 수
+        self._out_count = 0  # 지금까지 내보낸 출력 샘플 수
+
+    def process(self, block):
+        """(frames,) 또는 (frames, channels) 블록을 받아 새로 만들어진 출력 샘플을 반환합니다"""
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim == 2:
+            block = block[:, 0] if block.shape[1] == 1 else block.mean(axis=1, dtype=np.float32)
+        if self.passthrough:
+            return block
+        buf = np.concatenate((self._history, block))
+        start = self._in_count
+        self._in_count += len(block)
+        self._history = buf[len(buf) - (self.taps - 1):]
+        # 출력 n은 업샘플 축의 n*down 위치 = 입력 (n*down)//up, 위상 (n*down)%up
+        end = (self._in_count * self.up + self.down - 1) // self.down
+        if end <= self._out_count:
+            return np.zeros(0, dtype=np.float32)
+        positions = np.arange(self._out_count, end, dtype=np.int64) * self.down
+        self._out_count = end
+        windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps)
+        return np.einsum("ij,ij->i", windows[positions // self.up - start], self.bank[positions % self.up])
+
+
+class AudioCaptureEngine:
+    """선택된 장치의 스트림을 세션 내내 열어두고 콜백으로 링 버퍼를 채웁니다
+
+    감시 스레드가 스트림이 멈추거나(입력 장치는 DEVICE_STALL_SECONDS 동안 콜백 없음)
+    비활성화되면 장치 레지스트리를 새로 읽어 같은 장치, 없으면 비슷한 장치로 다시 엽니다.
+    끊겨 있던 시간만큼은 무음을 채워 링 버퍼 위치(캡처 시계)가 실제 시간과 어긋나지 않게 합니다.
+    """
+    def __init__(self, device_info, ring_seconds=RING_BUFFER_SECONDS):
+        self.device_info = device_info
+        self.ring = create_ring_buffer(RATE * ring_seconds)
+        self.status_errors = 0  # 드라이버가 보고한 오버플로 등 상태 플래그 횟수
+        self.failovers = 0
+        self.capture_rate = RATE
+        self.capture_channels = CHANNELS
+        self._resampler = StreamingResampler(RATE)
+        self._pa = None
+        self._stream = None
+        self._loopback = False
+        self._lost = False
+        self._stream_lock = Lock()
+        self._watchdog = None
+        self.running = False
+
+    def start(self):
+        """장치 종류에 맞는 콜백 스트림을 열고 감시 스레드를 시작합니다"""
+        with self._stream_lock:
+            self._open()
+        self.running = True
+        self._watchdog = Thread(target=self._watchdog_loop, name="capture-watchdog", daemon=True)
+        self._watchdog.start()
+        log.info(f"✅ 연속 캡처 시작 (링 버퍼 {self.ring.capacity / RATE:.0f}초)")
+        return self
+
+    def _open(self):
+        info = self.device_info
+        self._loopback = False
+        if info and info['output_channels'] > 0 and info['input_channels'] == 0:
+            log.info("🔄 출력 장치 감지 - WASAPI Loopback 스트림 사용")
+            try:
+                self._start_loopback_stream()
+                self._loopback = True
+            except Exception as e:
+                log.error(f"❌ 출력 장치 스트림 생성 실패: {e}")
+                log.info("🔄 일반 입력 장치로 대체 시도...")
+                self._start_input_stream()
+        else:
+            log.info("🔄 입력 장치 감지 - 일반 캡처 스트림 사용")
+            self._start_input_stream()
+
+    def _start_input_stream(self):
+        import pyaudio
+        self._pa_continue = pyaudio.paContinue
+        self._pa = open_portaudio()
+        index = self.device_info['index']
+        device_info = self._pa.get_device_info_by_index(index)
+        if device_info['maxInputChannels'] == 0:
+            close_portaudio(self._pa)
+            self._pa = None
+            raise RuntimeError("선택된 장치는 입력 장치가 아닙니다. 스테레오 믹스를 활성화해주세요.")
+        last_error = None
+        for rate, channels in self._capture_formats(device_info['maxInputChannels'], device_info['defaultSampleRate']):
+            self._set_format(rate, channels)
+            try:
+                self._stream = self._pa.open(format=FORMAT,
+                                             channels=channels,
+                                             rate=rate,
+                                             input=True,
+                                             input_device_index=index,
+                                             frames_per_buffer=int(CHUNK * rate / RATE),
+                                             stream_callback=self._pyaudio_callback)
+                break
+            except (OSError, ValueError) as e:
+                last_error = e
+                log.warning(f"⚠️ {rate}Hz/{channels}ch 형식으로 열 수 없습니다: {e}")
+        else:
+            close_portaudio(self._pa)
+            self._pa = None
+            raise last_error
+        self._stream.start_stream()
+
+    def _capture_formats(self, max_channels, native_rate):
+        """시도할 (샘플레이트, 채널) 순서 - 장치 네이티브 형식 먼저, 안 되면 RATE/CHANNELS"""
+        formats = []
+        if CAPTURE_NATIVE_FORMAT:
+            formats.append((int(native_rate), max(1, min(int(max_channels), 2))))
+        if (RATE, CHANNELS) not in formats:
+            formats.append((RATE, CHANNELS))
+        return formats
+
+    def _set_format(self, rate, channels):
+        self.capture_rate = rate
+        self.capture_channels = channels
+        self._resampler = StreamingResampler(rate, RATE, channels)
+        log.info(f"🎚️ 캡처 형식 {rate}Hz/{channels}ch → {RATE}Hz 모노")
+
+    def _status_error(self):
+        self.status_errors += 1
+        metrics.counter("capture_stream_status_errors_total", "드라이버가 보고한 입력 오버플로 등 상태 플래그 수").inc()
+
+    def _pyaudio_callback(self, in_data, frame_count, time_info, status):
+        if status:
+            self._status_error()
+        samples = np.frombuffer(in_data, dtype=np.int16).astype(np.float32)
+        samples *= 1.0 / 32768.0
+        self.ring.write(self._resampler.process(samples.reshape(-1, self.capture_channels)))
+        return (None, self._pa_continue)
+
+    def _start_loopback_stream(self):
+        if not SOUNDDEVICE_AVAILABLE:
+            raise RuntimeError("sounddevice 라이브러리가 없습니다 (pip install sounddevice)")
+        import sounddevice as sd
+        info = self.device_info
+        last_error = None
+        for rate, channels in self._capture_formats(info['output_channels'], info['sample_rate']):
+            self._set_format(rate, channels)
+            try:
+                self._stream = sd.InputStream(samplerate=rate,
+                                              channels=channels,
+                                              dtype='float32',
+                                              device=info['index'],
+                                              blocksize=int(CHUNK * rate / RATE),
+                                              latency='low',
+                                              callback=self._sounddevice_callback)
+                break
+            except Exception as e:
+                last_error = e
+                log.warning(f"⚠️ {rate}Hz/{channels}ch 형식으로 열 수 없습니다: {e}")
+        else:
+            raise last_error
+        self._stream.start()
+
+    def _sounddevice_callback(self, indata, frames, time_info, status):
+        if status:
+            self._status_error()
+        self.ring.write(self._resampler.process(indata))
+
+    def _stream_active(self):
+        stream = self._stream
+        if stream is None:
+            return False
+        try:
+            return stream.is_active() if hasattr(stream, 'is_active') else stream.active
+        except Exception:
+            return False
+
+    def _watchdog_loop(self):
+        last_pos = self.ring.write_pos
+        last_change = time.monotonic()
+        while self.running:
+            time.sleep(DEVICE_WATCHDOG_SECONDS)
+            if not self.running:
+                break
+            pos = self.ring.write_pos
+            now = time.monotonic()
+            if pos != last_pos:
+                last_pos, last_change = pos, now
+                continue
+            # 루프백은 재생 중인 소리가 없으면 콜백도 없으므로 멈춤만으로는 판단하지 않음
+            stalled = not self._loopback and now - last_change >= DEVICE_STALL_SECONDS
+            if stalled or not self._stream_active():
+                self._failover(last_change)
+                last_pos, last_change = self.ring.write_pos, time.monotonic()
+
+    def _failover(self, since):
+        """스트림을 닫고 장치 목록을 새로 읽은 뒤 같은 장치(없으면 대체 장치)로 다시 엽니다"""
+        with self._stream_lock:
+            if not self.running:
+                return
+            if not self._lost:
+                log.warning(f"⚠️ 캡처 장치 응답 없음: {self.device_info['name']} - 다시 연결합니다")
+            self._close_stream()
+            # 끊겨 있던 시간만큼 무음을 채움 (스트림이 닫혀 있으므로 쓰는 쪽은 이 스레드뿐)
+            gap = int((time.monotonic() - since) * RATE)
+            if gap > 0:
+                self.ring.write(np.zeros(min(gap, self.ring.capacity), dtype=np.float32))
+            try:
+                device_registry.refresh()
+                in_use = {source.engine.device_info.get('id') for source in capture_sources if source.engine is not self}
+                device = (device_registry.get(self.device_info.get('id'))
+                          or device_registry.fallback(self.device_info, exclude=in_use))
+                if device is None:
+                    raise RuntimeError("사용할 수 있는 캡처 장치가 없습니다")
+                self.device_info = device
+                self._open()
+            except Exception as e:
+                if not self._lost:
+                    log.error(f"❌ 캡처 장치를 다시 열 수 없습니다 - 장치가 연결될 때까지 재시도합니다: {e}")
+                self._close_stream()
+                self._lost = True
+                return
+            self._lost = False
+            self.failovers += 1
+            metrics.counter("capture_failovers_total", "캡처 장치를 다시 열거나 다른 장치로 바꾼 횟수").inc()
+            log.warning(f"🔁 캡처 장치 연결: {device['name']}")
+
+    def _close_stream(self):
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                if hasattr(stream, 'stop_stream'):
+                    stream.stop_stream()
+                else:
+                    stream.stop()
+                stream.close()
+            except Exception as e:
+                log.warning(f"⚠️ 캡처 스트림 정리 중 오류: {e}")
+        if self._pa is not None:
+            close_portaudio(self._pa)
+            self._pa = None
+
+    def stop(self):
+        """감시 스레드를 멈추고 스트림과 PortAudio 핸들을 정리합니다"""
+        self.running = False
+        with self._stream_lock:
+            self._close_stream()
+        self.ring.close()
+
+
+def device_label(device):
+    """자막 앞에 붙일 짧은 장치 이름 - 괄호 속 드라이버 설명은 뺌"""
+    return re.sub(r"\s*\(.*?\)", "", device['name']).strip()[:20] or device['name']
+
+
+def start_capture_engine():
+    """선택된 첫 번째 장치의 연속 캡처 엔진을 시작합니다"""
+    sources = start_capture_sources()
+    return sources[0].engine if sources else None
+
+
+def start_capture_sources():
+    """선택된 장치마다 연속 캡처 엔진을 시작하고 CaptureSource 목록을 반환합니다
+
+    장치가 둘 이상이면 자막을 구분할 수 있게 소스마다 장치 이름을 붙입니다.
+    열지 못한 장치는 건너뛰고 나머지로 계속합니다.
+    """
+    global capture_engine
+    if not capture_sources:
+        devices = selected_devices or ([selected_device_info] if selected_device_info else [])
+        if not devices:
+            log.error("❌ 오디오 장치가 선택되지 않았습니다.")
+            return []
+        for device in devices:
+            engine = AudioCaptureEngine(device)
+            try:
+                engine.start()
+            except Exception as e:
+                # 반쯤 연 스트림을 닫고 공유 메모리 링 버퍼(/dev/shm)도 해제
+                engine.stop()
+                log.error(f"❌ {device['name']} 캡처 시작 실패: {e}")
+                continue
+            capture_sources.append(CaptureSource(engine, device_label(device) if len(devices) > 1 else None))
+        capture_engine = capture_sources[0].engine if capture_sources else None
+    return list(capture_sources)
+
+
+def stop_capture_engine():
+    global capture_engine
+    for source in capture_sources:
+        source.engine.stop()
+    capture_sources.clear()
+    capture_engine = None
+
+
+def encode_wav_bytes(samples):
+    """float32/int16 모노 샘플을 메모리 안에서 16비트 WAV 바이트로 인코딩합니다 (이미 WAV 바이트면 그대로)"""
+    if isinstance(samples, bytes):
+        return samples
+    samples = np.asarray(samples)
+    if samples.dtype != np.int16:
+        samples = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    buf = io.BytesIO()
+    wf = wave.open(buf, 'wb')
+    wf.setnchannels(CHANNELS)
+    wf.setsampwidth(2)
+    wf.setframerate(RATE)
+    wf.writeframes(samples.tobytes())
+    wf.close()
+    return buf.getvalue()
+
+
+def scratch_dir():
+    """임시 오디오를 둘 디렉터리 - 가능하면 tmpfs(/dev/shm)를 사용합니다"""
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return tempfile.gettempdir()
+
+
+def capture_audio_with_selected_device(start_pos, duration=RECORD_SECONDS, engine=None):
+    """링 버퍼에서 start_pos부터 duration초 구간을 꺼냅니다
+
+    (다음 읽기 위치, float32 샘플)을 반환합니다. 캡처는 백그라운드에서 계속되므로
+    처리 중에 들어온 오디오도 다음 호출에서 그대로 이어서 읽힙니다.
+    """
+    engine = engine or start_capture_engine()
+    if engine is None:
+        return start_pos, None
+
+    window = int(duration * RATE)
+    if not engine.ring.wait_for(start_pos + window, timeout=duration + 1.0):
+        log.warning("⚠️ 캡처 스트림에서 오디오가 들어오지 않습니다.")
+        return start_pos, None
+
+    actual_start, samples = engine.ring.read(start_pos, window)
+    if actual_start != start_pos:
+        log.warning(f"⚠️ 처리 지연으로 {(actual_start - start_pos) / RATE:.1f}초 분량의 오디오를 건너뜀")
+    if samples.size == 0:
+        return actual_start, None
+    return actual_start + len(samples), samples
+
+def run_whisper_cpp(audio, slot=0):
+    """NumPy 오디오 버퍼(float32 또는 int16, 16kHz 모노)를 인식해 텍스트를 반환합니다"""
+    return transcribe_audio(audio, slot)["text"]
+
+def transcribe_audio(audio, slot=0, **params):
+    """audio를 인식해 {"text", "language", "segments"} 딕셔너리를 반환합니다
+
+    WHISPER_ENGINE이 "server"이면 모델을 한 번만 로드한 상주 워커를 쓰고,
+    실행 파일이 없거나 "cli"로 설정된 경우 청크마다 whisper-cli를 실행합니다.
+    segments는 [{"start", "end", "text"}] (초 단위, audio 기준) 이며
+    whisper-cli 경로에서는 비어 있습니다.
+    """
+    empty = {"text": "", "language": None, "segments": []}
+    if audio is None or len(audio) == 0:
+        return empty
+    if WHISPER_ENGINE == "server":
+        worker = get_whisper_worker(slot)
+        if worker is not None:
+            try:
+                return worker.transcribe(audio, **params)
+            except Exception as e:
+                log.error(f"❌ 상주 Whisper 엔진 오류: {e}")
+                return empty
+    return run_whisper_cli(audio, prompt=params.get("prompt"), translate=params.get("translate", False))
+
+def run_whisper_cli(audio, prompt=None, translate=False, strict=False):
+    """whisper-cli를 한 번 실행해 audio를 인식하고 {"text", "language", "segments"}를 반환합니다
+
+    ASR_INPUT_MODE가 "stdin"이면 WAV 바이트를 whisper의 표준 입력으로 넘기고
+    표준 출력에서 바로 결과를 읽으므로 디스크를 거치지 않습니다.
+    "scratch"이면 호출마다 고유한 임시 파일을 tmpfs에 만들고 바로 지웁니다.
+    언어 자동 감지 결과는 whisper 로그(stderr)의 "auto-detected language"에서 읽습니다.
+    실패하면 로그를 남기고 빈 결과를 반환하며, strict=True면 대신 RuntimeError를 냅니다.
+    """
+    empty = {"text": "", "language": None, "segments": []}
+
+    def fail(message, icon="❌", level=logging.ERROR):
+        if strict:
+            raise RuntimeError(message)
+        log.log(level, f"{icon} {message}")
+        return empty
+
+    if not os.path.exists(WHISPER_EXE):
+        return fail(f"Whisper 실행 파일을 찾을 수 없습니다: {WHISPER_EXE}")
     
-    p = pyaudio.PyAudio()
+    if not os.path.exists(WHISPER_MODEL) and not is_fake_whisper(WHISPER_EXE):
+        return fail(f"Whisper 모델 파일을 찾을 수 없습니다: {WHISPER_MODEL}")
     
+    wav_bytes = encode_wav_bytes(audio)
+    command = executable_command(WHISPER_EXE) + [
+        "--model", WHISPER_MODEL,
+        "--language", WHISPER_LANGUAGE,
+        "--no-timestamps",
+    ]
+    if WHISPER_LANGUAGE != "auto":
+        command.append("--no-prints")  # 감지 결과 로그가 필요 없을 때만 로그를 끔
+    if translate:
+        command.append("--translate")
+    if prompt:
+        command += ["--prompt", prompt]
+    scratch_path = None
     try:
-        # 장치 정보 확인
-        device_info = p.get_device_info_by_index(selected_device_index)
-        print(f"장치 정보: {device_info['name']}")
-        print(f"입력 채널: {device_info['maxInputChannels']}, 출력 채널: {device_info['maxOutputChannels']}")
+        if ASR_INPUT_MODE == "stdin":
+            command += ["--file", "-"]
+            stdin_data = wav_bytes
+        else:
+            fd, scratch_path = tempfile.mkstemp(prefix="whisper_", suffix=".wav", dir=scratch_dir())
+            with os.fdopen(fd, "wb") as f:
+                f.write(wav_bytes)
+            command += ["--file", scratch_path]
+            stdin_data = None
         
-        # 입력 채널이 있는지 확인
-        if device_info['maxInputChannels'] == 0:
-            print("⚠️ 선택된 장치는 입력 장치가 아닙니다.")
-            print("💡 다른 장치를 선택하거나 스테레오 믹스를 활성화해주세요.")
-            p.terminate()
-            return None
+        metrics.counter("whisper_cli_runs_total", "청크마다 whisper-cli를 실행한 횟수").inc()
+        result = subprocess.run(command, input=stdin_data, capture_output=True, timeout=30)
+        stderr = result.stderr.decode("utf-8", "replace")
+        if result.returncode != 0:
+            return fail(f"Whisper 오류 (코드 {result.returncode}): {stderr.strip()}", "⚠️", logging.WARNING)
         
-        print("🔧 PyAudio 스트림 생성 중...")
-        # 선택된 장치로 오디오 캡처
-        stream = p.open(format=FORMAT,
-                        channels=CHANNELS,
-                        rate=RATE,
-                        input=True,
-                        input_device_index=selected_device_index,
-                        frames_per_buffer=CHUNK)
-        
-        print("🎙️ 오디오 데이터 수집 시작...")
-        frames = []
-        total_chunks = int(RATE / CHUNK * duration)
-        
-        # 오디오 데이터 수집
-        for i in range(0, total_chunks):
+        text = " ".join(line.strip() for line in result.stdout.decode("utf-8", "replace").splitlines() if line.strip())
+        detected = re.search(r"auto-detected language: (\w+)", stderr)
+        log.debug("📝 인식된 텍스트: %s", text)
+        return {"text": text, "language": detected.group(1) if detected else None, "segments": []}
+    except subprocess.TimeoutExpired:
+        return fail("Whisper 실행 시간 초과", "⏰", logging.WARNING)
+    except Exception as e:
+        if strict and isinstance(e, RuntimeError):
+            raise  # 위에서 fail()이 낸 예외
+        return fail(f"Whisper 실행 중 오류: {e}")
+    finally:
+        if scratch_path and os.path.exists(scratch_path):
+            os.remove(scratch_path)
+
+# ========== 상주 Whisper 엔진 ==========
+def executable_command(path):
+    """실행 파일 경로를 명령 리스트로 바꿉니다 (.py 대역 엔진은 현재 파이썬으로 실행)"""
+    if path.endswith(".py"):
+        return [sys.executable, path]
+    return [path]
+
+
+def is_fake_whisper(path):
+    return os.path.basename(path) == "fake_whisper.py"
+
+
+def find_free_port(host=WHISPER_SERVER_HOST):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def encode_multipart(fields, files):
+    """multipart/form-data 본문을 만듭니다 - (본문, Content-Type) 반환"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8"))
+    for name, (filename, data, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode("utf-8"))
+        parts.append(data)
+        parts.append(b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class WhisperServerWorker:
+    """whisper-server 자식 프로세스를 상주시켜 모델을 한 번만 로드하고 여러 요청을 처리합니다
+
+    - 시작 시 /health가 응답할 때까지 기다립니다 (모델 로드 완료 확인)
+    - 백그라운드 스레드가 쉬는 동안 주기적으로 /health를 확인하고, 죽었거나 연달아 응답하지 않는
+      (멈춘) 프로세스는 다시 띄웁니다
+    - 요청 중 연결이 끊기면 프로세스를 재시작하고 한 번 더 시도합니다
+    - 재시작 후 WHISPER_SERVER_STABLE_SECONDS 동안 건강하면 재시작 횟수를 초기화하므로
+      긴 세션에서 가끔 죽는 정도로는 재시작 한도에 걸리지 않습니다
+    """
+    def __init__(self, exe=WHISPER_SERVER_EXE, model=WHISPER_MODEL,
+                 host=WHISPER_SERVER_HOST, port=WHISPER_SERVER_PORT, threads=WHISPER_THREADS):
+        self.exe = exe
+        self.model = model
+        self.host = host
+        self.requested_port = port
+        self.port = None
+        self.threads = threads
+        self.proc = None
+        self.restarts = 0
+        self.requests = 0
+        self._last_restart = None
+        self._health_failures = 0
+        self._lock = Lock()
+        self._stderr_tail = deque(maxlen=50)
+        self._stopping = False
+        self._monitor = None
+
+    def start(self, timeout=WHISPER_SERVER_START_TIMEOUT):
+        """서버 프로세스를 띄우고 모델 로드가 끝날 때까지 기다립니다"""
+        self._spawn()
+        if not self.wait_ready(timeout):
+            tail = "\n".join(self._stderr_tail)
+            self.stop()
+            raise RuntimeError(f"whisper-server가 준비되지 않았습니다\n{tail}")
+        if self._monitor is None:
+            self._monitor = Thread(target=self._monitor_loop, daemon=True)
+            self._monitor.start()
+        log.info(f"✅ 상주 Whisper 엔진 준비 완료 (포트 {self.port})")
+        return self
+
+    def _spawn(self):
+        self.port = self.requested_port or find_free_port(self.host)
+        command = executable_command(self.exe) + [
+            "--model", self.model,
+            "--host", self.host,
+            "--port", str(self.port),
+            "--threads", str(self.threads),
+            "--language", WHISPER_LANGUAGE,
+        ]
+        creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        self.proc = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.PIPE, creationflags=creationflags)
+        Thread(target=self._drain_stderr, args=(self.proc,), daemon=True).start()
+
+    def _drain_stderr(self, proc):
+        for line in iter(proc.stderr.readline, b""):
+            self._stderr_tail.append(line.decode("utf-8", "replace").rstrip())
+
+    def _request(self, method, path, body=None, headers=None, timeout=5.0):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def healthy(self):
+        """프로세스가 살아 있고 /health가 200을 반환하는지 확인합니다"""
+        if not self.alive():
+            return False
+        try:
+            status, _ = self._request("GET", "/health", timeout=2.0)
+            return status == 200
+        except OSError:
+            return False
+
+    def wait_ready(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.alive():
+                return False
+            if self.healthy():
+                return True
+            time.sleep(0.1)
+        return False
+
+    def restart(self):
+        """죽었거나 응답이 없는 서버를 다시 띄웁니다"""
+        if self.restarts >= WHISPER_SERVER_MAX_RESTARTS:
+            raise RuntimeError("whisper-server 재시작 한도를 초과했습니다")
+        self.restarts += 1
+        self._last_restart = time.monotonic()
+        self._health_failures = 0
+        metrics.counter("whisper_restarts_total", "상주 Whisper 엔진 재시작 횟수").inc()
+        log.warning(f"🔄 Whisper 엔진 재시작 ({self.restarts}/{WHISPER_SERVER_MAX_RESTARTS})")
+        self._kill()
+        time.sleep(min(2.0, 0.2 * self.restarts))
+        self._spawn()
+        if not self.wait_ready(WHISPER_SERVER_START_TIMEOUT):
+            raise RuntimeError("재시작한 whisper-server가 준비되지 않았습니다")
+
+    def _monitor_loop(self):
+        while not self._stopping:
+            time.sleep(WHISPER_SERVER_HEALTH_INTERVAL)
+            if self._stopping:
+                break
+            # 요청 처리 중이면 건너뜀 - 멈춘 요청은 transcribe의 시간 초과가 재시작함
+            if not self._lock.acquire(blocking=False):
+                continue
+            try:
+                self._check_health()
+            finally:
+                self._lock.release()
+
+    def _check_health(self):
+        """_lock을 쥔 채로 - 죽었거나 연달아 /health에 응답하지 않으면 재시작하고, 오래 건강하면 재시작 횟수를 초기화"""
+        if not self.alive():
+            reason = "Whisper 엔진 프로세스가 종료되었습니다"
+        elif not self.healthy():
+            self._health_failures += 1
+            if self._health_failures < WHISPER_SERVER_HEALTH_FAILURES:
+                return
+            reason = f"Whisper 엔진이 /health에 {self._health_failures}번 연달아 응답하지 않습니다"
+        else:
+            self._health_failures = 0
+            if (self.restarts and self._last_restart is not None
+                    and time.monotonic() - self._last_restart >= WHISPER_SERVER_STABLE_SECONDS):
+                log.info(f"✅ Whisper 엔진이 {WHISPER_SERVER_STABLE_SECONDS}초 동안 안정적이어서 재시작 횟수를 초기화합니다")
+                self.restarts = 0
+            return
+        log.warning(f"⚠️ {reason}")
+        try:
+            self.restart()
+        except Exception as e:
+            log.error(f"❌ Whisper 엔진 재시작 실패: {e}")
+
+    def transcribe(self, audio, **params):
+        """오디오 버퍼를 서버로 보내 {"text", "language", "segments"} 결과를 받습니다"""
+        fields = {"response_format": "verbose_json", "temperature": "0.0", "language": WHISPER_LANGUAGE}
+        fields.update({k: str(v).lower() if isinstance(v, bool) else str(v) for k, v in params.items()})
+        body, content_type = encode_multipart(fields, {"file": ("audio.wav", encode_wav_bytes(audio), "audio/wav")})
+        headers = {"Content-Type": content_type}
+        with self._lock:
+            for attempt in range(2):
+                if not self.alive():
+                    self.restart()
+                try:
+                    status, data = self._request("POST", "/inference", body, headers, timeout=30.0)
+                except OSError as e:
+                    if attempt == 0:
+                        log.warning(f"⚠️ Whisper 엔진 연결 실패, 재시작 후 재시도: {e}")
+                        self.restart()
+                        continue
+                    raise
+                if status != 200:
+                    raise RuntimeError(f"whisper-server 응답 오류 {status}: {data[:200]!r}")
+                self.requests += 1
+                metrics.counter("whisper_requests_total", "상주 Whisper 엔진 요청 수").inc()
+                result = json.loads(data.decode("utf-8"))
+                return {
+                    "text": result.get("text", "").strip(),
+                    "language": result.get("language"),
+                    "segments": result.get("segments", []),
+                }
+        return {"text": "", "language": None, "segments": []}
+
+    def _kill(self):
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    def stop(self):
+        self._stopping = True
+        self._kill()
+
+
+def get_whisper_worker(slot=0, threads=WHISPER_THREADS):
+    """slot번 상주 Whisper 워커를 (필요하면 시작해서) 반환합니다
+
+    ASR 워커 스레드마다 slot을 달리 주면 각자 자기 엔진 프로세스를 가집니다.
+    whisper-server 실행 파일이 없으면 None을 반환하고 whisper-cli 경로로 대체됩니다.
+    모델 로드는 slot별 잠금 안에서 하므로 서로 다른 slot은 동시에 시작할 수 있습니다.
+    """
+    with whisper_worker_lock:
+        worker = whisper_workers.get(slot)
+        if worker is not None:
+            return worker
+        slot_lock = whisper_slot_locks.setdefault(slot, Lock())
+    with slot_lock:
+        worker = whisper_workers.get(slot)
+        if worker is not None:
+            return worker
+        if not os.path.exists(WHISPER_SERVER_EXE):
+            log.warning(f"⚠️ whisper-server를 찾을 수 없어 whisper-cli를 사용합니다: {WHISPER_SERVER_EXE}")
+            return None
+        if not os.path.exists(WHISPER_MODEL) and not is_fake_whisper(WHISPER_SERVER_EXE):
+            log.error(f"❌ Whisper 모델 파일을 찾을 수 없습니다: {WHISPER_MODEL}")
+            return None
+        try:
+            worker = WhisperServerWorker(exe=WHISPER_SERVER_EXE, threads=threads).start()
+        except Exception as e:
+            log.error(f"❌ 상주 Whisper 엔진 시작 실패: {e}")
+            return None
+        with whisper_worker_lock:
+            whisper_workers[slot] = worker
+        return worker
+
+
+def stop_whisper_worker():
+    with whisper_worker_lock:
+        for worker in whisper_workers.values():
+            worker.stop()
+        whisper_workers.clear()
+
+
+ASR_PROCESS_SETTINGS = ("WHISPER_ENGINE", "WHISPER_EXE", "WHISPER_SERVER_EXE", "WHISPER_MODEL", "WHISPER_THREADS",
+                        "WHISPER_LANGUAGE", "ASR_INPUT_MODE", "WARMUP_ENABLED", "WARMUP_AUDIO_SECONDS")
+
+
+def asr_process_main(slot, tasks, results, settings, log_level, ready, warmed):
+    """ASR 워커 프로세스 본체 - 서술자로 공유 메모리 구간을 읽어 상주 Whisper 엔진으로 인식합니다
+
+    WAV로 인코딩하면서 처음 복사하고, 그 사이 구간이 덮어써졌으면 인식하지 않고 None을 돌려줍니다.
+    엔진 시작/워밍업을 마치면 ready를 설정하고, 워밍업이 성공했을 때만 warmed를 1로 둡니다.
+    spawn으로 새로 import된 모듈이므로 부모의 설정(명령줄로 바꾼 값 포함)을 settings로 받아 덮어씁니다.
+    settings["WARMUP_TRANSLATE"]는 부모가 정한 whisper translate 작업 여부로, 실제 요청과 같은 작업으로 워밍업합니다.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C는 부모가 처리하고 tasks에 None을 넣어 끝냄
+    translate = settings.pop("WARMUP_TRANSLATE", False)
+    globals().update(settings)
+    setup_logging(log_level)
+    readers = {}
+    try:
+        if WARMUP_ENABLED:
+            try:
+                warm_up_whisper(slot, translate=translate)
+                warmed.value = 1
+            except Exception as e:
+                log.warning(f"⚠️ ASR 워커 프로세스 {slot} 워밍업 실패: {e}")
+        else:
+            warmed.value = 1
+        ready.set()
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            descriptor, params = task
+            result = None
+            try:
+                reader = readers.get(descriptor.ring)
+                if reader is None:
+                    reader = readers[descriptor.ring] = SharedRingReader(descriptor.ring)
+                audio = reader.read(descriptor)
+                wav = encode_wav_bytes(audio) if audio is not None else None
+                del audio  # 뷰를 놓아야 나중에 공유 메모리를 닫을 수 있음
+                if wav is not None and reader.valid(descriptor):
+                    result = transcribe_audio(wav, slot, **params)
+            except Exception as e:
+                result = {"error": str(e)}
+            results.put((descriptor.seq, result))
+    finally:
+        stop_whisper_worker()
+        for reader in readers.values():
+            reader.close()
+
+
+class AsrProcess:
+    """ASR slot 하나를 맡는 워커 프로세스 - GIL 밖에서 인코딩/요청을 처리하고 오디오 대신 서술자만 받습니다
+
+    요청은 한 번에 하나씩 보내고 결과를 기다립니다 (파이프라인의 ASR 스레드가 slot마다 하나씩 부름).
+    프로세스가 죽으면 다음 요청 때 다시 띄웁니다.
+    """
+    def __init__(self, slot):
+        self.slot = slot
+        self.process = None
+        self._context = multiprocessing.get_context("spawn")
+
+    def start(self):
+        self.tasks = self._context.Queue()
+        self.results = self._context.Queue()
+        self.ready = self._context.Event()  # 엔진 시작/워밍업이 끝나면 (실패해도) 설정됨
+        self.warmed = self._context.Value("b", 0)  # 워밍업이 성공했으면 1
+        settings = {name: globals()[name] for name in ASR_PROCESS_SETTINGS}
+        settings["WARMUP_TRANSLATE"] = whisper_should_translate()  # 자식에는 대상 언어 설정이 없으므로 여기서 정함
+        self.process = self._context.Process(
+            target=asr_process_main, name=f"asr-process-{self.slot}", daemon=True,
+            args=(self.slot, self.tasks, self.results, settings, logging.getLevelName(log.getEffectiveLevel()),
+                  self.ready, self.warmed))
+        self.process.start()
+        return self
+
+    def transcribe(self, descriptor, timeout=ASR_PROCESS_TIMEOUT, **params):
+        """인식 결과 딕셔너리 - 구간이 이미 덮어써졌으면 None"""
+        if self.process is None or not self.process.is_alive():
+            if self.process is not None:
+                log.warning(f"⚠️ ASR 워커 프로세스 {self.slot}가 종료되어 다시 시작합니다")
+            self.start()
+        self.tasks.put((descriptor, params))
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                seq, result = self.results.get(timeout=1.0)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    raise RuntimeError(f"ASR 워커 프로세스 {self.slot}가 종료되었습니다")
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"ASR 워커 프로세스 {self.slot} 응답 시간 초과")
+                continue
+            if seq != descriptor.seq:
+                continue  # 시간 초과로 포기한 이전 요청의 결과
+            if result is not None and "error" in result:
+                raise RuntimeError(result["error"])
+            return result
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.tasks.put(None)
+            self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=2)
+        self.process = None
+
+
+class WhisperWarmup:
+    """ASR slot마다 상주 Whisper 엔진을 띄우고 무음을 한 번 인식시켜 모델 로드와 첫 디코딩 지연을 미리 치릅니다
+
+    whisper-cli 경로에서는 같은 호출로 모델 파일을 페이지 캐시에 올려 둡니다.
+    slot들은 동시에 시작하고, 실패해도 파이프라인은 평소처럼 필요할 때 엔진을 띄웁니다.
+    모든 slot이 실제로 인식에 성공해야 ready이고, 하나라도 실패하면 error에 이유를 남깁니다.
+    ASR_PROCESS_WORKERS면 엔진은 워커 프로세스가 띄우고 거기서 워밍업하므로 파이프라인이
+    watch()로 넘겨 준 AsrProcess들의 ready/warmed를 기다립니다.
+    """
+    def __init__(self, slots=ASR_WORKERS, seconds=WARMUP_AUDIO_SECONDS):
+        self.slots = max(1, slots)
+        self.seconds = seconds
+        self.status = "음성 인식 엔진 대기 중"
+        self.warmup_seconds = None
+        self.error = None
+        self._done = Event()
+        self._thread = None
+        self._lock = Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                if not WARMUP_ENABLED:
+                    self._done.set()
+                    return self
+                if ASR_PROCESS_WORKERS:
+                    self.status = "ASR 워커 프로세스 시작 중..."
+                    return self
+                self._thread = Thread(target=self._run, name="whisper-warmup", daemon=True)
+                self._thread.start()
+        return self
+
+    def watch(self, processes, timeout=WHISPER_SERVER_START_TIMEOUT):
+        """워커 프로세스 모드 - processes가 모두 엔진을 띄우고 워밍업을 마칠 때까지 기다리는 스레드를 시작"""
+        with self._lock:
+            if self._thread is not None or self._done.is_set():
+                return self
+            self._thread = Thread(target=self._watch, args=(processes, timeout), name="whisper-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        started = time.perf_counter()
+        self.status = "음성 인식 엔진 워밍업 중..."
+        translate = whisper_should_translate()
+        errors = []
+
+        def warm(slot):
+            try:
+                warm_up_whisper(slot, self.seconds, translate=translate)
+            except Exception as e:
+                errors.append(f"slot {slot}: {e}")
+
+        threads = [Thread(target=warm, args=(slot,), name=f"whisper-warmup-{slot}", daemon=True)
+                   for slot in range(self.slots)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._finish(started, errors)
+
+    def _watch(self, processes, timeout):
+        started = time.perf_counter()
+        self.status = "ASR 워커 프로세스 워밍업 중..."
+        deadline = time.monotonic() + timeout
+        errors = []
+        for process in processes:
+            if not process.ready.wait(max(0.0, deadline - time.monotonic())):
+                errors.append(f"slot {process.slot}: {timeout:.0f}초 안에 준비되지 않음")
+            elif not process.warmed.value:
+                errors.append(f"slot {process.slot}: 워커 프로세스 워밍업 실패")
+        self._finish(started, errors)
+
+    def _finish(self, started, errors):
+        self.warmup_seconds = time.perf_counter() - started
+        metrics.gauge("warmup_seconds", "워밍업에 걸린 시간", stage="whisper").set(self.warmup_seconds)
+        if errors:
+            self.error = "; ".join(errors)
+            self.status = f"음성 인식 엔진 워밍업 실패 - 첫 자막이 느릴 수 있습니다 ({self.error})"
+            log.warning(f"⚠️ {self.status}")
+        else:
+            self.status = f"음성 인식 엔진 준비 완료 ({self.warmup_seconds:.1f}초)"
+            log.info(f"🔥 {self.status}")
+        self._done.set()
+
+    @property
+    def finished(self):
+        """워밍업이 성공이든 실패든 끝났는지"""
+        return self._done.is_set()
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self.error is None
+
+    def wait(self, timeout=None):
+        self.start()
+        return self._done.wait(timeout)
+
+
+whisper_warmup = WhisperWarmup()
+
+
+def warm_up_whisper(slot, seconds=WARMUP_AUDIO_SECONDS, translate=False):
+    """slot의 Whisper 엔진에 무음을 한 번 인식시킵니다 - 엔진을 못 띄우거나 인식이 실패하면 예외"""
+    silence = np.zeros(int(seconds * RATE), dtype=np.float32)
+    if WHISPER_ENGINE == "server":
+        worker = get_whisper_worker(slot)
+        if worker is not None:
+            worker.transcribe(silence, translate=translate)
+            return
+    run_whisper_cli(silence, translate=translate, strict=True)
+
+
+def warmup_status():
+    """(워밍업이 끝났는지, 상태 문구) - 번역 모델과 Whisper 엔진 워밍업이 모두 끝나야 첫 구간도 빠름
+
+    워밍업이 실패해도 끝난 것으로 보지만 "준비 완료" 대신 첫 자막이 느릴 수 있다고 알립니다.
+    """
+    if translation_model.error is not None:
+        return False, f"⚠️ {translation_model.status}"
+    if not translation_model.ready:
+        return False, f"⏳ [{translation_model.progress}%] {translation_model.status}"
+    if not whisper_warmup.finished:
+        return False, f"⏳ {whisper_warmup.status}"
+    failures = [status for failed, status in ((translation_model.warmup_error is not None, "번역 모델"),
+                                              (whisper_warmup.error is not None, "음성 인식 엔진")) if failed]
+    if failures:
+        return True, f"⚠️ {'/'.join(failures)} 워밍업 실패 - 첫 자막이 느릴 수 있습니다"
+    return True, "🎧 자막 준비 완료"
+
+# ========== 음성 구간 검출 (VAD) ==========
+class EnergyVAD:
+    """프레임 에너지와 영교차율(ZCR)로 음성 여부를 판정하는 벡터화된 VAD
+
+    잡음 바닥(noise floor)은 음성이 아닌 프레임의 에너지로 천천히 따라가므로
+    배경 소음이 있는 환경에서도 임계값이 자동으로 맞춰집니다.
+    """
+    def __init__(self, threshold_db=VAD_ENERGY_THRESHOLD_DB, margin_db=VAD_NOISE_MARGIN_DB,
+                 zcr_max=VAD_ZCR_MAX):
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.zcr_max = zcr_max
+        self.noise_floor_db = threshold_db - margin_db
+
+    def is_speech(self, frames):
+        """(프레임 수, 프레임 길이) 배열을 받아 프레임별 음성 여부 bool 배열을 반환합니다"""
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        threshold = max(self.threshold_db, self.noise_floor_db + self.margin_db)
+        loud = energy_db > threshold
+        # 치찰음/잡음처럼 ZCR이 높은 프레임은 에너지가 충분히 클 때만 음성으로 인정
+        speech = loud & ((zcr < self.zcr_max) | (energy_db > threshold + self.margin_db))
+        quiet = energy_db[~speech]
+        if quiet.size:
+            self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * float(np.median(quiet))
+        return speech
+
+
+class WebRtcVAD:
+    """webrtcvad(GMM 기반) 모델로 음성 여부를 판정합니다 - pip install webrtcvad"""
+    def __init__(self, aggressiveness=VAD_WEBRTC_AGGRESSIVENESS):
+        import webrtcvad
+        self._vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frames):
+        pcm = (np.clip(frames, -1.0, 1.0) * 32767).astype(np.int16)
+        return np.array([self._vad.is_speech(frame.tobytes(), RATE) for frame in pcm], dtype=bool)
+
+
+def create_vad(mode=VAD_MODE):
+    """설정된 모드의 VAD를 만듭니다 - 모델 기반 VAD를 쓸 수 없으면 에너지 VAD로 대체"""
+    if mode == "webrtc":
+        try:
+            return WebRtcVAD()
+        except ImportError:
+            log.warning("⚠️ webrtcvad 라이브러리가 없어 에너지 기반 VAD를 사용합니다.")
+    return EnergyVAD()
+
+
+class SpeechSegmenter:
+    """VAD 판정을 바탕으로 가변 길이 발화 구간(start, end)을 잘라냅니다
+
+    - min_speech: 음성 프레임 합계가 이보다 짧으면 (클릭음 등) 버림
+    - max_segment: 발화가 이보다 길어지면 강제로 잘라서 내보냄
+    - hangover: 음성이 끊긴 뒤 이만큼 조용해야 발화 종료로 판단
+    - pre_roll: 발화 시작 앞쪽을 이만큼 더 포함해 첫 음절이 잘리지 않게 함
+    위치는 모두 링 버퍼 기준 절대 샘플 위치입니다.
+    """
+    def __init__(self, vad, frame_ms=VAD_FRAME_MS, min_speech=VAD_MIN_SPEECH_SECONDS,
+                 max_segment=VAD_MAX_SEGMENT_SECONDS, hangover=VAD_HANGOVER_SECONDS,
+                 pre_roll=VAD_PRE_ROLL_SECONDS):
+        self.vad = vad
+        self.frame_len = int(RATE * frame_ms / 1000)
+        self.min_speech = int(min_speech * RATE)
+        self.max_segment = int(max_segment * RATE)
+        self.hangover = int(hangover * RATE)
+        self.pre_roll = int(pre_roll * RATE)
+        self.reset(0)
+
+    def reset(self, position):
+        """position부터 새로 시작합니다 (오디오가 끊겼을 때)"""
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pending_pos = position
+        self._in_speech = False
+        self._seg_start = 0
+        self._last_speech_end = 0
+        self._speech_samples = 0
+
+    def feed(self, start, samples):
+        """start 위치에서 시작하는 새 샘플을 넣고 완성된 발화 구간 목록을 반환합니다"""
+        if start != self._pending_pos + len(self._pending):
+            self.reset(start)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+            start = self._pending_pos
+        n_frames = len(samples) // self.frame_len
+        used = n_frames * self.frame_len
+        self._pending = samples[used:].copy()
+        self._pending_pos = start + used
+        if n_frames == 0:
+            return []
+
+        flags = self.vad.is_speech(samples[:used].reshape(n_frames, self.frame_len))
+        segments = []
+        for i, speech in enumerate(flags):
+            pos = start + i * self.frame_len
+            frame_end = pos + self.frame_len
+            if speech:
+                if not self._in_speech:
+                    self._in_speech = True
+                    self._seg_start = max(0, pos - self.pre_roll)
+                    self._speech_samples = 0
+                self._last_speech_end = frame_end
+                self._speech_samples += self.frame_len
+            elif self._in_speech and frame_end - self._last_speech_end >= self.hangover:
+                self._close(self._last_speech_end, segments)
+                continue
+            if self._in_speech and frame_end - self._seg_start >= self.max_segment:
+                self._close(frame_end, segments)
+                if speech:
+                    # 긴 발화는 이어서 다음 구간으로 계속
+                    self._in_speech = True
+                    self._seg_start = frame_end
+                    self._speech_samples = 0
+        return segments
+
+    @property
+    def in_speech(self):
+        return self._in_speech
+
+    @property
+    def speech_start(self):
+        """진행 중인 발화의 시작 위치 (pre-roll 포함)"""
+        return self._seg_start
+
+    def flush(self):
+        """진행 중인 발화를 강제로 마무리합니다"""
+        segments = []
+        if self._in_speech:
+            self._close(self._last_speech_end, segments)
+        return segments
+
+    def _close(self, end, segments):
+        if self._speech_samples >= self.min_speech and end > self._seg_start:
+            segments.append((self._seg_start, end))
+        self._in_speech = False
+        self._speech_samples = 0
+
+
+# ========== 스트리밍 ASR ==========
+def normalize_word(word):
+    """가설 비교용 단어 정규화 - 대소문자와 앞뒤 문장부호 무시"""
+    return word.strip(".,!?;:\"'()[]«»“”‘’…。、？！").casefold()
+
+
+class HypothesisBuffer:
+    """LocalAgreement-2 방식으로 연속된 두 가설이 일치하는 앞부분만 확정합니다
+
+    committed는 아직 디코딩 창 안에 오디오가 남아 있는 확정 단어들이고,
+    previous는 직전 가설 중 아직 확정되지 않은 꼬리(임시 자막)입니다.
+    """
+    def __init__(self):
+        self.committed = []
+        self.previous = []
+
+    def insert(self, words):
+        """새 가설을 넣고 이번에 새로 확정된 단어 목록을 반환합니다"""
+        words = self._strip_committed(words)
+        agreed = []
+        for old, new in zip(self.previous, words):
+            if normalize_word(old) != normalize_word(new):
+                break
+            agreed.append(new)
+        self.committed.extend(agreed)
+        self.previous = words[len(agreed):]
+        return agreed
+
+    def _strip_committed(self, words):
+        """창 안의 확정 단어가 가설 앞부분에 다시 나오면 잘라냅니다"""
+        committed = [normalize_word(w) for w in self.committed]
+        normalized = [normalize_word(w) for w in words]
+        for k in range(min(len(committed), len(words)), 0, -1):
+            if normalized[:k] == committed[-k:]:
+                return words[k:]
+        return words
+
+    def provisional(self):
+        return " ".join(self.previous)
+
+    def drop_committed(self, count):
+        """창 앞부분이 잘려 나갈 때 그 구간의 확정 단어를 비웁니다"""
+        self.committed = self.committed[count:]
+
+    def flush(self):
+        """발화가 끝났을 때 남은 가설을 모두 확정하고 비웁니다"""
+        words = self.previous
+        self.committed = []
+        self.previous = []
+        return words
+
+
+class StreamingTranscriber:
+    """링 버퍼의 커지는 창을 반복해서 다시 디코딩하고 합의된 앞부분만 확정합니다
+
+    확정된 텍스트가 whisper 세그먼트 하나를 완전히 덮으면 그 세그먼트 끝까지
+    창을 잘라내고, 잘라낸 텍스트는 다음 디코딩의 prompt로 넘겨 문맥을 유지합니다.
+    """
+    def __init__(self, ring, slot=0, max_window=STREAMING_MAX_WINDOW_SECONDS):
+        self.ring = ring
+        self.slot = slot
+        self.max_window = int(max_window * RATE)
+        self.buffer = HypothesisBuffer()
+        self.context = deque(maxlen=STREAMING_PROMPT_WORDS)
+        self.window_start = 0
+        self.translate = whisper_should_translate()
+        self.language = None  # 마지막 디코딩에서 whisper가 감지한 언어
+
+    def reset(self, position):
+        """position부터 새 창을 시작합니다 (미확정 가설은 버림)"""
+        self.buffer = HypothesisBuffer()
+        self.window_start = position
+
+    def pending(self):
+        return bool(self.buffer.previous)
+
+    def _decode(self, end):
+        start, audio = self.ring.read(self.window_start, end - self.window_start)
+        self.window_start = start
+        prompt = " ".join(self.context) or None
+        result = transcribe_audio(audio, self.slot, prompt=prompt, translate=self.translate)
+        self.language = result.get("language") or self.language
+        return result
+
+    def process(self, end):
+        """[window_start, end) 구간을 디코딩해 (새로 확정된 단어, 임시 꼬리)를 반환합니다"""
+        result = self._decode(end)
+        committed = self.buffer.insert(result["text"].split())
+        self.context.extend(committed)
+        self._trim(result["segments"])
+        if end - self.window_start > self.max_window:
+            # 세그먼트 경계를 못 찾고 창이 너무 커지면 전부 확정하고 새로 시작
+            flushed = self.buffer.flush()
+            self.context.extend(flushed)
+            committed = committed + flushed
+            self.window_start = end
+        return committed, self.buffer.provisional()
+
+    def finish(self, end):
+        """발화 끝까지 마지막으로 디코딩하고 남은 단어를 모두 확정합니다"""
+        committed = []
+        if end > self.window_start:
+            result = self._decode(end)
+            committed = self.buffer.insert(result["text"].split())
+        committed = committed + self.buffer.flush()
+        self.context.extend(committed)
+        self.window_start = end
+        return committed
+
+    def _trim(self, segments):
+        covered = 0
+        trim_to = None
+        for seg in segments:
+            count = len(seg.get("text", "").split())
+            if covered + count > len(self.buffer.committed):
+                break
+            covered += count
+            trim_to = seg.get("end")
+        if trim_to:
+            self.window_start += int(float(trim_to) * RATE)
+            self.buffer.drop_committed(covered)
+
+
+# ========== 파이프라인 ==========
+class DropOldestQueue:
+    """크기가 제한된 큐 - 가득 차면 가장 오래된 항목을 버려 항상 최신 데이터를 유지합니다"""
+    def __init__(self, maxsize, name=""):
+        self.maxsize = max(1, int(maxsize))
+        self.name = name
+        self.dropped = 0
+        self.closed = False
+        self._items = deque()
+        self._cond = Condition()
+        self._dropped_counter = metrics.counter("pipeline_queue_dropped_total", "가득 차서 버려진 구간 수", queue=name)
+        metrics.gauge("pipeline_queue_depth", "큐에 대기 중인 구간 수", fn=self.__len__, queue=name)
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+                self._dropped_counter.inc()
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """항목 하나를 꺼냅니다 - 시간 초과나 close() 후에는 None"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self.closed, timeout):
+                return None
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class FairQueue(DropOldestQueue):
+    """입력 소스별로 따로 쌓고 소스를 돌아가며 꺼내는 큐
+
+    소스마다 maxsize까지 보관하고 넘치면 그 소스의 가장 오래된 항목만 버리므로
+    말이 많은 소스가 다른 소스의 구간을 밀어내거나 워커를 독차지하지 못합니다.
+    """
+    def __init__(self, maxsize, name="", key=lambda item: item.source):
+        self._queues = OrderedDict()  # 소스 -> deque, 앞쪽 소스가 다음 차례
+        self._size = 0
+        self._key = key
+        super().__init__(maxsize, name)
+
+    def put(self, item):
+        with self._cond:
+            items = self._queues.setdefault(self._key(item), deque())
+            if len(items) >= self.maxsize:
+                items.popleft()
+                self._size -= 1
+                self.dropped += 1
+                self._dropped_counter.inc()
+            items.append(item)
+            self._size += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._size or self.closed, timeout):
+                return None
+            for key, items in self._queues.items():
+                if items:
+                    self._queues.move_to_end(key)  # 방금 꺼낸 소스는 맨 뒤 차례로
+                    self._size -= 1
+                    return items.popleft()
+            return None
+
+    def take(self, key, accept):
+        """key 소스에 쌓인 항목을 오래된 것부터 accept가 참인 동안 기다리지 않고 꺼냅니다"""
+        taken = []
+        with self._cond:
+            items = self._queues.get(key)
+            while items and accept(items[0]):
+                taken.append(items.popleft())
+                self._size -= 1
+        return taken
+
+    def __len__(self):
+        return self._size
+
+
+class CaptureSource:
+    """파이프라인 입력 하나 - 링 버퍼를 가진 캡처 엔진과 자막에 붙일 이름"""
+    def __init__(self, engine, label=None):
+        self.engine = engine
+        self.label = label
+        self.transcriber = None  # 스트리밍 모드에서 이 소스의 StreamingTranscriber
+        self.epoch = time.time() - engine.ring.write_pos / RATE  # 링 버퍼 위치 0의 벽시계 시각
+
+
+class Segment:
+    """파이프라인 단계 사이를 흘러가는 오디오 구간과 그 처리 결과"""
+    def __init__(self, seq, start, end, audio):
+        self.seq = seq
+        self.start = start  # 링 버퍼 기준 절대 샘플 위치
+        self.end = end
+        self.audio = audio
+        self.kind = "final"     # "final": 독립 구간, "committed": 스트리밍 확정분, "partial": 임시 꼬리
+        self.text = ""
+        self.provisional = ""
+        self.src_lang = None
+        self.tgt_lang = None       # 주 트랙 (targets[0])
+        self.targets = []          # 만들 자막 트랙의 대상 언어들
+        self.translated = ""       # 주 트랙 자막
+        self.translations = {}     # 대상 언어 -> 자막
+        self.route = None          # "whisper" | "m2m100" | "passthrough" | "untranslated" (원문 언어 모름)
+        self.asr_segments = []     # whisper 세그먼트 타임스탬프 (audio 기준 초)
+        self.source = None         # 이 구간을 만든 CaptureSource
+        self.error = None
+        self.timings = {"captured": time.monotonic()}
+
+    def mark(self, stage):
+        self.timings[stage] = time.monotonic()
+
+    def set_translation(self, target_lang, text):
+        self.translations[target_lang] = text
+        if target_lang == self.tgt_lang:
+            self.translated = text
+
+
+def format_tracks(tracks, targets):
+    """오버레이에 보여줄 자막 - 트랙이 여럿이면 "KO: …" 줄을 대상 언어 순서대로 하나씩"""
+    if len(targets) <= 1:
+        return next(iter(tracks.values()), "")
+    return "\n".join(f"{tgt.upper()}: {tracks.get(tgt, '')}" for tgt in targets)
+
+
+class LatencyScheduler:
+    """ASR/번역 처리 시간을 온라인으로 재서 자막 지연이 LATENCY_BUDGET_SECONDS 안에 들도록 조절합니다
+
+    예산은 구간의 첫 소리부터 자막이 뜰 때까지이므로 창 길이 자체도 예산에 들어갑니다.
+    ASR 시간은 "호출당 고정 비용 + RTF × 오디오 길이"로, 번역 시간은 구간당 평균으로
+    지수 가중 이동 평균을 유지합니다. 이를 바탕으로
+    - window_seconds(): 고정 창 모드의 창 길이 / VAD 모드의 발화 최대 길이를 정합니다.
+      창 + ASR + 번역이 예산 안에 드는 가장 긴 길이, 즉 (예산 - 고정 비용 - 번역) / (1 + RTF)로
+      하되 처리량이 입력을 따라갈 수 있는 길이 아래로는 줄이지 않습니다.
+    - plan(segment, queue): ASR 직전 구간이 예산을 넘길 것 같으면 같은 소스의 대기 구간을
+      한 번의 호출로 합치고(고정 비용 절약), 대기만으로 예산을 크게 넘긴 구간은 버립니다.
+    결정은 scheduler_* 지표와 로그로 남기고 snapshot()으로 확인할 수 있습니다.
+    """
+    def __init__(self, budget=LATENCY_BUDGET_SECONDS, asr_workers=ASR_WORKERS, alpha=SCHEDULER_EWMA_ALPHA):
+        self.budget = budget
+        self.asr_workers = max(1, asr_workers)
+        self.alpha = alpha
+        self.asr_overhead = None  # ASR 호출당 고정 비용(초)
+        self.asr_rtf = None       # 오디오 1초당 ASR 시간(초)
+        self.translation_seconds = 0.0
+        self.merged = 0
+        self.skipped = 0
+        self.decisions = deque(maxlen=50)
+        self._windows = {}  # 기본 창 길이 -> 마지막으로 정한 창 길이
+        self._logged = {}   # 기본 창 길이 -> 마지막으로 로그에 남긴 창 길이
+        # 지수 가중 최소제곱 누적값 (가중치 합, Σx, Σy, Σx², Σxy)
+        self._n = self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        return self.budget > 0
+
+    def observe_asr(self, audio_seconds, seconds):
+        """ASR 호출 하나의 (오디오 길이, 걸린 시간)으로 고정 비용과 RTF를 갱신합니다"""
+        if audio_seconds <= 0:
+            return
+        decay = 1.0 - self.alpha
+        with self._lock:
+            self._n = self._n * decay + 1.0
+            self._sx = self._sx * decay + audio_seconds
+            self._sy = self._sy * decay + seconds
+            self._sxx = self._sxx * decay + audio_seconds * audio_seconds
+            self._sxy = self._sxy * decay + audio_seconds * seconds
+            variance = self._n * self._sxx - self._sx * self._sx
+            slope = (self._n * self._sxy - self._sx * self._sy) / variance if variance > 1e-6 * self._n * self._n else None
+            if slope is None or slope < 0:
+                # 길이가 거의 같은 구간만 봤으면 고정 비용과 RTF를 나눌 수 없으므로 전부 RTF로 봄
+                self.asr_rtf, self.asr_overhead = self._sy / self._sx, 0.0
+            else:
+                self.asr_rtf = slope
+                self.asr_overhead = max(0.0, (self._sy - slope * self._sx) / self._n)
+        metrics.gauge("scheduler_asr_rtf", "스케줄러가 추정한 ASR 실시간 배율").set(self.asr_rtf)
+        metrics.gauge("scheduler_asr_overhead_seconds", "스케줄러가 추정한 ASR 호출당 고정 비용").set(self.asr_overhead)
+
+    def observe_translation(self, seconds):
+        with self._lock:
+            self.translation_seconds += self.alpha * (seconds - self.translation_seconds)
+        metrics.gauge("scheduler_translation_seconds", "스케줄러가 추정한 구간당 번역 시간").set(self.translation_seconds)
+
+    def expected_asr(self, audio_seconds):
+        if self.asr_rtf is None:
+            return 0.0
+        return self.asr_overhead + self.asr_rtf * audio_seconds
+
+    def window_seconds(self, default, upper=SCHEDULER_MAX_WINDOW_SECONDS):
+        """다음 창(또는 발화 최대 길이)을 몇 초로 할지 - 측정 전에는 default"""
+        if not self.enabled or self.asr_rtf is None:
+            return default
+        lower = SCHEDULER_MIN_WINDOW_SECONDS
+        # 예산: 창 자체 + 그 창의 ASR + 번역이 예산 안에 끝나는 가장 긴 창
+        room = self.budget - self.asr_overhead - self.translation_seconds
+        fit = room / (1.0 + self.asr_rtf)
+        # 처리량: 워커들이 입력을 따라잡으려면 창 하나의 ASR 시간이 (창 × 워커 수)보다 짧아야 함
+        steady = self.asr_overhead / (self.asr_workers - self.asr_rtf) if self.asr_rtf < self.asr_workers else upper
+        window = min(upper, max(lower, fit, steady * 1.2))
+        previous = self._logged.get(default)
+        self._windows[default] = window
+        if previous is None or abs(window - previous) > 0.2 * previous:
+            self._logged[default] = window
+            over = " - 예산 안에 들 수 없어 처리량 우선" if steady * 1.2 > fit else ""
+            self._decide("window", f"창 {window:.1f}초 (ASR RTF {self.asr_rtf:.2f}, 고정 비용 "
+                         f"{self.asr_overhead:.2f}초, 번역 {self.translation_seconds:.2f}초){over}")
+        metrics.gauge("scheduler_window_seconds", "스케줄러가 정한 창/발화 최대 길이").set(window)
+        return window
+
+    def plan(self, segment, queue):
+        """ASR 직전 구간을 어떻게 처리할지 - 인식할 구간 목록을 돌려줍니다 (버린 구간은 빠짐)
+
+        같은 소스의 대기 구간을 queue에서 더 꺼낼 수 있으며, 여럿을 돌려주면 호출자가 하나로 합칩니다.
+        """
+        if not self.enabled:
+            return [segment]
+        now = time.monotonic()
+        age = now - segment.timings["captured"]
+        duration = (segment.end - segment.start) / RATE
+        if duration + age + self.expected_asr(duration) + self.translation_seconds <= self.budget:
+            return [segment]
+        # 밀림 - 같은 소스에서 뒤에 기다리는 구간을 합칠 수 있는 만큼 꺼냄
+        group = [segment]
+        for queued in queue.take(segment.source, lambda item: (item.end - segment.start) / RATE <= SCHEDULER_MERGE_MAX_SECONDS):
+            group.append(queued)
+        # 대기만으로 예산을 크게 넘긴 구간은 버림 - 가장 새 구간은 남겨서 자막이 다시 따라오게 함
+        stale = [item for item in group[:-1] if now - item.timings["captured"] > self.budget * SCHEDULER_SKIP_FACTOR]
+        if stale:
+            self.skipped += len(stale)
+            metrics.counter("scheduler_skipped_total", "지연 예산을 넘겨 버린 구간 수").inc(len(stale))
+            self._decide("skip", f"구간 {len(stale)}개 버림 (최대 {age:.1f}초 대기)")
+            group = [item for item in group if item not in stale]
+        if len(group) > 1:
+            self.merged += len(group) - 1
+            metrics.counter("scheduler_merged_total", "밀려서 앞 구간과 합쳐 인식한 구간 수").inc(len(group) - 1)
+            span = (group[-1].end - group[0].start) / RATE
+            self._decide("merge", f"구간 {len(group)}개를 {span:.1f}초 하나로 합쳐 인식")
+        return group
+
+    def _decide(self, kind, detail):
+        self.decisions.append({"time": round(time.time(), 3), "kind": kind, "detail": detail})
+        log.info(f"🎛️ 스케줄러: {detail}")
+
+    def snapshot(self):
+        """현재 추정값과 최근 결정 - 벤치마크 보고용"""
+        def rounded(value):
+            return round(value, 4) if value is not None else None
+        return {
+            "budget_seconds": self.budget,
+            "asr_rtf": rounded(self.asr_rtf),
+            "asr_overhead_seconds": rounded(self.asr_overhead),
+            "translation_seconds": rounded(self.translation_seconds),
+            "windows": {str(default): round(window, 3) for default, window in self._windows.items()},
+            "merged": self.merged,
+            "skipped": self.skipped,
+            "decisions": list(self.decisions),
+        }
+
+
+class SubtitlePipeline:
+    """캡처 → ASR → 번역 → UI 단계를 bounded 큐로 연결해 서로 겹쳐서 실행합니다
+
+    각 큐는 PIPELINE_QUEUE_DEPTHS 깊이를 넘으면 가장 오래된 구간을 버리고,
+    UI 단계는 이미 표시한 것보다 오래된 결과를 무시하므로
+    자막에는 항상 가장 최신 결과가 표시됩니다.
+
+    sources에 CaptureSource를 여러 개 주면 소스마다 캡처/VAD 스레드를 따로 돌리고
+    ASR/번역 워커는 함께 씁니다. ASR/번역 큐는 소스를 돌아가며 꺼내고(FairQueue),
+    자막은 소스 이름을 붙여 내보냅니다. 캡처 엔진 하나를 그대로 줘도 됩니다.
+    """
+    def __init__(self, sources, update_fn, asr_workers=ASR_WORKERS,
+                 translation_workers=TRANSLATION_WORKERS, depths=None, on_segment=None, start_pos=None,
+                 latency_budget=None):
+        depths = dict(PIPELINE_QUEUE_DEPTHS, **(depths or {}))
+        if not isinstance(sources, (list, tuple)):
+            sources = [CaptureSource(sources)]
+        self.sources = list(sources)
+        self.start_pos = start_pos  # None이면 시작 시점의 최신 위치부터 읽음
+        self.update_fn = update_fn
+        self.on_segment = on_segment  # UI 단계에 도착한 모든 구간을 받는 콜백 (측정용)
+        self.busy = 0  # ASR/번역 단계에서 처리 중인 구간 수
+        self._busy_lock = Lock()
+        self.asr_queue = FairQueue(depths["asr"], "asr")
+        self.translate_queue = FairQueue(depths["translate"], "translate")
+        self.ui_queue = DropOldestQueue(depths["ui"] * len(self.sources), "ui")
+        self.running = False
+        self._seq = itertools.count()
+        budget = LATENCY_BUDGET_SECONDS if latency_budget is None else latency_budget
+        self.scheduler = LatencyScheduler(budget, asr_workers=asr_workers)
+        # 공유 메모리 링 버퍼일 때만 ASR을 워커 프로세스로 (스트리밍 모드는 캡처 스레드가 직접 디코딩)
+        use_processes = ASR_MODE != "streaming" and all(hasattr(s.engine.ring, "describe") for s in self.sources)
+        self._asr_processes = [AsrProcess(i) for i in range(asr_workers)] if use_processes else []
+        self._threads = [Thread(target=self._capture_stage, args=(source,), name=f"capture-{i}", daemon=True)
+                         for i, source in enumerate(self.sources)]
+        for i in range(asr_workers):
+            self._threads.append(Thread(target=self._asr_stage, args=(i,), name=f"asr-{i}", daemon=True))
+        for i in range(translation_workers):
+            self._threads.append(Thread(target=self._translate_stage, name=f"translate-{i}", daemon=True))
+        self._threads.append(Thread(target=self._ui_stage, name="ui", daemon=True))
+
+    def start(self):
+        self.running = True
+        for process in self._asr_processes:
+            process.start()
+        if self._asr_processes:
+            whisper_warmup.watch(self._asr_processes)
+        for t in self._threads:
+            t.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        """ASR 워커 프로세스가 모두 엔진을 띄우고 워밍업을 마칠 때까지 기다립니다"""
+        return all(process.ready.wait(timeout) for process in self._asr_processes)
+
+    def _initial_pos(self, source):
+        if self.start_pos is not None:
+            return self.start_pos
+        return source.engine.ring.write_pos
+
+    def _set_busy(self, delta):
+        with self._busy_lock:
+            self.busy += delta
+
+    def idle(self):
+        """큐가 모두 비었고 처리 중인 구간도 없는지"""
+        return self.busy == 0 and not (len(self.asr_queue) or len(self.translate_queue) or len(self.ui_queue))
+
+    def stop(self):
+        self.running = False
+        for q in (self.asr_queue, self.translate_queue, self.ui_queue):
+            q.close()
+        for t in self._threads:
+            if t.is_alive():
+                t.join(timeout=2)
+        for process in self._asr_processes:
+            process.stop()
+
+    def _capture_stage(self, source):
+        if ASR_MODE == "streaming":
+            self._streaming_capture(source)
+        elif VAD_MODE == "off":
+            self._fixed_window_capture(source)
+        else:
+            self._vad_capture(source)
+
+    def _emit(self, source, start, end, audio):
+        metrics.histogram("vad_segment_seconds", "ASR로 넘긴 발화 구간 길이",
+                          buckets=(0.5, 1, 2, 4, 8, 15, 30)).observe((end - start) / RATE)
+        segment = Segment(next(self._seq), start, end, audio)
+        segment.source = source
+        if self._asr_processes:
+            # 워커 프로세스는 공유 메모리에서 직접 읽으므로 서술자만 넘김
+            segment.audio = None
+            segment.descriptor = source.engine.ring.describe(start, end - start, segment.seq)
+        self.asr_queue.put(segment)
+
+    def _merge(self, group):
+        """스케줄러가 고른 같은 소스의 연속 구간들을 링 버퍼의 한 구간으로 합칩니다"""
+        first, last = group[0], group[-1]
+        ring = first.source.engine.ring
+        if self._asr_processes:
+            start = max(first.start, ring.oldest_pos())
+            segment = Segment(last.seq, start, last.end, None)
+            segment.descriptor = ring.describe(start, last.end - start, last.seq)
+        else:
+            start, audio = ring.read(first.start, last.end - first.start)
+            segment = Segment(last.seq, start, start + len(audio), audio)
+        segment.source = first.source
+        segment.timings = dict(first.timings)  # 대기 시간은 가장 오래된 구간 기준
+        return segment
+
+    def _fixed_window_capture(self, source):
+        read_pos = self._initial_pos(source)
+        while self.running:
+            duration = self.scheduler.window_seconds(RECORD_SECONDS)
+            read_pos, audio = capture_audio_with_selected_device(read_pos, duration=duration, engine=source.engine)
+            if audio is None:
+                continue
+            self._emit(source, read_pos - len(audio), read_pos, audio)
+
+    def _vad_capture(self, source):
+        """새로 들어온 오디오를 소스 전용 VAD에 흘려보내고 발화 구간만 ASR로 넘깁니다 - 무음은 버림"""
+        ring = source.engine.ring
+        segmenter = SpeechSegmenter(create_vad())
+        block = int(VAD_BLOCK_SECONDS * RATE)
+        read_pos = self._initial_pos(source)
+        segmenter.reset(read_pos)
+        while self.running:
+            if not ring.wait_for(read_pos + block, timeout=1.0):
+                continue
+            start, audio = ring.read(read_pos, ring.write_pos - read_pos)
+            read_pos = start + len(audio)
+            segmenter.max_segment = int(self.scheduler.window_seconds(
+                VAD_MAX_SEGMENT_SECONDS, upper=VAD_MAX_SEGMENT_SECONDS) * RATE)
+            for seg_start, seg_end in segmenter.feed(start, audio):
+                if self._asr_processes:
+                    seg_start = max(seg_start, ring.oldest_pos())
+                    if seg_end > seg_start:
+                        self._emit(source, seg_start, seg_end, None)
+                    continue
+                actual_start, seg_audio = ring.read(seg_start, seg_end - seg_start)
+                if seg_audio.size:
+                    self._emit(source, actual_start, actual_start + len(seg_audio), seg_audio)
+
+    def _streaming_capture(self, source):
+        """스트리밍 모드 - 캡처 스레드가 커지는 창을 직접 다시 디코딩합니다
+
+        확정된 단어만 번역 단계로 보내고, 임시 꼬리는 바로 UI로 보냅니다.
+        VAD가 발화 종료를 알리면 남은 가설을 모두 확정하고 창을 비웁니다.
+        """
+        ring = source.engine.ring
+        segmenter = SpeechSegmenter(create_vad()) if VAD_MODE != "off" else None
+        transcriber = StreamingTranscriber(ring)
+        source.transcriber = transcriber
+        block = int(VAD_BLOCK_SECONDS * RATE)
+        step = int(STREAMING_STEP_SECONDS * RATE)
+        read_pos = self._initial_pos(source)
+        last_decode = read_pos
+        transcriber.reset(read_pos)
+        if segmenter is not None:
+            segmenter.reset(read_pos)
+        while self.running:
+            if not ring.wait_for(read_pos + block, timeout=1.0):
+                continue
+            start, audio = ring.read(read_pos, ring.write_pos - read_pos)
+            read_pos = start + len(audio)
+            if segmenter is None:
+                in_speech, closed = True, []
+            else:
+                closed = segmenter.feed(start, audio)
+                in_speech = segmenter.in_speech
+            try:
+                if closed:
+                    span = (transcriber.window_start, closed[-1][1])
+                    words = transcriber.finish(closed[-1][1])
+                    self._emit_stream(source, words, "", final=True, span=span)
+                    last_decode = read_pos
+                elif in_speech:
+                    if segmenter is not None and transcriber.window_start < segmenter.speech_start:
+                        transcriber.reset(segmenter.speech_start)
+                    if read_pos - last_decode >= step:
+                        span = (transcriber.window_start, read_pos)
+                        words, tail = transcriber.process(read_pos)
+                        self._emit_stream(source, words, tail, span=span)
+                        last_decode = read_pos
+                elif not transcriber.pending():
+                    transcriber.reset(read_pos)  # 무음 구간은 창에 넣지 않음
+            except Exception as e:
+                log.error(f"❌ 스트리밍 인식 오류: {e}")
+                transcriber.reset(read_pos)
+
+    def _emit_stream(self, source, words, tail, final=False, span=(0, 0)):
+        """span은 확정 단어가 나온 디코딩 창 (start, end) - 자막 기록의 시각으로 씁니다"""
+        if words:
+            segment = Segment(next(self._seq), span[0], span[1], None)
+            segment.source = source
+            segment.kind = "committed"
+            segment.text = " ".join(words)
+            segment.final = final
+            segment.mark("asr")
+            transcriber = source.transcriber
+            result = {"language": transcriber.language}
+            if route_transcription(segment, result, transcriber.translate):
+                self.translate_queue.put(segment)
+            else:
+                self.ui_queue.put(segment)
+        partial = Segment(next(self._seq), 0, 0, None)
+        partial.kind = "partial"
+        partial.provisional = tail
+        partial.source = source
+        self.ui_queue.put(partial)
+
+    def _asr_stage(self, slot):
+        while self.running:
+            segment = self.asr_queue.get(timeout=0.5)
+            if segment is None:
+                continue
+            self._set_busy(1)
+            group = self.scheduler.plan(segment, self.asr_queue)
+            segment = self._merge(group) if len(group) > 1 else group[0]
+            segment.mark("asr_start")
+            needs_translation = False
+            result = None
+            try:
+                translate = whisper_should_translate()
+                if self._asr_processes:
+                    result = self._asr_processes[slot].transcribe(segment.descriptor, translate=translate)
+                else:
+                    result = transcribe_audio(segment.audio, slot, translate=translate)
+                if result is not None:
+                    elapsed = time.monotonic() - segment.timings["asr_start"]
+                    metrics.histogram("asr_latency_seconds", "구간 하나의 음성 인식 시간").observe(elapsed)
+                    self.scheduler.observe_asr((segment.end - segment.start) / RATE, elapsed)
+                    segment.text = result["text"]
+                    segment.asr_segments = result["segments"]
+                    if segment.text:
+                        needs_translation = route_transcription(segment, result, translate)
+            except Exception as e:
+                log.error(f"❌ 음성 인식 단계 오류: {e}")
+                segment.error = e
+            segment.mark("asr")
+            segment.audio = None
+            if result is None and segment.error is None:
+                # 워커 프로세스가 읽기 전에 캡처가 구간을 덮어씀 - 이미 너무 늦은 구간이므로 버림
+                metrics.counter("asr_overwritten_segments_total", "워커가 읽기 전에 덮어써져 버린 구간 수").inc()
+                log.warning(f"⚠️ 구간 {segment.seq}이 인식 전에 덮어써져 버립니다")
+            elif needs_translation and segment.error is None:
+                self.translate_queue.put(segment)
+            else:
+                self.ui_queue.put(segment)
+            self._set_busy(-1)
+
+    def _translate_stage(self):
+        while self.running:
+            segment = self.translate_queue.get(timeout=0.5)
+            if segment is None:
+                continue
+            self._set_busy(1)
+            segment.mark("translate_start")
             try:
-                data = stream.read(CHUNK)
-                frames.append(data)
-                if i % 10 == 0:  # 10개 청크마다 진행상황 출력
-                    progress = (i / total_chunks) * 100
-                    print(f"📊 녹음 진행률: {progress:.1f}% ({i}/{total_chunks})")
+                if segment.src_lang is None:
+                    segment.src_lang = detect_language(segment.text)
+                if not segment.targets:
+                    segment.targets = target_languages_for(segment.src_lang)
+                    segment.tgt_lang = segment.targets[0]
+                missing = [tgt for tgt in segment.targets if tgt not in segment.translations]
+                if missing:
+                    for tgt, text in translate_text_multi(segment.text, segment.src_lang, missing).items():
+                        segment.set_translation(tgt, text)
+                    elapsed = time.monotonic() - segment.timings["translate_start"]
+                    metrics.histogram("translation_latency_seconds", "구간 하나의 번역 시간 (캐시/배칭 포함)").observe(elapsed)
+                    self.scheduler.observe_translation(elapsed)
             except Exception as e:
-                print(f"❌ 청크 {i} 읽기 실패: {e}")
+                log.error(f"❌ 번역 단계 오류: {e}")
+                segment.error = e
+            segment.mark("translate")
+            self.ui_queue.put(segment)
+            self._set_busy(-1)
+
+    def _ui_stage(self):
+        # 소스마다 안정 자막/임시 꼬리/순서 상태를 따로 유지
+        states = {}
+        while self.running:
+            segment = self.ui_queue.get(timeout=0.5)
+            if segment is None:
+                continue
+            segment.mark("ui")
+            if segment.kind != "partial":
+                metrics.counter("segments_total", "UI까지 도착한 구간 수", route=segment.route or "none").inc()
+                metrics.histogram("subtitle_delay_seconds", "구간 생성부터 UI 도착까지 걸린 시간").observe(
+                    segment.timings["ui"] - segment.timings["captured"])
+            if self.on_segment is not None:
+                self.on_segment(segment)
+            state = states.setdefault(segment.source, {
+                "tracks": {}, "targets": [], "message": "", "provisional": "", "new_utterance": False,
+                "last_partial_seq": -1, "last_shown_seq": -1,
+            })
+            tracks = state["tracks"]
+            if segment.kind == "partial":
+                if segment.seq < state["last_partial_seq"]:
+                    continue
+                state["last_partial_seq"] = segment.seq
+                state["provisional"] = segment.provisional
+            elif segment.kind == "committed":
+                # 확정분은 순서와 무관하게 한 번만 번역해서 트랙마다 안정 자막 뒤에 이어 붙임
+                if segment.error is None and segment.translated:
+                    if state["new_utterance"]:
+                        tracks.clear()
+                    for tgt, text in segment.translations.items():
+                        tracks[tgt] = f"{tracks.get(tgt, '')} {text}".strip()[-STREAMING_STABLE_CHARS:]
+                    state["targets"] = segment.targets
+                    state["message"] = ""
+                state["new_utterance"] = getattr(segment, "final", False)
+            else:
+                if segment.seq < state["last_shown_seq"]:
+                    continue  # 더 최신 결과가 이미 표시됨
+                state["last_shown_seq"] = segment.seq
+                if segment.error is not None:
+                    state["message"] = "⚠️ 오류가 발생했습니다..."
+                elif segment.text:
+                    tracks.clear()
+                    tracks.update(segment.translations)
+                    state["targets"] = segment.targets
+                    state["message"] = ""
+                    log.debug("🌐 번역 결과: %s", segment.translations)
+                else:
+                    state["message"] = "🎧 음성을 인식하지 못했습니다..."
+            stable = state["message"] or format_tracks(tracks, state["targets"])
+            label = segment.source.label if segment.source is not None else None
+            if label and len(self.sources) > 1:
+                stable = f"[{label}] {stable}"
+            self.update_fn(stable, state["provisional"])
+
+
+def speech_loop(update_fn, app_instance, on_segment=None):
+    """app_instance.running이 참인 동안 파이프라인을 돌립니다 - on_segment는 자막 기록과 함께 불림"""
+    global subtitle_log
+    log.info("🎬 실시간 자막 루프 시작")
+    sources = start_capture_sources()
+    if not sources:
+        update_fn("❌ 오디오 장치를 열 수 없습니다.")
+        return
+    if SUBTITLE_LOG_DIR:
+        try:
+            subtitle_log = SubtitleLog(SUBTITLE_LOG_DIR, SUBTITLE_LOG_FORMATS,
+                                       epoch=min(source.epoch for source in sources), tracks=TARGET_LANGUAGES)
+            log.info(f"📝 자막 기록: {', '.join(subtitle_log.paths.values())}")
+        except OSError as e:
+            log.warning(f"⚠️ 자막 기록 파일을 열 수 없습니다: {e}")
+    handlers = [handler for handler in (subtitle_log.append if subtitle_log is not None else None, on_segment)
+                if handler is not None]
+
+    def dispatch(segment):
+        for handler in handlers:
+            handler(segment)
+
+    pipeline = SubtitlePipeline(sources, update_fn, on_segment=dispatch if handlers else None).start()
+    try:
+        while app_instance.running:
+            time.sleep(0.2)
+    finally:
+        pipeline.stop()
+        stop_capture_engine()
+        stop_whisper_worker()
+        if translation_batcher is not None:
+            translation_batcher.stop()
+        translation_cache.save()
+        if subtitle_log is not None:
+            subtitle_log.close()
+    log.info(f"📊 번역 캐시: {translation_cache.stats()}")
+    log.info("🛑 음성 인식 루프 종료")
+
+# ========== 자막 기록 ==========
+def subtitle_entry(segment, epoch):
+    """확정된 구간을 기록/전송용 딕셔너리로 바꿉니다 - 시각은 epoch(세션 시작) 기준 초
+
+    whisper의 translate 작업으로 바로 영어 자막을 얻은 구간(route "whisper")은 원문 인식 결과가
+    남지 않으므로 text를 None으로, translated_only를 True로 기록합니다 (영어를 원문으로 적지 않음).
+    """
+    source = segment.source
+    translated_only = segment.route == "whisper"
+    # 소스마다 링 버퍼 시작 시각이 다르므로 기록의 epoch 기준으로 맞춤
+    offset = source.epoch - epoch if source is not None else 0.0
+    return {
+        "seq": segment.seq,
+        "source": source.label if source is not None else None,
+        "start": round(offset + segment.start / RATE, 3),
+        "end": round(offset + segment.end / RATE, 3),
+        "time": round(epoch + offset + segment.start / RATE, 3),
+        "text": None if translated_only else segment.text,
+        "translated_only": translated_only,
+        "language": segment.src_lang,
+        "translated": segment.translated,
+        "target": segment.tgt_lang,
+        "translations": dict(segment.translations),
+        "route": segment.route,
+    }
+
+
+class SubtitleLog:
+    """확정된 자막을 캡처 시계 기준 타임스탬프와 함께 SRT/VTT/JSONL 파일에 이어 씁니다
+
+    append()는 메모리 큐에 넣기만 하므로 UI 단계를 막지 않습니다. 전용 스레드가
+    flush_seconds마다 쌓인 항목을 한 번에 쓰고, fsync는 fsync_seconds마다 묶어서 합니다.
+    시각은 링 버퍼 샘플 위치 / RATE (세션 시작 기준 초)이고, JSONL에는 벽시계 시각도 남깁니다.
+    최근 history_size개 항목은 오버레이의 기록 창에서 볼 수 있게 메모리에 보관합니다.
+    tracks(대상 언어 목록)를 주면 SRT/VTT는 언어마다 session-….ko.srt 같은 트랙 파일로 나눠 씁니다.
+    """
+    def __init__(self, directory=SUBTITLE_LOG_DIR, formats=SUBTITLE_LOG_FORMATS, epoch=None,
+                 flush_seconds=SUBTITLE_LOG_FLUSH_SECONDS, fsync_seconds=SUBTITLE_LOG_FSYNC_SECONDS,
+                 history_size=SUBTITLE_HISTORY_SIZE, tracks=None):
+        self.epoch = time.time() if epoch is None else epoch  # 샘플 위치 0의 벽시계 시각
+        self.flush_seconds = flush_seconds
+        self.fsync_seconds = fsync_seconds
+        self.count = 0
+        self._history = deque(maxlen=history_size)
+        self._pending = deque()
+        self._cond = Condition()
+        self._running = True
+        self._files = {}
+        unknown = set(formats) - {"srt", "vtt", "jsonl"}
+        if unknown:
+            raise ValueError(f"지원하지 않는 자막 기록 형식: {', '.join(sorted(unknown))}")
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, time.strftime("session-%Y%m%d-%H%M%S", time.localtime(self.epoch)))
+        for fmt in formats:
+            # 키: "jsonl" / 단일 트랙 "srt" / 다중 트랙 ("srt", "ko")
+            keys = [(fmt, tgt) for tgt in tracks] if tracks and len(tracks) > 1 and fmt != "jsonl" else [fmt]
+            for key in keys:
+                suffix = f"{key[1]}.{fmt}" if isinstance(key, tuple) else fmt
+                f = open(f"{stem}.{suffix}", "a", encoding="utf-8", newline="\n", buffering=64 * 1024)
+                if fmt == "vtt" and f.tell() == 0:
+                    f.write("WEBVTT\n\n")
+                self._files[key] = f
+        self.paths = {"-".join(key) if isinstance(key, tuple) else key: f.name for key, f in self._files.items()}
+        self._thread = Thread(target=self._loop, name="subtitle-log", daemon=True)
+        self._thread.start()
+
+    def append(self, segment):
+        """UI 단계에 도착한 구간 중 확정된 자막만 기록합니다 (on_segment 콜백)"""
+        if segment.kind == "partial" or segment.error is not None or not segment.text:
+            return
+        entry = subtitle_entry(segment, self.epoch)
+        with self._cond:
+            if not self._running:
+                return
+            self._history.append(entry)
+            self._pending.append(entry)
+            self._cond.notify()
+
+    def history(self):
+        """최근 자막 항목 목록 (오래된 것부터)"""
+        with self._cond:
+            return list(self._history)
+
+    def _loop(self):
+        last_fsync = time.monotonic()
+        while True:
+            with self._cond:
+                if self._running:
+                    self._cond.wait(self.flush_seconds)
+                batch = list(self._pending)
+                self._pending.clear()
+                running = self._running
+            if batch:
+                self._write(batch)
+            now = time.monotonic()
+            if not running or (batch and now - last_fsync >= self.fsync_seconds):
+                self._sync()
+                last_fsync = now
+            if not running:
+                return
+
+    def _write(self, batch):
+        # ASR 워커가 여럿이면 도착 순서가 섞일 수 있으므로 한 번에 쓰는 묶음 안에서는 시간순 정렬
+        batch.sort(key=lambda entry: entry["start"])
+        started = time.monotonic()
+        try:
+            for entry in batch:
+                self.count += 1
+                for key, f in self._files.items():
+                    if key == "jsonl":
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                        continue
+                    fmt, tgt = key if isinstance(key, tuple) else (key, None)
+                    text = (entry["translations"].get(tgt) if tgt else entry["translated"]) or entry["text"]
+                    if entry["source"]:
+                        text = f"[{entry['source']}] {text}"
+                    if fmt == "srt":
+                        f.write(f"{self.count}\n")
+                    f.write(f"{format_timestamp(entry['start'], fmt)} --> {format_timestamp(entry['end'], fmt)}\n"
+                            f"{text}\n\n")
+            for f in self._files.values():
+                f.flush()
+        except OSError as e:
+            log.warning(f"⚠️ 자막 기록을 쓰지 못했습니다: {e}")
+        metrics.counter("subtitle_log_entries_total", "자막 기록 파일에 쓴 항목 수").inc(len(batch))
+        metrics.histogram("subtitle_log_write_seconds", "자막 기록 묶음 하나를 쓰는 데 걸린 시간").observe(
+            time.monotonic() - started)
+
+    def _sync(self):
+        for f in self._files.values():
+            try:
+                os.fsync(f.fileno())
+            except OSError:
+                pass
+
+    def close(self):
+        """남은 항목을 쓰고 fsync한 뒤 파일을 닫습니다"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+        for f in self._files.values():
+            f.close()
+
+
+# ========== 오프라인 재생 벤치마크 ==========
+def iter_audio_file(path, block_seconds=BATCH_READ_SECONDS):
+    """오디오 파일을 block_seconds씩 읽어 float32 모노 16kHz 블록을 차례로 내보냅니다
+
+    파일 전체를 메모리에 올리지 않으므로 몇 시간짜리 파일도 메모리가 일정합니다.
+    soundfile이 없으면 wave로 16비트 PCM WAV만 읽습니다.
+    """
+    try:
+        import soundfile as sf
+    except ImportError:
+        sf = None
+    if sf is not None:
+        rate = sf.info(path).samplerate
+        blocks = sf.blocks(path, blocksize=int(rate * block_seconds), dtype="float32", always_2d=True)
+    else:
+        def read_wav_blocks(wf, frames):
+            while True:
+                data = wf.readframes(frames)
+                if not data:
+                    return
+                pcm = np.frombuffer(data, dtype="<i2")
+                yield pcm.reshape(-1, wf.getnchannels()).astype(np.float32) / 32768.0
+
+        wf = wave.open(path, "rb")
+        if wf.getsampwidth() != 2:
+            wf.close()
+            raise ValueError(f"soundfile 없이 읽을 수 있는 건 16비트 PCM WAV뿐입니다: {path}")
+        rate = wf.getframerate()
+        blocks = read_wav_blocks(wf, int(rate * block_seconds))
+    resampler = StreamingResampler(rate, RATE)
+    try:
+        for block in blocks:
+            mono = resampler.process(block)
+            if len(mono):
+                yield mono
+    finally:
+        blocks.close()
+        if sf is None:
+            wf.close()
+
+
+def read_audio_file(path):
+    """오디오 파일 전체를 (float32 모노 16kHz 샘플)로 읽습니다 - 짧은 파일용, 긴 파일은 iter_audio_file"""
+    blocks = list(iter_audio_file(path))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+
+class FakeAudioDevice:
+    """WAV 파일들을 실제 캡처 콜백처럼 CHUNK 단위로 링 버퍼에 흘려 넣는 가짜 장치
+
+    speed=1.0이면 실시간, 2.0이면 두 배속, 0이면 기다리지 않고 최대한 빨리 넣습니다.
+    파일 사이에는 gap_seconds만큼 무음을 넣어 VAD가 발화를 마무리하게 합니다.
+    기록 시각을 남겨 두어 자막 지연을 오디오가 '들어온' 시점 기준으로 잴 수 있습니다.
+    loop=True면 stop()할 때까지 파일들을 반복 재생합니다 (헤드리스 서버 시험용, 시각 기록은 생략).
+    """
+    def __init__(self, files, speed=1.0, gap_seconds=1.0, ring_seconds=RING_BUFFER_SECONDS, loop=False):
+        self.files = list(files)
+        self.speed = speed
+        self.loop = loop
+        self.gap = np.zeros(int(gap_seconds * RATE), dtype=np.float32)
+        self.ring = create_ring_buffer(RATE * max(ring_seconds, 1))
+        self.status_errors = 0
+        self.total_samples = 0
+        self.finished = Event()
+        self.running = False
+        self._write_log = []  # (write_pos, monotonic)
+        self._thread = None
+
+    def start(self):
+        self.running = True
+        self._thread = Thread(target=self._run, name="fake-audio", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        started = time.monotonic()
+        while True:
+            for path in self.files:
+                for audio in (read_audio_file(path), self.gap):
+                    for i in range(0, len(audio), CHUNK):
+                        if not self.running:
+                            self.finished.set()
+                            return
+                        block = audio[i:i + CHUNK]
+                        if self.speed > 0:
+                            due = started + (self.total_samples + len(block)) / (RATE * self.speed)
+                            delay = due - time.monotonic()
+                            if delay > 0:
+                                time.sleep(delay)
+                        self.ring.write(block)
+                        self.total_samples += len(block)
+                        if not self.loop:
+                            self._write_log.append((self.ring.write_pos, time.monotonic()))
+            if not self.loop:
                 break
-        
-        print(f"📦 수집된 프레임 수: {len(frames)}")
-        
-        if len(frames) == 0:
-            print("❌ 수집된 오디오 데이터가 없습니다.")
-            stream.stop_stream()
-            stream.close()
-            p.terminate()
-            return None
-        
-        print("✅ 입력 장치 오디오 캡처 완료")
-        
-        # 스트림 정리
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
-        
-        print("💾 WAV 파일로 저장 중...")
-        # WAV 파일로 저장
-        wf = wave.open(filename, 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(p.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
-        wf.close()
-        
-        print(f"✅ WAV 파일 저장 완료: {filename}")
-        return filename
-        
-    except Exception as e:
-        print(f"❌ 입력 장치 오디오 캡처 실패: {e}")
-        import traceback
-        traceback.print_exc()
-        p.terminate()
+        self.finished.set()
+
+    def time_of(self, position):
+        """position 샘플이 링 버퍼에 들어온 시각"""
+        index = bisect.bisect_left(self._write_log, (position, 0.0))
+        if index >= len(self._write_log):
+            return self._write_log[-1][1] if self._write_log else time.monotonic()
+        return self._write_log[index][1]
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.ring.close()
+
+
+def percentiles(values):
+    if not values:
         return None
+    data = np.asarray(values) * 1000.0
+    return {
+        "count": len(values),
+        "p50_ms": round(float(np.percentile(data, 50)), 2),
+        "p95_ms": round(float(np.percentile(data, 95)), 2),
+        "p99_ms": round(float(np.percentile(data, 99)), 2),
+        "max_ms": round(float(data.max()), 2),
+    }
 
-def run_whisper_cpp(audio_path="system_audio.wav"):
-    print(f"🔍 Whisper 실행 중: {WHISPER_EXE}")
-    print(f"📁 오디오 파일: {audio_path}")
-    print(f"📁 모델 파일: {WHISPER_MODEL}")
-    
-    if not os.path.exists(WHISPER_EXE):
-        print(f"❌ Whisper 실행 파일을 찾을 수 없습니다: {WHISPER_EXE}")
-        return ""
-    
-    if not os.path.exists(WHISPER_MODEL):
-        print(f"❌ Whisper 모델 파일을 찾을 수 없습니다: {WHISPER_MODEL}")
-        return ""
-    
-    if not os.path.exists(audio_path):
-        print(f"❌ 오디오 파일을 찾을 수 없습니다: {audio_path}")
-        return ""
-    
+
+def peak_rss_mb():
+    """이 프로세스의 최대 상주 메모리(MB)"""
     try:
-        result = subprocess.run([
-            WHISPER_EXE,
-            "--model", WHISPER_MODEL,
-            "--file", audio_path,
-            "--output-txt",
-            "--output-file", "result"
-        ], capture_output=True, text=True, timeout=30)
-        
-        print(f"✅ Whisper 실행 완료")
-        print(f"📤 출력: {result.stdout}")
-        if result.stderr:
-            print(f"⚠️ 오류: {result.stderr}")
-        
-        result_path = "result.txt"
-        if os.path.exists(result_path):
-            with open(result_path, "r", encoding="utf-8") as f:
-                text = f.read().strip()
-                print(f"📝 인식된 텍스트: {text}")
-                return text
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except ImportError:
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+        except ImportError:
+            return None
+
+
+def run_benchmark(wav_dir, speed=1.0, timeout=None):
+    """디렉터리의 WAV 파일을 실제 파이프라인으로 재생하고 측정 결과 딕셔너리를 반환합니다
+
+    단계별 지연(대기 포함/처리만), 자막 지연(오디오가 들어온 시점 → UI 도착),
+    실시간 배율(RTF), CPU 시간, 최대 RSS를 보고합니다.
+    """
+    files = sorted(os.path.join(wav_dir, name) for name in os.listdir(wav_dir)
+                   if name.lower().endswith((".wav", ".flac", ".ogg")))
+    if not files:
+        raise FileNotFoundError(f"WAV 파일이 없습니다: {wav_dir}")
+
+    translation_model.start()
+    whisper_warmup.start()
+    translation_model.get()  # 모델 로드/워밍업 시간은 측정에서 제외
+    if not ASR_PROCESS_WORKERS:
+        whisper_warmup.wait()
+    if WHISPER_ENGINE == "server":
+        get_whisper_worker(0)
+
+    device = FakeAudioDevice(files, speed=speed)
+    records = []
+    # 최대 속도 재생은 실시간보다 빨리 쌓이므로 지연 예산을 적용하면 구간이 버려짐 - 측정만 함
+    pipeline = SubtitlePipeline(device, lambda text, provisional="": None, on_segment=records.append, start_pos=0,
+                                latency_budget=None if speed else 0)
+    pipeline.start()
+    pipeline.wait_ready(WHISPER_SERVER_START_TIMEOUT)  # 워커 프로세스 기동은 측정에서 제외
+    whisper_warmup.wait(WHISPER_SERVER_START_TIMEOUT)
+    cpu_started = time.process_time()
+    wall_started = time.monotonic()
+    device.start()
+    deadline = None if timeout is None else wall_started + timeout
+    device.finished.wait(timeout)
+    # 마지막 발화가 끝나고 모든 단계가 비워질 때까지 기다림
+    idle_since = None
+    while deadline is None or time.monotonic() < deadline:
+        if pipeline.idle():
+            idle_since = idle_since or time.monotonic()
+            if time.monotonic() - idle_since > VAD_HANGOVER_SECONDS + 0.5:
+                break
         else:
-            print(f"❌ 결과 파일을 찾을 수 없습니다: {result_path}")
-            return ""
-    except subprocess.TimeoutExpired:
-        print("⏰ Whisper 실행 시간 초과")
-        return ""
-    except Exception as e:
-        print(f"❌ Whisper 실행 중 오류: {e}")
-        return ""
+            idle_since = None
+        time.sleep(0.05)
+    wall = time.monotonic() - wall_started
+    cpu = time.process_time() - cpu_started
+    pipeline.stop()
+    device.stop()
+    stop_whisper_worker()
 
-def speech_loop(update_fn, app_instance):
-    print("🎬 실시간 자막 루프 시작")
-    while app_instance.running:
-        try:
-            capture_audio_with_selected_device(duration=RECORD_SECONDS)
-            text = run_whisper_cpp()
-            
-            if not app_instance.running:  # 종료 신호 확인
+    stages = {"asr_wait": [], "asr": [], "translate_wait": [], "translate": [], "ui_wait": []}
+    e2e = []
+    asr_busy = 0.0
+    for seg in records:
+        t = seg.timings
+        if "asr_start" in t:
+            stages["asr_wait"].append(t["asr_start"] - t["captured"])
+            stages["asr"].append(t["asr"] - t["asr_start"])
+            asr_busy += t["asr"] - t["asr_start"]
+        if "translate_start" in t:
+            stages["translate_wait"].append(t["translate_start"] - t["asr"])
+            stages["translate"].append(t["translate"] - t["translate_start"])
+        last = t.get("translate", t.get("asr"))
+        if last is not None:
+            stages["ui_wait"].append(t["ui"] - last)
+        if seg.kind != "partial" and seg.end:
+            e2e.append(t["ui"] - device.time_of(seg.end))
+
+    audio_seconds = device.total_samples / RATE
+    children_cpu = None
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        children_cpu = round(usage.ru_utime + usage.ru_stime, 3)
+    except ImportError:
+        pass
+    return {
+        "files": len(files),
+        "audio_seconds": round(audio_seconds, 3),
+        "speed": speed,
+        "wall_seconds": round(wall, 3),
+        "real_time_factor": round(wall / audio_seconds, 4) if audio_seconds else None,
+        "asr_real_time_factor": round(asr_busy / audio_seconds, 4) if audio_seconds else None,
+        "segments": sum(1 for seg in records if seg.kind != "partial"),
+        "dropped": {q.name: q.dropped for q in (pipeline.asr_queue, pipeline.translate_queue, pipeline.ui_queue)},
+        "capture_overruns": device.ring.overruns,
+        "stages": {name: percentiles(values) for name, values in stages.items()},
+        "subtitle_delay": percentiles(e2e),
+        "first_subtitle_delay_ms": round(e2e[0] * 1000, 1) if e2e else None,
+        "scheduler": pipeline.scheduler.snapshot(),
+        "warmup_seconds": {stage: round(seconds, 3) if seconds is not None else None for stage, seconds in
+                           (("translation", translation_model.warmup_seconds), ("whisper", whisper_warmup.warmup_seconds))},
+        "cpu_seconds": round(cpu, 3),
+        "children_cpu_seconds": children_cpu,
+        "peak_rss_mb": peak_rss_mb(),
+        "metrics": metrics.to_dict(),
+        "config": {
+            "asr_mode": ASR_MODE,
+            "vad_mode": VAD_MODE,
+            "whisper_engine": WHISPER_ENGINE,
+            "whisper_exe": WHISPER_SERVER_EXE if WHISPER_ENGINE == "server" else WHISPER_EXE,
+            # whisper-server를 못 띄워 whisper-cli로 대체됐는지 (워커 프로세스 모드에서는 알 수 없음)
+            "whisper_engine_used": None if pipeline._asr_processes else (
+                "cli" if metrics.counter("whisper_cli_runs_total").value else "server"),
+            "translation_backend": TRANSLATION_BACKEND,
+        },
+    }
+
+
+# ========== 파일 일괄 자막 (SRT/VTT) ==========
+def split_on_silence(blocks):
+    """오디오 블록들을 차례로 SpeechSegmenter에 흘려 (발화 구간 [(start, end)] (샘플 위치), 전체 샘플 수)를 반환합니다"""
+    segmenter = SpeechSegmenter(create_vad())
+    spans = []
+    pos = 0
+    for block in blocks:
+        spans.extend(segmenter.feed(pos, block))
+        pos += len(block)
+    spans.extend(segmenter.flush())
+    return spans, pos
+
+
+def format_timestamp(seconds, fmt="srt"):
+    """초를 SRT(00:00:01,500) 또는 VTT(00:00:01.500) 시각 문자열로 바꿉니다"""
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    sep = "," if fmt == "srt" else "."
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{sep}{millis:03d}"
+
+
+def write_subtitles(cues, path, fmt="srt"):
+    """[(start초, end초, text)] 자막을 SRT/VTT 파일로 씁니다 - 임시 파일에 쓰고 바꿔치기"""
+    lines = ["WEBVTT", ""] if fmt == "vtt" else []
+    for number, (start, end, text) in enumerate(cues, 1):
+        if fmt == "srt":
+            lines.append(str(number))
+        lines.append(f"{format_timestamp(start, fmt)} --> {format_timestamp(end, fmt)}")
+        lines.extend(text.splitlines() or [""])
+        lines.append("")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\n".join(lines))
+    os.replace(tmp_path, path)
+
+
+def translate_texts(texts, source_lang, target_lang, chunk=BATCH_TRANSLATION_CHUNK):
+    """여러 문장을 캐시를 거쳐 chunk개씩 묶어 번역합니다 (중복 문장은 한 번만)"""
+    results = {}
+    misses = []
+    for text in dict.fromkeys(texts):
+        cached = translation_cache.get(text, source_lang, target_lang)
+        if cached is None:
+            misses.append(text)
+        else:
+            results[text] = cached
+    for i in range(0, len(misses), chunk):
+        batch = misses[i:i + chunk]
+        started = time.monotonic()
+        for text, translated in zip(batch, translate_batch(batch, source_lang, target_lang)):
+            translation_cache.put(text, source_lang, target_lang, translated)
+            results[text] = translated
+        metrics.histogram("batch_translation_seconds", "파일 일괄 모드 번역 배치 하나의 시간").observe(
+            time.monotonic() - started)
+    return [results[text] for text in texts]
+
+
+def translate_texts_multi(texts, source_lang, target_langs, chunk=BATCH_TRANSLATION_CHUNK):
+    """translate_texts의 다중 트랙판 - 대상 중 하나라도 캐시에 없는 문장만 모아
+    chunk개씩 인코더를 한 번 돌려 모든 대상으로 번역하고 {대상 언어: 번역 리스트}를 반환합니다"""
+    results = {tgt: {} for tgt in target_langs}
+    misses = []
+    for text in dict.fromkeys(texts):
+        for tgt in target_langs:
+            cached = translation_cache.get(text, source_lang, tgt)
+            if cached is None:
+                misses.append(text)
                 break
-                
-            if text:
-                src_lang = detect_language(text)
-                tgt_lang = "en" if src_lang != "en" else "ko"
-                translated = translate_text(text, src_lang, tgt_lang)
-                display = f"{translated}"
-                print(f"🌐 번역 결과: {display}")
+            results[tgt][text] = cached
+    for i in range(0, len(misses), chunk):
+        batch = misses[i:i + chunk]
+        started = time.monotonic()
+        for tgt, outputs in translate_batch_multi(batch, source_lang, target_langs).items():
+            for text, translated in zip(batch, outputs):
+                translation_cache.put(text, source_lang, tgt, translated)
+                results[tgt][text] = translated
+        metrics.histogram("batch_translation_seconds", "파일 일괄 모드 번역 배치 하나의 시간").observe(
+            time.monotonic() - started)
+    return {tgt: [results[tgt][text] for text in texts] for tgt in target_langs}
+
+
+class BatchTranscriber:
+    """오디오 파일 하나를 무음 기준 구간으로 나눠 여러 상주 Whisper 엔진으로 병렬 인식하고
+    언어 쌍별로 묶어 번역한 뒤 SRT/VTT로 씁니다
+
+    인식은 whisper-server 프로세스 jobs개가 나눠 맡고, 파이썬 쪽 스레드는 요청만 보냅니다.
+    파일은 두 번 블록 단위로 읽습니다 - 한 번은 구간을 나누려고, 한 번은 남은 구간의 오디오를
+    잘라 크기가 정해진 작업 큐로 넘기려고. 그래서 몇 시간짜리 파일도 메모리가 일정합니다.
+    끝난 구간은 출력 경로 옆의 .checkpoint.jsonl에 한 줄씩 기록하므로 중단된 작업을
+    다시 실행하면 남은 구간만 처리합니다. 인식이나 번역이 하나라도 실패하면 체크포인트를 남겨
+    다시 실행할 때 그 부분만 재시도하고, 모두 성공해야 체크포인트를 지웁니다.
+    TARGET_LANGUAGES로 트랙이 여럿이면 언어마다 <이름>.ko.srt 같은 파일을 따로 씁니다.
+    """
+    def __init__(self, path, output=None, fmt="srt", jobs=BATCH_JOBS):
+        self.path = path
+        self.fmt = fmt
+        self.output = output or os.path.splitext(path)[0] + "." + fmt
+        self.checkpoint_path = self.output + ".checkpoint.jsonl"
+        self.outputs = {None: self.output}  # 대상 언어 -> 출력 경로 (None: 단일 트랙)
+        if TARGET_LANGUAGES and len(TARGET_LANGUAGES) > 1:
+            stem = os.path.splitext(self.output)[0]
+            self.outputs = {tgt: f"{stem}.{tgt}.{fmt}" for tgt in TARGET_LANGUAGES}
+        self.jobs = max(1, jobs)
+        self.segments = []
+        self.resumed = 0
+        self.failed = 0               # 인식에 실패한 구간 수
+        self.translation_failed = 0   # 번역에 실패해 원문으로 쓴 구간 수
+        self._tasks = None
+        self._lock = Lock()
+        self._checkpoint = None
+
+    def _source_info(self):
+        stat = os.stat(self.path)
+        return {"source": os.path.abspath(self.path), "size": stat.st_size, "mtime": stat.st_mtime,
+                "vad_mode": VAD_MODE,
+                "target": list(TARGET_LANGUAGES) if TARGET_LANGUAGES else TARGET_LANGUAGE}
+
+    def _load_checkpoint(self):
+        """체크포인트가 같은 입력/설정으로 만든 것이면 (첫 기록 {"info", "spans", "samples"}, 완료 기록)을 반환합니다"""
+        if not os.path.exists(self.checkpoint_path):
+            return None, []
+        records = []
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # 중단될 때 잘린 마지막 줄
+        if not records or records[0].get("info") != self._source_info():
+            log.warning(f"⚠️ 입력이 바뀌어 체크포인트를 무시합니다: {self.checkpoint_path}")
+            return None, []
+        return records[0], records[1:]
+
+    def _record(self, payload):
+        with self._lock:
+            self._checkpoint.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            self._checkpoint.flush()
+
+    def run(self):
+        """전체 작업을 실행하고 요약 딕셔너리를 반환합니다"""
+        started = time.monotonic()
+        header, records = self._load_checkpoint()
+        if header is None:
+            spans, total_samples = split_on_silence(iter_audio_file(self.path))
+            self._checkpoint = open(self.checkpoint_path, "w", encoding="utf-8")
+            self._record({"info": self._source_info(), "spans": spans, "samples": total_samples})
+        else:
+            spans = header["spans"]
+            total_samples = header.get("samples") or (spans[-1][1] if spans else 0)
+            self._checkpoint = open(self.checkpoint_path, "a", encoding="utf-8")
+        self.segments = [Segment(i, start, end, None) for i, (start, end) in enumerate(spans)]
+        done = set()
+        for record in records:
+            segment = self.segments[record["seq"]]
+            if "text" in record:
+                segment.text = record["text"]
+                segment.src_lang = record["src_lang"]
+                segment.tgt_lang = record["tgt_lang"]
+                segment.targets = record.get("targets") or [segment.tgt_lang]
+                segment.route = record["route"]
+                for tgt, text in record.get("translations", {}).items():
+                    segment.set_translation(tgt, text)
+                segment.asr_segments = record.get("asr_segments", [])
+                done.add(segment.seq)
+            elif "translations" in record:
+                for tgt, text in record["translations"].items():
+                    segment.set_translation(tgt, text)
+        self.resumed = len(done)
+
+        try:
+            pending = [seg for seg in self.segments if seg.seq not in done]
+            jobs = min(self.jobs, len(pending))
+            if jobs:
+                self._tasks = queue.Queue(maxsize=jobs * 2)
+                threads = [Thread(target=self._asr_worker, args=(slot,), name=f"batch-asr-{slot}", daemon=True)
+                           for slot in range(jobs)]
+                for thread in threads:
+                    thread.start()
+                try:
+                    self._feed(pending)
+                finally:
+                    for _ in threads:
+                        self._tasks.put(None)
+                    for thread in threads:
+                        thread.join()
+            self._translate()
+        finally:
+            self._checkpoint.close()
+
+        cues = {}
+        for tgt, path in self.outputs.items():
+            track = self._cues(tgt)
+            write_subtitles(track, path, self.fmt)
+            cues[tgt] = len(track)
+        if self.failed == 0 and self.translation_failed == 0:
+            os.remove(self.checkpoint_path)
+        else:
+            log.warning(f"⚠️ {self.path}: 인식 실패 {self.failed}개, 번역 실패 {self.translation_failed}개 - "
+                        f"체크포인트를 남겼으니 다시 실행하면 재시도합니다 ({self.checkpoint_path})")
+        audio_seconds = total_samples / RATE
+        wall = time.monotonic() - started
+        return {
+            "source": self.path,
+            "output": self.output if len(self.outputs) == 1 else dict(self.outputs),
+            "audio_seconds": round(audio_seconds, 3),
+            "wall_seconds": round(wall, 3),
+            "real_time_factor": round(wall / audio_seconds, 4) if audio_seconds else None,
+            "jobs": self.jobs,
+            "segments": len(self.segments),
+            "cues": cues[None] if len(self.outputs) == 1 else cues,
+            "resumed": self.resumed,
+            "failed": self.failed,
+            "translation_failed": self.translation_failed,
+        }
+
+    def _feed(self, pending):
+        """파일을 처음부터 다시 읽으며 pending 구간의 오디오를 잘라 작업 큐에 넣습니다
+
+        큐가 차면 워커가 꺼낼 때까지 기다리므로, 메모리에는 읽기 블록 하나와 대기 중인
+        구간 몇 개만 남습니다.
+        """
+        pending = deque(sorted(pending, key=lambda seg: seg.start))
+        buffer = np.zeros(0, dtype=np.float32)
+        buffer_start = 0  # buffer[0]의 파일 기준 샘플 위치
+        for block in iter_audio_file(self.path):
+            buffer = np.concatenate((buffer, block))
+            buffer_end = buffer_start + len(buffer)
+            while pending and pending[0].end <= buffer_end:
+                segment = pending.popleft()
+                segment.audio = buffer[segment.start - buffer_start:segment.end - buffer_start].copy()
+                self._tasks.put(segment)
+            # 다음 구간이 시작되기 전 오디오는 더 필요 없음
+            keep = min(pending[0].start, buffer_end) if pending else buffer_end
+            buffer = buffer[keep - buffer_start:]
+            buffer_start = keep
+        for segment in pending:
+            # 리샘플러 꼬리 때문에 파일이 구간 끝보다 조금 짧을 수 있음
+            segment.audio = buffer[max(0, segment.start - buffer_start):max(0, segment.end - buffer_start)].copy()
+            self._tasks.put(segment)
+
+    def _asr_worker(self, slot):
+        threads = max(1, (os.cpu_count() or 2) // self.jobs)
+        worker = get_whisper_worker(slot, threads=threads) if WHISPER_ENGINE == "server" else None
+        while True:
+            segment = self._tasks.get()
+            if segment is None:
+                return
+            translate = whisper_should_translate()
+            try:
+                if worker is not None:
+                    result = worker.transcribe(segment.audio, translate=translate)
+                else:
+                    result = run_whisper_cli(segment.audio, translate=translate)
+            except Exception as e:
+                # 체크포인트에 남기지 않으므로 다시 실행하면 이 구간부터 재시도
+                log.error(f"❌ 구간 {segment.seq} 인식 실패: {e}")
+                with self._lock:
+                    self.failed += 1
+                continue
+            finally:
+                segment.audio = None
+            segment.text = result["text"]
+            segment.asr_segments = result["segments"]
+            if segment.text:
+                route_transcription(segment, result, translate)
+            self._record({"seq": segment.seq, "text": segment.text, "src_lang": segment.src_lang,
+                          "tgt_lang": segment.tgt_lang, "targets": segment.targets, "route": segment.route,
+                          "translations": segment.translations, "asr_segments": segment.asr_segments})
+
+    def _translate(self):
+        """M2M100이 필요한 구간을 (원문 언어, 남은 대상 언어들)별로 모아 배치 번역합니다"""
+        groups = {}
+        for segment in self.segments:
+            missing = tuple(tgt for tgt in segment.targets if tgt not in segment.translations)
+            if segment.route == "m2m100" and missing:
+                groups.setdefault((segment.src_lang, missing), []).append(segment)
+        for (src_lang, targets), segments in groups.items():
+            texts = [seg.text for seg in segments]
+            try:
+                if len(targets) == 1:
+                    translated = {targets[0]: translate_texts(texts, src_lang, targets[0])}
+                else:
+                    translated = translate_texts_multi(texts, src_lang, targets)
+            except Exception as e:
+                # 체크포인트에 번역을 남기지 않으므로 다시 실행하면 이 구간들의 번역만 재시도
+                log.error(f"❌ {src_lang}→{','.join(targets)} 번역 실패, 원문으로 씁니다: {e}")
+                self.translation_failed += len(segments)
+                continue
+            for i, segment in enumerate(segments):
+                for tgt in targets:
+                    segment.set_translation(tgt, translated[tgt][i])
+                self._record({"seq": segment.seq, "translations": {tgt: translated[tgt][i] for tgt in targets}})
+
+    def _cues(self, target_lang=None):
+        """구간마다 자막 하나 - whisper 세그먼트가 있으면 앞뒤 무음(pre-roll/hangover)을 잘라냄
+
+        target_lang을 주면 그 트랙의 번역을, 없으면 주 트랙 번역을 씁니다.
+        """
+        cues = []
+        for segment in self.segments:
+            translated = segment.translations.get(target_lang) if target_lang else segment.translated
+            text = (translated or segment.text).strip()
+            if not text:
+                continue
+            start = segment.start / RATE
+            end = segment.end / RATE
+            timed = [s for s in segment.asr_segments if "start" in s and "end" in s]
+            if timed:
+                start, end = (max(start, start + float(timed[0]["start"])),
+                              min(end, start + float(timed[-1]["end"])))
+            if cues and start < cues[-1][1]:
+                start = cues[-1][1]
+            if end > start:
+                cues.append((start, end, text))
+        return cues
+
+
+def run_batch(files, output=None, fmt="srt", jobs=BATCH_JOBS):
+    """파일들을 차례로 자막으로 만들고 파일별 요약 목록을 반환합니다
+
+    output은 파일이 하나면 출력 경로, 여럿이면 출력 디렉터리로 씁니다.
+    """
+    translation_model.start()
+    reports = []
+    try:
+        for path in files:
+            target = output
+            if output and (len(files) > 1 or os.path.isdir(output)):
+                os.makedirs(output, exist_ok=True)
+                target = os.path.join(output, os.path.splitext(os.path.basename(path))[0] + "." + fmt)
+            reports.append(BatchTranscriber(path, target, fmt, jobs).run())
+    finally:
+        stop_whisper_worker()
+        translation_cache.save()
+    return reports
+
+
+# ========== 헤드리스 자막 서버 ==========
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+SUBTITLE_VIEWER_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Live subtitles</title>
+<style>
+body { margin: 0; background: transparent; color: #fff; font: bold 36px sans-serif;
+       text-shadow: 0 0 6px #000, 0 0 2px #000; }
+#caption { position: fixed; left: 5%; right: 5%; bottom: 5%; text-align: center; white-space: pre-line; }
+#provisional { color: #bdbdbd; font-style: italic; }
+</style></head>
+<body><div id="caption"><span id="stable"></span> <span id="provisional"></span></div>
+<script>
+const events = new EventSource("/events");
+events.addEventListener("caption", (e) => {
+  const caption = JSON.parse(e.data);
+  document.getElementById("stable").textContent = caption.text;
+  document.getElementById("provisional").textContent = caption.provisional ? caption.provisional + "\u2026" : "";
+});
+</script></body></html>
+"""
+
+
+def websocket_frame(payload, opcode=0x1):
+    """서버 → 클라이언트 WebSocket 프레임 (FIN, 마스크 없음)"""
+    length = len(payload)
+    if length < 126:
+        header = bytes((0x80 | opcode, length))
+    elif length < 65536:
+        header = bytes((0x80 | opcode, 126)) + length.to_bytes(2, "big")
+    else:
+        header = bytes((0x80 | opcode, 127)) + length.to_bytes(8, "big")
+    return header + payload
+
+
+def is_loopback_host(host):
+    """host가 localhost나 루프백 IP인지"""
+    if not host:
+        return False
+    host = host.strip("[]").lower()
+    if host == "localhost" or host.endswith(".localhost"):
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def origin_allowed(origin, allowed=()):
+    """브라우저가 보낸 Origin 헤더를 받아줄지 - 없으면(브라우저가 아닌 클라이언트) 허용
+
+    localhost 페이지와 allowed에 그대로 적힌 Origin만 허용하므로 사용자가 열어 둔
+    다른 웹 페이지가 자막 스트림을 읽을 수 없습니다.
+    """
+    if origin is None:
+        return True
+    origin = origin.strip().rstrip("/").lower()
+    if origin in (entry.strip().rstrip("/").lower() for entry in allowed):
+        return True
+    try:
+        parts = urllib.parse.urlsplit(origin)
+    except ValueError:
+        return False
+    return parts.scheme in ("http", "https") and is_loopback_host(parts.hostname)
+
+
+class SubscriberQueue:
+    """구독자 하나의 전송 대기열 - 가득 차면 가장 오래된 이벤트를 버려 발행 쪽을 절대 막지 않습니다
+
+    이벤트 루프 스레드에서만 씁니다.
+    """
+    def __init__(self, maxsize=SERVE_CLIENT_QUEUE):
+        self.items = deque(maxlen=maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def put(self, item):
+        if len(self.items) == self.items.maxlen:
+            self.dropped += 1
+            metrics.counter("subtitle_server_dropped_total", "느린 구독자 대기열에서 버린 이벤트 수").inc()
+        self.items.append(item)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def get(self, timeout):
+        """다음 이벤트 - timeout 동안 없거나 닫혔으면 None"""
+        if not self.items and not self.closed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.items.popleft() if self.items else None
+
+
+class SubtitleServer:
+    """파이프라인 하나의 자막을 localhost의 구독자 여럿에게 내보내는 asyncio 서버
+
+    GET /events는 SSE, GET /ws는 WebSocket, GET /는 OBS 브라우저 소스용 페이지입니다.
+    루프백 주소에만 바인딩하고, Origin이 localhost나 origins 허용 목록이 아닌 브라우저 요청은 거절합니다.
+    이벤트는 {"type": "caption" | "segment", ...} JSON이고, caption은 오버레이와 같은
+    (안정 자막, 임시 꼬리), segment는 자막 기록과 같은 확정 항목입니다.
+    publish()는 어느 스레드에서 불러도 JSON을 한 번 만들어 이벤트 루프에 넘기고 바로 돌아옵니다.
+    구독자마다 크기가 정해진 대기열에서 가장 오래된 이벤트부터 버리고, 전송이 막힌 구독자는
+    끊으므로 느린 구독자가 ASR을 붙잡을 수 없습니다. 새 구독자는 마지막 자막부터 받습니다.
+    """
+    def __init__(self, host=SERVE_HOST, port=SERVE_PORT, queue_size=SERVE_CLIENT_QUEUE,
+                 heartbeat=SERVE_HEARTBEAT_SECONDS, origins=None):
+        if not is_loopback_host(host):
+            raise ValueError(f"자막 서버는 루프백 주소에만 바인딩합니다: {host}")
+        self.host = host
+        self.origins = SERVE_ORIGINS if origins is None else tuple(origins)
+        self.port = port
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.running = True
+        self.epoch = time.time()  # segment 이벤트 시각의 기준 (세션 시작)
+        self._clients = set()
+        self._tasks = set()
+        self._writers = set()
+        self._last_caption = None
+        self._loop = None
+        self._server = None
+        self._error = None
+        self._ready = Event()
+        self._thread = None
+        metrics.gauge("subtitle_server_clients", "연결된 자막 구독자 수", fn=lambda: len(self._clients))
+
+    def start(self):
+        self._thread = Thread(target=self._run, name="subtitle-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        log.info(f"📡 자막 서버: http://{self.host}:{self.port}/ (SSE /events, WebSocket /ws)")
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            self._loop.close()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._shutdown())
+            self._loop.close()
+
+    async def _shutdown(self):
+        # 핸들러를 취소하지 않고 연결을 끊어 스스로 끝나게 함
+        self.running = False
+        self._server.close()
+        for client in self._clients:
+            client.close()
+        for writer in self._writers:
+            writer.transport.abort()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def stop(self):
+        self.running = False
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def publish(self, kind, payload):
+        """이벤트 하나를 모든 구독자에게 보냅니다 - 블로킹 없이 바로 돌아옴"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        data = json.dumps({"type": kind, **payload}, ensure_ascii=False)
+        try:
+            loop.call_soon_threadsafe(self._fanout, kind, data)
+        except RuntimeError:
+            pass  # 종료 중
+        metrics.counter("subtitle_server_events_total", "자막 서버로 발행한 이벤트 수", type=kind).inc()
+
+    def update(self, text, provisional=""):
+        """SubtitlePipeline의 update_fn - 오버레이 대신 caption 이벤트로 보냄"""
+        self.publish("caption", {"text": text, "provisional": provisional})
+
+    def on_segment(self, segment):
+        if segment.kind == "partial" or segment.error is not None or not segment.text:
+            return
+        self.publish("segment", subtitle_entry(segment, self.epoch))
+
+    def _fanout(self, kind, data):
+        if kind == "caption":
+            self._last_caption = data
+        for client in self._clients:
+            client.put((kind, data))
+
+    def _subscribe(self):
+        client = SubscriberQueue(self.queue_size)
+        if self._last_caption is not None:
+            client.put(("caption", self._last_caption))
+        self._clients.add(client)
+        return client
+
+    async def _send(self, writer, data):
+        """전송 버퍼가 heartbeat의 두 배 동안 비지 않으면 그 구독자를 끊습니다"""
+        writer.write(data)
+        await asyncio.wait_for(writer.drain(), self.heartbeat * 2)
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        self._writers.add(writer)
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                return
+            lines = head.decode("latin-1").split("\r\n")
+            request = lines[0].split()
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            path = request[1].split("?", 1)[0] if len(request) >= 2 else ""
+            origin = headers.get("origin")
+            if not request or request[0] != "GET":
+                await self._respond(writer, "405 Method Not Allowed", "text/plain", b"method not allowed")
+            elif path in ("/events", "/ws") and not origin_allowed(origin, self.origins):
+                log.warning(f"⚠️ 자막 서버: 허용되지 않은 Origin의 구독 요청을 거절합니다 ({origin})")
+                metrics.counter("subtitle_server_rejected_total", "Origin이 허용되지 않아 거절한 구독 요청 수").inc()
+                await self._respond(writer, "403 Forbidden", "text/plain", b"origin not allowed")
+            elif path == "/events":
+                await self._serve_sse(writer, origin)
+            elif path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_websocket(reader, writer, headers)
+            elif path == "/":
+                await self._respond(writer, "200 OK", "text/html; charset=utf-8", SUBTITLE_VIEWER_HTML.encode("utf-8"))
             else:
-                display = "🎧 음성을 인식하지 못했습니다..."
-                print("🔇 음성 인식 실패")
-            
-            update_fn(display)
-            # sleep을 0.1~0.5초로 줄이면 더 빠름
-            time.sleep(0.1)
-        except Exception as e:
-            print(f"❌ 루프 실행 중 오류: {e}")
-            update_fn("⚠️ 오류가 발생했습니다...")
-            time.sleep(0.5)
-    
-    print("🛑 음성 인식 루프 종료")
+                await self._respond(writer, "404 Not Found", "text/plain", b"not found")
+        except (ConnectionError, asyncio.TimeoutError):
+            pass  # 끊겼거나 너무 느린 구독자
+        finally:
+            self._tasks.discard(task)
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _respond(self, writer, status, content_type, body):
+        await self._send(writer, (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                                  f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode("latin-1") + body)
+
+    async def _serve_sse(self, writer, origin=None):
+        # 허용된 Origin에만 그 Origin을 그대로 돌려줌 (와일드카드 없음)
+        cors = f"Access-Control-Allow-Origin: {origin}\r\nVary: Origin\r\n" if origin else ""
+        await self._send(writer, ("HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                                  f"Cache-Control: no-cache\r\n{cors}\r\n").encode("latin-1"))
+        client = self._subscribe()
+        try:
+            while self.running:
+                item = await client.get(self.heartbeat)
+                if item is None:
+                    await self._send(writer, b": ping\n\n")
+                else:
+                    kind, data = item
+                    await self._send(writer, f"event: {kind}\ndata: {data}\n\n".encode("utf-8"))
+        finally:
+            self._clients.discard(client)
+
+    async def _serve_websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._respond(writer, "400 Bad Request", "text/plain", b"missing Sec-WebSocket-Key")
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        await self._send(writer, ("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                                  f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("ascii"))
+        client = self._subscribe()
+        receiver = asyncio.ensure_future(self._websocket_receive(reader, writer, client))
+        try:
+            while self.running and not client.closed:
+                item = await client.get(self.heartbeat)
+                if client.closed:
+                    break
+                if item is None:
+                    await self._send(writer, websocket_frame(b"", opcode=0x9))  # ping
+                else:
+                    await self._send(writer, websocket_frame(item[1].encode("utf-8")))
+        finally:
+            receiver.cancel()
+            self._clients.discard(client)
+
+    async def _websocket_receive(self, reader, writer, client):
+        """클라이언트 프레임은 close/ping만 처리하고 나머지는 버립니다"""
+        try:
+            while True:
+                header = await reader.readexactly(2)
+                opcode = header[0] & 0x0F
+                length = header[1] & 0x7F
+                if length == 126:
+                    length = int.from_bytes(await reader.readexactly(2), "big")
+                elif length == 127:
+                    length = int.from_bytes(await reader.readexactly(8), "big")
+                if length > 65536:
+                    break  # 구독 전용 엔드포인트라 큰 프레임은 받지 않음
+                mask = await reader.readexactly(4) if header[1] & 0x80 else b""
+                payload = await reader.readexactly(length)
+                if mask:
+                    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+                if opcode == 0x8:
+                    writer.write(websocket_frame(payload[:2], opcode=0x8))
+                    break
+                if opcode == 0x9:
+                    writer.write(websocket_frame(payload, opcode=0xA))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            client.close()
+
+
+def run_headless(host=SERVE_HOST, port=SERVE_PORT, fake_files=None, speed=1.0, device_ids=(), origins=None):
+    """오버레이 없이 파이프라인을 한 번만 돌리고 자막을 SubtitleServer로 내보냅니다 (Ctrl+C로 종료)
+
+    fake_files를 주면 실제 장치 대신 그 파일들을 반복 재생하므로 오디오 장치 없는 리눅스에서도 돌아갑니다.
+    device_ids가 없으면 기본 입력 장치를 씁니다. 캡처 스트림이 열려 있는 동안은 PortAudio가 장치 목록을
+    갱신하지 않으므로 장치 폴링은 하지 않고, 장치 분리는 캡처 엔진의 감시 스레드가 처리합니다.
+    """
+    global selected_devices, selected_device_info
+    translation_model.start()
+    whisper_warmup.start()
+    if fake_files:
+        capture_sources.append(CaptureSource(FakeAudioDevice(fake_files, speed=speed, loop=True).start()))
+    else:
+        device_registry.devices()
+        devices = [device_registry.get(device_id) for device_id in device_ids] or [device_registry.fallback({})]
+        if None in devices:
+            missing = [device_id for device_id, device in zip(device_ids, devices) if device is None]
+            raise ValueError(f"오디오 장치를 찾을 수 없습니다: {', '.join(missing) or '기본 입력'}")
+        selected_devices = devices
+        selected_device_info = devices[0]
+    sources = start_capture_sources()
+    server = SubtitleServer(host, port, origins=origins).start()
+    if sources:
+        server.epoch = min(source.epoch for source in sources)
+    try:
+        speech_loop(server.update, server, on_segment=server.on_segment)
+    finally:
+        server.stop()
+
 
 def make_window_clickthrough(hwnd):
+    import win32gui, win32con
     styles = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
     styles |= win32con.WS_EX_LAYERED | win32con.WS_EX_TRANSPARENT | win32con.WS_EX_TOPMOST
     win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, styles)
@@ -595,9 +4827,22 @@ class OverlaySubtitleApp:
         self.fg_color = 'white'
         self.font_family = 'Arial'
         self.font_size = 28
-        self.label = tk.Label(root, text="🎧 자막 준비 중...", font=(self.font_family, self.font_size),
-                              fg=self.fg_color, bg=self.bg_color, wraplength=self._width, justify="center")
-        self.label.pack(expand=True, fill="both")
+        # 자막 영역 - 이전 줄(흐리게), 현재 안정 자막, 임시 꼬리(기울임)를 태그로 구분
+        self.caption = tk.Text(root, font=(self.font_family, self.font_size), fg=self.fg_color, bg=self.bg_color,
+                               wrap="word", bd=0, highlightthickness=0, cursor="arrow", height=1)
+        self.caption.pack(expand=True, fill="both")
+        # Text 기본 바인딩(선택/커서)을 빼서 창 이동/크기 조절 드래그만 받도록
+        self.caption.bindtags((str(self.caption), str(root), "all"))
+        self._configure_caption_tags()
+        self._subtitle_shown = False
+        self._updates = deque(maxlen=256)  # 워커 스레드 → Tk 스레드 (stable, provisional)
+        self._lines = deque(maxlen=max(1, OVERLAY_CAPTION_LINES - 1))  # 지나간 안정 자막 줄
+        self._stable = ""
+        self._provisional = ""
+        self._rendered = None
+        self._show_status("🎧 자막 준비 중...")
+        self.root.after(200, self.poll_model_status)
+        self.root.after(int(1000 / OVERLAY_MAX_FPS), self._drain_updates)
 
         # 설정 버튼
         self.settings_btn = tk.Button(root, text="⚙️", command=self.open_settings, font=("Arial", 14), bg="#333", fg="white", bd=0)
@@ -607,6 +4852,10 @@ class OverlaySubtitleApp:
         self.close_btn = tk.Button(root, text="❌", command=self.on_closing, font=("Arial", 14), bg="#333", fg="white", bd=0)
         self.close_btn.place(relx=1.0, rely=0.0, anchor="ne", x=-50, y=10)
 
+        # 자막 기록 버튼
+        self.history_btn = tk.Button(root, text="📜", command=self.open_history, font=("Arial", 14), bg="#333", fg="white", bd=0)
+        self.history_btn.place(relx=1.0, rely=0.0, anchor="ne", x=-90, y=10)
+
         # 창 이동 관련 변수
         self._offset_x = 0
         self._offset_y = 0
@@ -656,14 +4905,127 @@ class OverlaySubtitleApp:
             new_width = max(200, self._resize_start_width + dx)
             new_height = max(50, self._resize_start_height + dy)
             self.root.geometry(f"{new_width}x{new_height}")
-            self.label.config(wraplength=new_width)
 
     def stop_resize(self, event):
         self._resizing = False
 
-    def update_text(self, text):
-        if hasattr(self, 'label') and self.label.winfo_exists():
-            self.label.config(text=text)
+    def poll_model_status(self):
+        """첫 자막이 나오기 전까지 번역 모델 로드 진행 상황을 보여줍니다"""
+        if self._subtitle_shown or not self.caption.winfo_exists():
+            return
+        ready, status = warmup_status()
+        self._show_status(status)
+        if not ready and translation_model.error is None:
+            self.root.after(200, self.poll_model_status)
+
+    def update_text(self, text, provisional=""):
+        """안정된 자막과 아직 확정되지 않은 꼬리를 큐에 넣습니다 - 어느 스레드에서 불러도 안전
+
+        위젯은 Tk 스레드의 _drain_updates만 건드립니다.
+        """
+        self._updates.append((text, provisional))
+
+    def _drain_updates(self):
+        """쌓인 업데이트를 한 번에 반영하고 바뀐 것이 있을 때만 다시 그립니다 (최대 OVERLAY_MAX_FPS)"""
+        if not self.running or not self.caption.winfo_exists():
+            return
+        count = 0
+        while self._updates:
+            stable, provisional = self._updates.popleft()
+            count += 1
+            if not self._subtitle_shown:
+                self._subtitle_shown = True  # 상태 문구는 지나간 자막 줄로 남기지 않음
+            elif stable != self._stable and self._stable and not self._extends(self._stable, stable):
+                # 스트리밍 확정분이 이어 붙는 경우가 아니면 새 줄 - 이전 자막은 위로 올림
+                self._lines.append(self._stable)
+            self._stable = stable
+            self._provisional = provisional
+        if count:
+            metrics.counter("overlay_updates_total", "오버레이로 들어온 자막 업데이트 수").inc(count)
+            self._render()
+        self.root.after(int(1000 / OVERLAY_MAX_FPS), self._drain_updates)
+
+    @staticmethod
+    def _extends(old, new):
+        """새 자막이 이전 자막 뒤에 확정분만 이어 붙인 것인지 - 여러 트랙이면 줄마다 비교"""
+        old_lines, new_lines = old.split("\n"), new.split("\n")
+        return len(old_lines) == len(new_lines) and all(n.startswith(o) for o, n in zip(old_lines, new_lines))
+
+    def _show_status(self, text):
+        """자막이 나오기 전 상태 문구 (Tk 스레드 전용)"""
+        self._stable = text
+        self._provisional = ""
+        self._render()
+
+    def _render(self):
+        state = (tuple(self._lines), self._stable, self._provisional)
+        if state == self._rendered:
+            return  # 내용이 같으면 레이아웃을 다시 하지 않음
+        self._rendered = state
+        caption = self.caption
+        caption.configure(state="normal")
+        caption.delete("1.0", "end")
+        for line in self._lines:
+            caption.insert("end", f"{line}\n", "history")
+        caption.insert("end", self._stable, "stable")
+        if self._provisional:
+            caption.insert("end", f" {self._provisional}…", "provisional")
+        caption.configure(state="disabled")
+        caption.see("end")
+        metrics.counter("overlay_renders_total", "오버레이를 실제로 다시 그린 횟수").inc()
+
+    def _configure_caption_tags(self):
+        base = (self.font_family, self.font_size)
+        self.caption.tag_configure("history", foreground=OVERLAY_HISTORY_COLOR, justify="center",
+                                   font=(self.font_family, max(8, int(self.font_size * 0.7))))
+        self.caption.tag_configure("stable", foreground=self.fg_color, justify="center", font=base)
+        self.caption.tag_configure("provisional", foreground=OVERLAY_PROVISIONAL_COLOR, justify="center",
+                                   font=base + ("italic",))
+
+    def open_history(self):
+        """최근 자막 기록 창 - 열려 있는 동안 1초마다 새 항목을 덧붙입니다"""
+        history_win = tk.Toplevel(self.root)
+        history_win.title("자막 기록")
+        history_win.geometry("520x360")
+        history_win.attributes('-topmost', True)
+        text = tk.Text(history_win, wrap="word", font=("Arial", 11))
+        scrollbar = tk.Scrollbar(history_win, command=text.yview)
+        text.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        text.pack(side="left", expand=True, fill="both")
+        if subtitle_log is not None:
+            paths = ", ".join(subtitle_log.paths.values())
+            text.insert("end", f"기록 파일: {paths}\n\n")
+        else:
+            text.insert("end", "자막 기록이 꺼져 있습니다.\n\n")
+        text.configure(state="disabled")
+        shown = {"seq": set()}
+
+        def refresh():
+            if not history_win.winfo_exists():
+                return
+            if subtitle_log is not None:
+                entries = [e for e in subtitle_log.history() if e["seq"] not in shown["seq"]]
+                if entries:
+                    at_bottom = text.yview()[1] >= 0.999
+                    text.configure(state="normal")
+                    for entry in entries:
+                        shown["seq"].add(entry["seq"])
+                        stamp = time.strftime("%H:%M:%S", time.localtime(entry["time"]))
+                        source = f"[{entry['source']}] " if entry.get("source") else ""
+                        targets = ",".join(entry["translations"]) or entry["target"]
+                        original = entry["text"] if entry["text"] is not None else "(원문 없음 - whisper 번역만)"
+                        text.insert("end", f"[{stamp}] {source}({entry['language']}→{targets}) {original}\n")
+                        for tgt, translated in entry["translations"].items():
+                            if translated and translated != entry["text"]:
+                                prefix = f"{tgt.upper()}: " if len(entry["translations"]) > 1 else ""
+                                text.insert("end", f"    {prefix}{translated}\n")
+                    text.configure(state="disabled")
+                    if at_bottom:
+                        text.see("end")
+            history_win.after(1000, refresh)
+
+        refresh()
 
     def open_settings(self):
         settings_win = tk.Toplevel(self.root)
@@ -695,14 +5057,14 @@ class OverlaySubtitleApp:
         color = colorchooser.askcolor(title="배경색 선택", initialcolor=self.bg_color)[1]
         if color:
             self.bg_color = color
-            self.label.config(bg=self.bg_color)
+            self.caption.config(bg=self.bg_color)
             self.root.configure(bg=self.bg_color)
 
     def choose_fg_color(self):
         color = colorchooser.askcolor(title="글자색 선택", initialcolor=self.fg_color)[1]
         if color:
             self.fg_color = color
-            self.label.config(fg=self.fg_color)
+            self._configure_caption_tags()
 
     def choose_font(self):
         # 폰트 선택 다이얼로그 (tkinter 기본은 없음, 간단 구현)
@@ -726,14 +5088,15 @@ class OverlaySubtitleApp:
                 size = self.font_size
             self.font_family = family
             self.font_size = size
-            self.label.config(font=(self.font_family, self.font_size))
+            self.caption.config(font=(self.font_family, self.font_size))
+            self._configure_caption_tags()
             font_win.destroy()
         apply_btn = tk.Button(font_win, text="적용", command=apply_font)
         apply_btn.pack(pady=10)
 
     def on_closing(self, event=None):
         """프로그램 종료 처리"""
-        print("🛑 프로그램 종료 요청...")
+        log.info("🛑 프로그램 종료 요청...")
         self.running = False
         if hasattr(self, 'root') and self.root.winfo_exists():
             self.root.quit()
@@ -743,22 +5106,116 @@ class OverlaySubtitleApp:
     def cleanup(self):
         """정리 작업"""
         self.running = False
+        stop_capture_engine()
+        stop_whisper_worker()
+        translation_cache.save()
+        if subtitle_log is not None:
+            subtitle_log.close()
         if hasattr(self, 'root') and self.root.winfo_exists():
             self.root.quit()
             self.root.destroy()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 실시간 자막 앱")
+    parser.add_argument("--compare-backends", nargs="*", metavar="BACKEND",
+                        help="번역 백엔드 일치도/처리량 비교 후 JSON 출력 (기본: torch ctranslate2)")
+    parser.add_argument("--benchmark", metavar="DIR", help="DIR의 WAV 파일을 헤드리스로 재생해 성능을 JSON으로 출력")
+    parser.add_argument("--speed", type=float, default=1.0, help="벤치마크/--fake-audio 재생 배속 (0 = 최대 속도)")
+    parser.add_argument("--output", metavar="PATH", help="결과 JSON(--benchmark) 또는 자막 파일/디렉터리(--transcribe) 경로")
+    parser.add_argument("--whisper-exe", metavar="PATH", help="whisper-server 대신 쓸 실행 파일 (예: fake_whisper.py)")
+    parser.add_argument("--whisper-server-exe", metavar="PATH",
+                        help="whisper-server만 따로 지정 (--whisper-exe는 whisper-cli에 쓰임, 없는 경로면 whisper-cli로 대체)")
+    parser.add_argument("--whisper-engine", choices=("server", "cli"), default=WHISPER_ENGINE,
+                        help="server: 상주 whisper-server, cli: 청크마다 whisper-cli 실행")
+    parser.add_argument("--translation-backend", metavar="NAME", help="번역 백엔드 (torch, ctranslate2, identity)")
+    parser.add_argument("--log-level", default=LOG_LEVEL, help="로그 레벨 (DEBUG, INFO, WARNING, ERROR)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="localhost에서 /metrics, /metrics.json을 제공할 포트 (0 = 끔)")
+    parser.add_argument("--transcribe", nargs="+", metavar="FILE", help="오디오 파일을 SRT/VTT 자막 파일로 변환")
+    parser.add_argument("--format", choices=("srt", "vtt"), default="srt", help="--transcribe 출력 형식")
+    parser.add_argument("--jobs", type=int, default=BATCH_JOBS, help="--transcribe에서 동시에 띄울 Whisper 엔진 수")
+    parser.add_argument("--subtitle-log", metavar="DIR", default=SUBTITLE_LOG_DIR,
+                        help="세션 자막을 기록할 디렉터리 (빈 문자열 = 기록 안 함)")
+    parser.add_argument("--subtitle-formats", default=",".join(SUBTITLE_LOG_FORMATS),
+                        help="자막 기록 형식 (srt, vtt, jsonl을 쉼표로 구분)")
+    parser.add_argument("--targets", metavar="LANGS", default=",".join(TARGET_LANGUAGES or ()),
+                        help="동시에 만들 자막 트랙의 대상 언어 (예: ko,en,ja - 트랙마다 따로 표시/기록)")
+    parser.add_argument("--serve", nargs="?", type=int, const=SERVE_PORT, metavar="PORT",
+                        help="오버레이 없이 localhost에서 SSE(/events)/WebSocket(/ws)으로 자막 제공")
+    parser.add_argument("--serve-origins", metavar="ORIGINS", default=",".join(SERVE_ORIGINS),
+                        help="--serve에서 localhost 외에 구독을 허용할 브라우저 Origin (쉼표로 구분)")
+    parser.add_argument("--fake-audio", nargs="+", metavar="FILE",
+                        help="--serve에서 실제 장치 대신 반복 재생할 오디오 파일")
+    parser.add_argument("--device", action="append", default=[], metavar="ID",
+                        help="--serve에서 캡처할 장치 ID (여러 번 지정 가능, 기본: 기본 입력 장치)")
+    parser.add_argument("--asr-processes", action="store_true",
+                        help="ASR 워커를 별도 프로세스로 돌리고 오디오는 공유 메모리로 전달")
+    parser.add_argument("--latency-budget", type=float, default=LATENCY_BUDGET_SECONDS, metavar="SECONDS",
+                        help="말이 시작된 뒤 자막까지 목표 지연 (창 길이 포함) - 창 길이를 조절하고 밀린 구간을 합치거나 버림 (0 = 끔)")
+    parser.add_argument("--check-quantization", nargs="?", const="int8", choices=("int8", "bf16"),
+                        help="fp32 대비 양자화 가중치의 번역 품질과 속도를 비교")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    print("🎵 오프라인 자막 앱 시작...")
+    # PyInstaller로 묶은 exe에서 spawn된 ASR 워커 프로세스가 이 본문 대신 asr_process_main을 돌도록
+    multiprocessing.freeze_support()
+    args = parse_args()
+    setup_logging(args.log_level)
+    metrics_server = MetricsServer(args.metrics_port).start() if args.metrics_port else None
+    if args.whisper_exe:
+        WHISPER_SERVER_EXE = WHISPER_EXE = os.path.abspath(args.whisper_exe)
+    if args.whisper_server_exe:
+        WHISPER_SERVER_EXE = os.path.abspath(args.whisper_server_exe)
+    WHISPER_ENGINE = args.whisper_engine
+    if args.translation_backend:
+        TRANSLATION_BACKEND = args.translation_backend
+    SUBTITLE_LOG_DIR = args.subtitle_log
+    SUBTITLE_LOG_FORMATS = tuple(fmt.strip() for fmt in args.subtitle_formats.split(",") if fmt.strip())
+    TARGET_LANGUAGES = tuple(lang.strip() for lang in args.targets.split(",") if lang.strip()) or None
+    ASR_PROCESS_WORKERS = ASR_PROCESS_WORKERS or args.asr_processes
+    LATENCY_BUDGET_SECONDS = args.latency_budget
+    if args.benchmark:
+        report = run_benchmark(args.benchmark, speed=args.speed)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(output)
+        print(output)
+        sys.exit(0)
+    if args.transcribe:
+        reports = run_batch(args.transcribe, output=args.output, fmt=args.format, jobs=args.jobs)
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+        sys.exit(1 if any(report["failed"] or report["translation_failed"] for report in reports) else 0)
+    if args.serve is not None:
+        origins = tuple(origin.strip() for origin in args.serve_origins.split(",") if origin.strip())
+        run_headless(port=args.serve, fake_files=args.fake_audio, speed=args.speed, device_ids=args.device,
+                     origins=origins)
+        sys.exit(0)
+    if args.compare_backends is not None:
+        names = tuple(args.compare_backends) or ("torch", "ctranslate2")
+        print(json.dumps(compare_translation_backends(names), ensure_ascii=False, indent=2))
+        sys.exit(0)
+    if args.check_quantization:
+        names = ("torch:fp32", f"torch:{args.check_quantization}")
+        print(json.dumps(compare_translation_backends(names), ensure_ascii=False, indent=2))
+        sys.exit(0)
+    
+    log.info("🎵 오프라인 자막 앱 시작...")
+    
+    # 장치를 고르는 동안 번역 모델 로드와 워밍업, Whisper 엔진 워밍업을 백그라운드에서 진행
+    translation_model.start()
+    whisper_warmup.start()
     
     # 장치 선택 창 표시
     device_selector = DeviceSelector()
     selected_device = device_selector.run()
     
     if selected_device is None:
-        print("❌ 장치가 선택되지 않았습니다. 프로그램을 종료합니다.")
+        log.error("❌ 장치가 선택되지 않았습니다. 프로그램을 종료합니다.")
         sys.exit(0)
     
-    print(f"✅ 선택된 장치: {selected_device['name']}")
+    log.info(f"✅ 선택된 장치: {selected_device['name']}")
     
     # 메인 자막 앱 시작
     app = None
@@ -778,12 +5235,12 @@ if __name__ == "__main__":
         
         root.mainloop()
     except KeyboardInterrupt:
-        print("\n🛑 Ctrl+C로 프로그램 종료...")
+        log.info("🛑 Ctrl+C로 프로그램 종료...")
         if app:
             app.cleanup()
     except Exception as e:
-        print(f"❌ 프로그램 실행 중 오류: {e}")
+        log.error(f"❌ 프로그램 실행 중 오류: {e}")
         if app:
             app.cleanup()
     finally:
-        print("🛑 프로그램 종료 완료")
+        log.info("🛑 프로그램 종료 완료")
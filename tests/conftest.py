@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 테스트에서 main 모듈을 바로 import할 수 있게 저장소 루트를 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
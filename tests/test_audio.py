@@ -0,0 +1,92 @@
+"""링 버퍼(공유 메모리 포함)와 스트리밍 리샘플러 테스트"""
+import numpy as np
+import pytest
+
+import main
+
+
+def ramp(start, length):
+    return np.arange(start, start + length, dtype=np.float32)
+
+
+def test_ring_buffer_wraps_and_trims_overwritten_audio():
+    ring = main.AudioRingBuffer(8)
+    ring.write(ramp(0, 6))
+    start, audio = ring.read(2, 3)
+    assert start == 2 and audio.tolist() == [2, 3, 4]
+    ring.write(ramp(6, 6))  # 위치 12까지 - 0~3은 덮어써짐
+    assert ring.oldest_pos() == 4
+    start, audio = ring.read(2, 8)
+    assert start == 4 and audio.tolist() == list(range(4, 10))
+    assert ring.overruns == 1
+    # 아직 기록되지 않은 뒷부분은 빠짐
+    start, audio = ring.read(10, 5)
+    assert audio.tolist() == [10, 11]
+
+
+def test_ring_buffer_keeps_newest_when_block_exceeds_capacity():
+    ring = main.AudioRingBuffer(4)
+    ring.write(ramp(0, 10))
+    assert ring.write_pos == 10
+    start, audio = ring.read(6, 4)
+    assert start == 6 and audio.tolist() == [6, 7, 8, 9]
+
+
+
+@pytest.fixture
+def shared_ring():
+    ring = main.SharedAudioRingBuffer(8)
+    reader = main.SharedRingReader(ring.name)
+    yield ring, reader
+    reader.close()
+    ring.close()
+
+
+def test_shared_ring_reader(shared_ring):
+    ring, reader = shared_ring
+    ring.write(ramp(0, 6))
+    assert reader.capacity == 8
+    assert reader.read(ring.describe(1, 4, seq=0)).tolist() == [1, 2, 3, 4]
+    # 아직 기록되지 않은 구간은 읽지 않음
+    assert reader.read(ring.describe(4, 4, seq=1)) is None
+    ring.write(ramp(6, 4))
+    # 링 끝을 넘어가는 구간은 두 조각을 이은 사본
+    wrapped = ring.describe(5, 5, seq=2)
+    assert len(reader.views(wrapped)) == 2
+    assert reader.read(wrapped).tolist() == [5, 6, 7, 8, 9]
+    # 덮어써진 구간은 버림
+    assert reader.read(ring.describe(1, 2, seq=3)) is None
+    assert reader.dropped == 2
+
+def resample(rate, signal, block):
+    resampler = main.StreamingResampler(rate)
+    return np.concatenate([resampler.process(signal[i:i + block]) for i in range(0, len(signal), block)])
+
+
+@pytest.mark.parametrize("rate", [44100, 48000, 8000])
+def test_resampler_is_block_size_independent(rate):
+    t = np.arange(rate) / rate
+    signal = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    whole = resample(rate, signal, len(signal))
+    assert len(whole) == main.RATE
+    np.testing.assert_allclose(resample(rate, signal, 441), whole, atol=1e-5)
+    np.testing.assert_allclose(resample(rate, signal, 1000), whole, atol=1e-5)
+
+
+def test_resampler_keeps_tone_and_downmixes():
+    rate = 48000
+    t = np.arange(rate) / rate
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+    stereo = np.stack([tone, tone], axis=1).astype(np.float32)
+    out = main.StreamingResampler(rate, channels=2).process(stereo)
+    expected = 0.5 * np.sin(2 * np.pi * 440 * np.arange(len(out)) / main.RATE)
+    # 필터 지연만큼 어긋나므로 진폭(RMS)과 주파수(최대 성분)로 비교
+    steady = slice(main.RATE // 10, -main.RATE // 10)
+    assert np.sqrt(np.mean(out[steady] ** 2)) == pytest.approx(np.sqrt(np.mean(expected[steady] ** 2)), rel=0.02)
+    assert np.argmax(np.abs(np.fft.rfft(out))) == 440
+
+
+def test_resampler_passthrough():
+    block = np.ones((160, 1), dtype=np.float32)
+    out = main.StreamingResampler(main.RATE).process(block)
+    assert out.shape == (160,)
@@ -0,0 +1,59 @@
+"""하드웨어 없이 대역 엔진(fake_whisper.py)으로 --benchmark를 끝까지 돌려 보는 테스트
+
+whisper-server, 청크마다 whisper-cli, 그리고 whisper-server를 못 찾았을 때의 whisper-cli 대체를
+모두 실제 파이프라인으로 거칩니다.
+"""
+import json
+import os
+import subprocess
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RATE = 16000
+
+
+def write_speech_wav(path, seconds=(0.5, 1.5, 1.0)):
+    """무음 - 음성 비슷한 톤 - 무음 구간으로 된 16kHz 모노 WAV"""
+    silence_before, speech, silence_after = seconds
+    t = np.arange(int(speech * RATE)) / RATE
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    samples = np.concatenate([np.zeros(int(silence_before * RATE)), tone, np.zeros(int(silence_after * RATE))])
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes((samples * 32767).astype("<i2").tobytes())
+
+
+def run_benchmark(wav_dir, *extra):
+    command = [sys.executable, os.path.join(ROOT, "main.py"), "--benchmark", str(wav_dir), "--speed", "0",
+               "--whisper-exe", os.path.join(ROOT, "fake_whisper.py"), "--translation-backend", "identity",
+               "--subtitle-log", "", *extra]
+    result = subprocess.run(command, capture_output=True, timeout=120, cwd=ROOT)
+    assert result.returncode == 0, result.stderr.decode("utf-8", "replace")
+    return json.loads(result.stdout)
+
+
+@pytest.fixture(scope="module")
+def wav_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("wavs")
+    for i in range(2):
+        write_speech_wav(directory / f"speech{i}.wav")
+    return directory
+
+
+@pytest.mark.parametrize("extra, engine, used", [
+    ((), "server", "server"),
+    (("--whisper-engine", "cli"), "cli", "cli"),
+    (("--whisper-server-exe", os.path.join(ROOT, "missing-whisper-server")), "server", "cli"),
+])
+def test_benchmark_engines(wav_dir, extra, engine, used):
+    report = run_benchmark(wav_dir, *extra)
+    assert report["segments"] == 2
+    assert report["config"]["whisper_engine"] == engine
+    assert report["config"]["whisper_engine_used"] == used
+    assert report["subtitle_delay"]["count"] == 2
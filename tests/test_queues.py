@@ -0,0 +1,48 @@
+"""파이프라인 단계 사이 큐 테스트"""
+import main
+
+
+class Item:
+    def __init__(self, source, value):
+        self.source = source
+        self.value = value
+
+
+def values(queue):
+    out = []
+    while len(queue):
+        out.append(queue.get(timeout=0).value)
+    return out
+
+
+def test_drop_oldest_queue():
+    queue = main.DropOldestQueue(2, name="test-drop")
+    for value in range(4):
+        queue.put(Item("a", value))
+    assert queue.dropped == 2
+    assert values(queue) == [2, 3]
+    assert queue.get(timeout=0) is None
+    queue.close()
+    assert queue.get() is None
+
+
+def test_fair_queue_round_robin_and_per_source_drop():
+    queue = main.FairQueue(2, name="test-fair")
+    for value in range(4):
+        queue.put(Item("busy", value))
+    queue.put(Item("quiet", "q"))
+    # 말이 많은 소스는 자기 가장 오래된 항목만 잃고 다른 소스를 밀어내지 않음
+    assert queue.dropped == 2
+    assert values(queue) == [2, "q", 3]
+    queue.close()
+    assert queue.get() is None
+
+
+def test_fair_queue_take():
+    queue = main.FairQueue(4, name="test-fair")
+    for value in range(3):
+        queue.put(Item("a", value))
+    queue.put(Item("b", "b"))
+    assert [item.value for item in queue.take("a", lambda item: item.value < 2)] == [0, 1]
+    assert queue.take("missing", lambda item: True) == []
+    assert len(queue) == 2
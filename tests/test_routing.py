@@ -0,0 +1,99 @@
+"""whisper가 보고한 언어로 원문/대상 언어와 번역 경로를 정하는 로직 테스트"""
+import numpy as np
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def default_target(monkeypatch):
+    """자막 언어를 지정하지 않은 기본 설정 (원문이 영어면 한국어, 아니면 영어)"""
+    monkeypatch.setattr(main, "TARGET_LANGUAGE", None)
+    monkeypatch.setattr(main, "TARGET_LANGUAGES", None)
+    monkeypatch.setattr(main, "WHISPER_LANGUAGE", "auto")
+
+
+def make_segment(text):
+    segment = main.Segment(0, 0, main.RATE, np.zeros(main.RATE, dtype=np.float32))
+    segment.text = text
+    return segment
+
+
+@pytest.mark.parametrize("language, code", [
+    ("korean", "ko"),
+    ("Dutch", "nl"),
+    ("turkish", "tr"),
+    ("javanese", "jv"),
+    ("jw", "jv"),
+    ("ko", "ko"),
+    (" English ", "en"),
+    ("klingon", None),
+    ("xx", None),
+    ("", None),
+    (None, None),
+])
+def test_whisper_language_code(language, code):
+    assert main.whisper_language_code(language) == code
+
+
+def test_korean_goes_to_m2m100():
+    segment = make_segment("안녕하세요")
+    assert main.route_transcription(segment, {"language": "korean"}, translated=False)
+    assert (segment.src_lang, segment.targets, segment.route) == ("ko", ["en"], "m2m100")
+    assert segment.translations == {}
+
+
+def test_english_is_translated_to_korean():
+    segment = make_segment("hello")
+    assert main.route_transcription(segment, {"language": "english"}, translated=False)
+    assert (segment.src_lang, segment.tgt_lang, segment.route) == ("en", "ko", "m2m100")
+
+
+def test_whisper_translation_skips_m2m100():
+    segment = make_segment("Hello everyone")
+    assert not main.route_transcription(segment, {"language": "dutch"}, translated=True)
+    assert segment.src_lang == "nl"
+    assert segment.route == "whisper"
+    assert segment.translated == "Hello everyone"
+
+
+def test_unknown_language_is_not_translated():
+    segment = make_segment("qapla'")
+    assert not main.route_transcription(segment, {"language": "klingon"}, translated=False)
+    assert segment.src_lang is None
+    assert segment.route == "untranslated"
+    assert segment.translations == {"en": "qapla'"}
+
+
+def test_missing_language_falls_back_to_text_detection():
+    segment = make_segment("안녕하세요")
+    assert main.route_transcription(segment, {}, translated=False)
+    assert segment.src_lang == "ko"
+
+
+@pytest.mark.parametrize("configured, code", [("german", "de"), ("fr", "fr")])
+def test_missing_language_uses_configured_language(monkeypatch, configured, code):
+    """언어를 고정한 whisper-cli는 언어를 보고하지 않음 - 라틴 문자라고 영어로 보면 안 됨"""
+    monkeypatch.setattr(main, "WHISPER_LANGUAGE", configured)
+    segment = make_segment("Guten Tag")
+    assert main.route_transcription(segment, {}, translated=False)
+    assert (segment.src_lang, segment.targets, segment.route) == (code, ["en"], "m2m100")
+
+
+def test_same_language_passes_through(monkeypatch):
+    monkeypatch.setattr(main, "TARGET_LANGUAGE", "en")
+    segment = make_segment("hello")
+    assert not main.route_transcription(segment, {"language": "en"}, translated=False)
+    assert segment.route == "passthrough"
+    assert segment.translated == "hello"
+
+
+def test_track_in_source_language_passes_through(monkeypatch):
+    monkeypatch.setattr(main, "TARGET_LANGUAGES", ["ko", "en"])
+    segment = make_segment("안녕하세요")
+    assert main.route_transcription(segment, {"language": "ko"}, translated=False)
+    assert segment.translations == {"ko": "안녕하세요"}
+    assert segment.route == "m2m100"
+    # 여러 트랙에는 원문이 필요하므로 whisper 번역 출력으로 건너뛰지 않음
+    segment = make_segment("안녕하세요")
+    assert main.route_transcription(segment, {"language": "ko"}, translated=True)
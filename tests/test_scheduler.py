@@ -0,0 +1,113 @@
+"""LatencyScheduler의 창 길이 결정과 밀린 구간 처리 테스트"""
+import time
+
+import pytest
+
+import main
+
+
+def measured(rtf, overhead, translation=0.0, budget=3.0, workers=1):
+    """길이가 다른 두 호출로 고정 비용과 RTF를 정확히 알려 준 스케줄러"""
+    scheduler = main.LatencyScheduler(budget=budget, asr_workers=workers, alpha=0.5)
+    for seconds in (1.0, 4.0):
+        scheduler.observe_asr(seconds, overhead + rtf * seconds)
+    scheduler.observe_translation(translation / scheduler.alpha)  # 0에서 한 번 갱신하면 alpha배
+    return scheduler
+
+
+def make_segment(source, start_seconds, seconds, age):
+    start = int(start_seconds * main.RATE)
+    segment = main.Segment(0, start, start + int(seconds * main.RATE), None)
+    segment.source = source
+    segment.timings["captured"] = time.monotonic() - age
+    return segment
+
+
+def test_default_window_before_measurements():
+    scheduler = main.LatencyScheduler(budget=3.0)
+    assert scheduler.window_seconds(2.0) == 2.0
+    assert scheduler.expected_asr(2.0) == 0.0
+
+
+def test_disabled_scheduler_keeps_default():
+    scheduler = measured(rtf=0.3, overhead=0.2, budget=0)
+    assert not scheduler.enabled
+    assert scheduler.window_seconds(2.0) == 2.0
+
+
+def test_estimates_overhead_and_rtf():
+    scheduler = measured(rtf=0.3, overhead=0.2, translation=0.1)
+    assert scheduler.asr_rtf == pytest.approx(0.3)
+    assert scheduler.asr_overhead == pytest.approx(0.2)
+    assert scheduler.translation_seconds == pytest.approx(0.1)
+
+
+@pytest.mark.parametrize("rtf, overhead, translation", [
+    (0.05, 0.0, 0.0),
+    (0.3, 0.2, 0.1),
+    (0.5, 0.1, 0.3),
+])
+def test_window_fits_budget(rtf, overhead, translation):
+    """창 + 그 창의 ASR + 번역이 예산을 꽉 채움"""
+    scheduler = measured(rtf, overhead, translation)
+    window = scheduler.window_seconds(2.0)
+    assert window + scheduler.expected_asr(window) + translation == pytest.approx(scheduler.budget)
+
+
+def test_window_is_clamped():
+    assert measured(rtf=0.01, overhead=0.0, budget=30.0).window_seconds(2.0) == main.SCHEDULER_MAX_WINDOW_SECONDS
+    assert measured(rtf=0.5, overhead=2.9, workers=8).window_seconds(2.0) == main.SCHEDULER_MIN_WINDOW_SECONDS
+
+
+def test_throughput_lower_bound():
+    """예산 안에 들 수 없으면 워커가 입력을 따라갈 수 있는 창 길이를 우선함"""
+    scheduler = measured(rtf=0.9, overhead=0.5)
+    window = scheduler.window_seconds(2.0, upper=10.0)
+    assert window == pytest.approx(0.5 / (1 - 0.9) * 1.2)
+    assert window + scheduler.expected_asr(window) > scheduler.budget
+    # 워커가 늘면 고정 비용을 나눠 낼 수 있어 다시 예산 쪽으로 내려감
+    assert measured(rtf=0.9, overhead=0.5, workers=2).window_seconds(2.0, upper=10.0) < window
+
+
+def test_plan_keeps_segment_within_budget():
+    scheduler = measured(rtf=0.1, overhead=0.1)
+    queue = main.FairQueue(4, name="test-plan")
+    segment = make_segment("a", 0, 1.0, age=0.5)
+    queue.put(make_segment("a", 1, 1.0, age=0.0))
+    assert scheduler.plan(segment, queue) == [segment]
+    assert len(queue) == 1
+
+
+def test_plan_merges_queued_segments_from_same_source():
+    scheduler = measured(rtf=0.1, overhead=0.1)
+    queue = main.FairQueue(4, name="test-plan")
+    segment = make_segment("a", 0, 1.0, age=2.9)
+    later = make_segment("a", 1, 1.0, age=1.5)
+    other = make_segment("b", 0, 1.0, age=2.0)
+    queue.put(later)
+    queue.put(other)
+    assert scheduler.plan(segment, queue) == [segment, later]
+    assert scheduler.merged == 1
+    assert queue.get(timeout=0) is other
+
+
+def test_plan_skips_stale_segments_but_keeps_newest():
+    scheduler = measured(rtf=0.1, overhead=0.1)
+    queue = main.FairQueue(4, name="test-plan")
+    stale_age = scheduler.budget * main.SCHEDULER_SKIP_FACTOR + 1
+    segment = make_segment("a", 0, 1.0, age=stale_age + 1)
+    older = make_segment("a", 1, 1.0, age=stale_age)
+    newest = make_segment("a", 2, 1.0, age=stale_age)
+    queue.put(older)
+    queue.put(newest)
+    assert scheduler.plan(segment, queue) == [newest]
+    assert scheduler.skipped == 2
+
+
+def test_disabled_scheduler_never_merges():
+    scheduler = measured(rtf=0.1, overhead=0.1, budget=0)
+    queue = main.FairQueue(4, name="test-plan")
+    segment = make_segment("a", 0, 1.0, age=100)
+    queue.put(make_segment("a", 1, 1.0, age=100))
+    assert scheduler.plan(segment, queue) == [segment]
+    assert len(queue) == 1
@@ -0,0 +1,49 @@
+"""compare_translation_backends의 일치도/처리량 보고 테스트 - 모델 대신 대역 백엔드를 씁니다"""
+import pytest
+
+import main
+
+
+class EchoBackend(main.IdentityBackend):
+    """identity와 똑같이 번역하는 두 번째 백엔드"""
+    name = "echo"
+
+
+class DriftingBackend(main.IdentityBackend):
+    """일본어 원문만 다르게 번역하는 백엔드"""
+    name = "drifting"
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        outputs = super().translate_batch(texts, source_lang, target_lang)
+        return [output.upper() if source_lang == "ja" else output for output in outputs]
+
+
+@pytest.fixture(autouse=True)
+def stub_backends(monkeypatch):
+    for backend in (EchoBackend, DriftingBackend):
+        monkeypatch.setitem(main.TRANSLATION_BACKENDS, backend.name, backend)
+
+
+def test_identical_backends_match():
+    report = main.compare_translation_backends(("identity", "echo"), repeats=1)
+    assert report["sentences"] == len(main.PARITY_SENTENCES)
+    assert report["backends"]["echo"]["parity"] == {"reference": "identity", "exact_match": 1.0,
+                                                    "char_similarity": 1.0}
+    assert "parity" not in report["backends"]["identity"]
+    assert report["backends"]["identity"]["outputs"][0] == f"[en] {main.PARITY_SENTENCES[0][2]}"
+    for result in report["backends"].values():
+        assert result["sentences_per_second"] > 0
+        assert len(result["outputs"]) == len(main.PARITY_SENTENCES)
+
+
+def test_diverging_backend_lowers_parity():
+    report = main.compare_translation_backends(("identity", "drifting"), repeats=2)
+    parity = report["backends"]["drifting"]["parity"]
+    differing = sum(src == "ja" for src, _, _ in main.PARITY_SENTENCES)
+    assert parity["exact_match"] == round(1 - differing / len(main.PARITY_SENTENCES), 3)
+    assert 0 < parity["char_similarity"] < 1
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        main.compare_translation_backends(("identity", "missing"), repeats=1)
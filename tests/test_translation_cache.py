@@ -0,0 +1,88 @@
+"""번역 캐시 적중/실패 횟수 테스트 - 모델 대신 대상 언어 표시만 붙이는 번역을 씁니다"""
+import pytest
+
+import main
+
+
+def fake_translate(text, source_lang, target_lang):
+    return f"[{target_lang}] {text}"
+
+
+def fake_translate_multi(texts, source_lang, target_langs):
+    return {tgt: [fake_translate(text, source_lang, tgt) for text in texts] for tgt in target_langs}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = main.TranslationCache(path=None)
+    monkeypatch.setattr(main, "translation_cache", cache)
+    monkeypatch.setattr(main, "translate_text_uncached", fake_translate)
+    monkeypatch.setattr(main, "translate_batch_multi", fake_translate_multi)
+    monkeypatch.setattr(main, "TRANSLATION_BATCHING", False)
+    return cache
+
+
+def counts(cache):
+    return cache.hits, cache.misses
+
+
+def test_translate_text_counts(cache):
+    assert main.translate_text("hello", "en", "ko") == "[ko] hello"
+    assert counts(cache) == (0, 1)
+    assert main.translate_text("hello", "en", "ko") == "[ko] hello"
+    assert counts(cache) == (1, 1)
+    assert main.translate_text("", "en", "ko") == ""
+    assert counts(cache) == (1, 1)
+
+
+def test_key_is_normalized(cache):
+    main.translate_text("hello   world", "en", "ko")
+    assert main.translate_text(" hello world ", "en", "ko") == "[ko] hello   world"
+    assert counts(cache) == (1, 1)
+
+
+def test_key_includes_language_pair(cache):
+    main.translate_text("hello", "en", "ko")
+    main.translate_text("hello", "en", "ja")
+    main.translate_text("hello", "fr", "ko")
+    assert counts(cache) == (0, 3)
+
+
+def test_translate_text_multi_counts(cache):
+    assert main.translate_text_multi("hi", "en", ["ko", "ja"]) == {"ko": "[ko] hi", "ja": "[ja] hi"}
+    assert counts(cache) == (0, 2)
+    main.translate_text_multi("hi", "en", ["ko", "ja"])
+    assert counts(cache) == (2, 2)
+    # 대상 하나만 캐시에 없으면 그 실패는 한 번만 셈
+    assert main.translate_text_multi("hi", "en", ["ko", "ja", "fr"])["fr"] == "[fr] hi"
+    assert counts(cache) == (4, 3)
+    assert cache.stats()["size"] == 3
+    assert main.translate_text_multi("", "en", ["ko", "ja"]) == {"ko": "", "ja": ""}
+
+
+def test_lru_eviction(cache):
+    cache.maxsize = 2
+    for text in ("a", "b", "c"):
+        main.translate_text(text, "en", "ko")
+    assert cache.get("a", "en", "ko") is None
+    assert cache.get("c", "en", "ko") == "[ko] c"
+
+
+def test_ttl_expiry(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(main.time, "time", lambda: now[0])
+    cache.ttl = 60
+    main.translate_text("hello", "en", "ko")
+    now[0] += 59
+    assert cache.get("hello", "en", "ko") == "[ko] hello"
+    now[0] += 2
+    assert cache.get("hello", "en", "ko") is None
+    assert counts(cache) == (1, 2)
+
+
+def test_cache_file_round_trip(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = main.TranslationCache(path=path)
+    cache.put("hello", "en", "ko", "안녕")
+    cache.save()
+    assert main.TranslationCache(path=path).get("hello", "en", "ko") == "안녕"